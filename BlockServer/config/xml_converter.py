@@ -14,7 +14,6 @@
 # https://www.eclipse.org/org/documents/epl-v10.php or
 # http://opensource.org/licenses/eclipse-1.0.php
 
-from xml.dom import minidom
 from server_common.utilities import *
 
 from BlockServer.config.group import Group
@@ -80,7 +79,7 @@ class ConfigurationXmlConverter(object):
             if block.component is None or block.component is False:
                 ConfigurationXmlConverter._block_to_xml(root, block, macros)
 
-        return minidom.parseString(ElementTree.tostring(root)).toprettyxml()
+        return element_to_pretty_xml(root)
 
     @staticmethod
     def groups_to_xml(groups, include_none=False):
@@ -105,7 +104,7 @@ class ConfigurationXmlConverter(object):
         # If we are adding the None group it should go at the end
         if include_none and KEY_NONE in groups.keys():
             ConfigurationXmlConverter._group_to_xml(root, groups[KEY_NONE])
-        return minidom.parseString(ElementTree.tostring(root)).toprettyxml()
+        return element_to_pretty_xml(root)
 
     @staticmethod
     def iocs_to_xml(iocs):
@@ -125,7 +124,7 @@ class ConfigurationXmlConverter(object):
             # Don't save if in component
             if iocs[name].component is None:
                 ConfigurationXmlConverter._ioc_to_xml(root, iocs[name])
-        return minidom.parseString(ElementTree.tostring(root)).toprettyxml()
+        return element_to_pretty_xml(root)
 
     @staticmethod
     def components_to_xml(comps):
@@ -143,7 +142,7 @@ class ConfigurationXmlConverter(object):
         root.attrib["xmlns:xi"] = "http://www.w3.org/2001/XInclude"
         for name, case_sensitve_name in comps.iteritems():
             ConfigurationXmlConverter._component_to_xml(root, case_sensitve_name)
-        return minidom.parseString(ElementTree.tostring(root)).toprettyxml()
+        return element_to_pretty_xml(root)
 
     @staticmethod
     def meta_to_xml(data):
@@ -171,7 +170,7 @@ class ConfigurationXmlConverter(object):
         protect_xml = ElementTree.SubElement(root, TAG_PROTECTED)
         protect_xml.text = str(data.isProtected).lower()
 
-        return minidom.parseString(ElementTree.tostring(root)).toprettyxml()
+        return element_to_pretty_xml(root)
 
     @staticmethod
     def _block_to_xml(root_xml, block, macros):
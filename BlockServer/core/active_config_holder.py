@@ -103,7 +103,7 @@ class ActiveConfigHolder(ConfigHolder):
     """
     Class to serve up the active configuration.
     """
-    def __init__(self, macros, archive_manager, file_manager, ioc_control):
+    def __init__(self, macros, archive_manager, file_manager, ioc_control, notify_files_changed=None):
         """ Constructor.
 
         Args:
@@ -111,10 +111,12 @@ class ActiveConfigHolder(ConfigHolder):
             archive_manager (ArchiverManager): Responsible for updating the archiver
             file_manager (ConfigurationFileManager|MockVersionControl): Deals with writing the config files
             ioc_control (IocControl): Manages stopping and starting IOCs
+            notify_files_changed (function): Called with the paths of files written, so version control commits them
         """
         super(ActiveConfigHolder, self).__init__(macros, file_manager)
         self._archive_manager = archive_manager
         self._ioc_control = ioc_control
+        self._notify_files_changed = notify_files_changed
         self._db = None
 
     def save_active(self, name, as_comp=False):
@@ -158,8 +160,11 @@ class ActiveConfigHolder(ConfigHolder):
         Args:
             config_name (string): The name of the last configuration used
         """
-        with open(FILEPATH_MANAGER.get_last_config_file_path(), 'w') as f:
+        last_config_file_path = FILEPATH_MANAGER.get_last_config_file_path()
+        with open(last_config_file_path, 'w') as f:
             f.write(config_name + "\n")
+        if self._notify_files_changed is not None:
+            self._notify_files_changed([last_config_file_path])
 
     def load_last_config(self):
         """ Load the last used configuration.
@@ -418,6 +418,9 @@ class ConfigHolder(object):
         Args:
             name (string): The name to save the configuration under
             as_component (bool): Whether to save as a component
+
+        Returns:
+            list : The paths of the files written
         """
         self._check_name(name, as_component)
         if self._is_component != as_component:
@@ -425,11 +428,11 @@ class ConfigHolder(object):
 
         if self._is_component:
             self._set_config_name(name)
-            self._filemanager.save_config(self._config, True)
+            return self._filemanager.save_config(self._config, True)
         else:
             self._set_config_name(name)
             # TODO: CHECK WHAT COMPONENTS self._config contains and remove _base if it is in there
-            self._filemanager.save_config(self._config, False)
+            return self._filemanager.save_config(self._config, False)
 
     def _check_name(self, name, is_comp=False):
         # Not empty
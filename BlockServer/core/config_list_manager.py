@@ -310,6 +310,7 @@ class ConfigListManager(object):
     def _delete_single_config(self, config):
         try:
             self.file_manager.delete(config, is_component=False)
+            self._bs.notify_files_changed([FILEPATH_MANAGER.get_config_path(config)])
         except MaxAttemptsExceededException:
             print_and_log("Could not delete configuration {name} from file system. "
                           "Make sure its files are not in use by a different process.".format(name=config),
@@ -367,6 +368,7 @@ class ConfigListManager(object):
         """
         try:
             self.file_manager.delete(component, is_component=True)
+            self._bs.notify_files_changed([FILEPATH_MANAGER.get_component_path(component)])
         except MaxAttemptsExceededException:
             print_and_log("Could not delete component {name} from file system. "
                           "Make sure its files are not in use by a different process.".format(name=component),
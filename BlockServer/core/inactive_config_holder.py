@@ -36,11 +36,14 @@ class InactiveConfigHolder(ConfigHolder):
         Args:
             name (string): The name to save it under (defaults to the current config name)
             as_comp (bool): Whether to save it as a component (defaults to False)
+
+        Returns:
+            list : The paths of the files written
         """
         if name is None:
             name = self.get_config_name()
 
-        self.save_configuration(name, as_comp)
+        return self.save_configuration(name, as_comp)
 
     def load_inactive(self, name, is_component=False):
         """
@@ -54,9 +54,7 @@ class DevicesManager(OnTheFlyPvInterface):
 
     def _create_standard_pvs(self):
         """ Creates new PVs holding information relevant to the device screens. """
-        self._bs.add_string_pv_to_db(GET_SCREENS, 16000)
-        self._bs.add_string_pv_to_db(SET_SCREENS, 16000)
-        self._bs.add_string_pv_to_db(GET_SCHEMA, 16000)
+        self._bs.add_string_pvs_to_db({GET_SCREENS: 16000, SET_SCREENS: 16000, GET_SCHEMA: 16000})
 
     def handle_pv_write(self, pv, data):
         if pv == SET_SCREENS:
@@ -144,6 +142,7 @@ class DevicesManager(OnTheFlyPvInterface):
             self._file_io.save_devices_file(self.get_devices_filename(), xml_data)
         except MaxAttemptsExceededException:
             raise IOError("Unable to save devices file. Please check the file is not in use by another process.")
+        self._bs.notify_files_changed([self.get_devices_filename()])
 
         # Update PVs
         self.update(xml_data, "Device screens modified by client")
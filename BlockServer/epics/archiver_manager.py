@@ -18,11 +18,9 @@
 
 import os
 import datetime
-import time
 from subprocess import Popen
 import xml.etree.ElementTree as eTree
-from xml.dom import minidom
-from server_common.utilities import print_and_log
+from server_common.utilities import print_and_log, element_to_pretty_xml
 from archiver_wrapper import ArchiverWrapper
 
 
@@ -42,29 +40,36 @@ class ArchiverManager(object):
         self._uploader_path = uploader_path
         self._settings_path = settings_path
         self._archive_wrapper = archiver
+        self._last_uploaded_config = None
 
     def update_archiver(self, block_prefix, blocks):
         """Update the archiver to log the blocks specified.
 
+        The archiver is only reconfigured and restarted if its configuration has changed since it was last uploaded.
+
         Args:
             block_prefix (string): The block prefix
             blocks (list): The blocks to archive
         """
         try:
+            archive_config = None
             if self._settings_path is not None:
-                self._generate_archive_config(block_prefix, blocks)
+                archive_config = self._generate_archive_config(block_prefix, blocks)
+                if archive_config == self._last_uploaded_config:
+                    print_and_log("Archiver configuration unchanged, not updating archiver")
+                    return
+                self._write_archive_config(archive_config)
             if self._uploader_path is not None:
                 self._upload_archive_config()
-                # Needs a second delay
-                print_and_log("Arbitrary wait after running archive settings uploader")
-                time.sleep(1)
-                print_and_log("Finished arbitrary wait")
+                if not self._archive_wrapper.wait_for_ready():
+                    print_and_log("Archive engine is not responding, restarting it anyway", "MINOR")
                 self._archive_wrapper.restart_archiver()
+            self._last_uploaded_config = archive_config
         except Exception as err:
             print_and_log("Could not update archiver: %s" % str(err), "MAJOR")
 
     def _generate_archive_config(self, block_prefix, blocks):
-        print_and_log("Generating archiver configuration file: %s" % self._settings_path)
+        print_and_log("Generating archiver configuration")
         root = eTree.Element('engineconfig')
         group = eTree.SubElement(root, 'group')
         name = eTree.SubElement(group, 'name')
@@ -76,9 +81,12 @@ class ArchiverManager(object):
             # Append prefix for the archiver
             self._generate_archive_channel(group, block_prefix, block, dataweb)
 
+        return element_to_pretty_xml(root)
+
+    def _write_archive_config(self, archive_config):
+        print_and_log("Writing archiver configuration file: %s" % self._settings_path)
         with open(self._settings_path, 'w') as f:
-            xml = minidom.parseString(eTree.tostring(root)).toprettyxml()
-            f.write(xml)
+            f.write(archive_config)
 
     def _upload_archive_config(self):
         f = os.path.abspath(self._uploader_path)
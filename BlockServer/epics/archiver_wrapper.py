@@ -14,14 +14,59 @@
 # https://www.eclipse.org/org/documents/epl-v10.php or
 # http://opensource.org/licenses/eclipse-1.0.php
 
-import urllib2
+import socket
+import time
+
+from six.moves.urllib.error import URLError
+from six.moves.urllib.request import ProxyHandler, build_opener
+
+# The archive engine's web server
+ARCHIVE_ENGINE_URL = "http://localhost:4813"
+
+# How long to wait for the archive engine to respond before restarting it anyway, no longer than the fixed wait this
+# replaced, so a config load is not held up when the archive engine is down
+READY_TIMEOUT = 1.0
+READY_POLL_INTERVAL = 0.2
 
 
 class ArchiverWrapper(object):
-    def restart_archiver(self):
+    def __init__(self, url=ARCHIVE_ENGINE_URL):
+        self._url = url
         # Set to ignore proxy for localhost
-        proxy_handler = urllib2.ProxyHandler({})
-        opener = urllib2.build_opener(proxy_handler)
-        urllib2.install_opener(opener)
-        res = urllib2.urlopen("http://localhost:4813/restart")
+        self._opener = build_opener(ProxyHandler({}))
+
+    def restart_archiver(self):
+        res = self._opener.open(self._url + "/restart")
         d = res.read()
+
+    def is_ready(self, timeout=READY_TIMEOUT):
+        """Checks whether the archive engine's web server is responding.
+
+        Args:
+            timeout (float): The maximum time to wait for a response in seconds
+
+        Returns:
+            bool: True if the archive engine responded, False otherwise
+        """
+        try:
+            self._opener.open(self._url + "/", timeout=timeout).read()
+            return True
+        except (URLError, socket.error):
+            return False
+
+    def wait_for_ready(self, timeout=READY_TIMEOUT):
+        """Waits for the archive engine's web server to respond.
+
+        Args:
+            timeout (float): The maximum time to wait in seconds
+
+        Returns:
+            bool: True if the archive engine is ready, False if it did not respond in time
+        """
+        end_time = time.time() + timeout
+        while not self.is_ready(max(end_time - time.time(), 0.01)):
+            remaining = end_time - time.time()
+            if remaining <= 0:
+                return False
+            time.sleep(min(READY_POLL_INTERVAL, remaining))
+        return True
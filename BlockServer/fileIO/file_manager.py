@@ -15,6 +15,8 @@
 # http://opensource.org/licenses/eclipse-1.0.php
 import re
 import os
+import uuid
+import errno
 import shutil
 from collections import OrderedDict
 from xml.etree import ElementTree
@@ -27,12 +29,35 @@ from BlockServer.core.constants import FILENAME_BLOCKS, FILENAME_GROUPS, FILENAM
 from BlockServer.core.constants import GRP_NONE, DEFAULT_COMPONENT, EXAMPLE_DEFAULT
 from BlockServer.core.file_path_manager import FILEPATH_MANAGER
 from BlockServer.fileIO.schema_checker import ConfigurationSchemaChecker, ConfigurationIncompleteException
-from server_common.utilities import print_and_log, retry
+from server_common.utilities import print_and_log, retry, replace_file
 from server_common.common_exceptions import MaxAttemptsExceededException
 
 RETRY_MAX_ATTEMPTS = 20
 RETRY_INTERVAL = 0.5
 
+# Flags for creating a temporary file to write a configuration file to, as mkstemp uses
+_TEMP_FILE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0) | getattr(os, "O_NOINHERIT", 0)
+
+
+def _create_temp_file(file_path):
+    """
+    Creates a temporary file in the same folder as a file, with the permissions open gives a new file rather than the
+    owner only permissions mkstemp gives.
+
+    Args:
+        file_path (string): The file the temporary file will replace
+
+    Returns:
+        int, string: The handle and path of the temporary file
+    """
+    while True:
+        temp_path = "{}.{}.tmp".format(file_path, uuid.uuid4().hex[:8])
+        try:
+            return os.open(temp_path, _TEMP_FILE_FLAGS, 0o666), temp_path
+        except OSError as err:
+            if err.errno != errno.EEXIST:
+                raise
+
 
 class ConfigurationFileManager(object):
     """ The ConfigurationFileManager class.
@@ -165,9 +190,14 @@ class ConfigurationFileManager(object):
     def save_config(self, configuration, is_component):
         """Saves the current configuration with the specified name.
 
+        Files whose contents are unchanged on disk are not rewritten.
+
         Args:
             configuration (Configuration): The actual configuration to save
             is_component (bool): Is it a component?
+
+        Returns:
+            list: The paths of the files that were written
         """
         path = self.get_path(configuration.get_name(), is_component)
 
@@ -185,25 +215,21 @@ class ConfigurationFileManager(object):
             # Is a component, so no components
             components_xml = ConfigurationXmlConverter.components_to_xml(dict())
 
-        # Save blocks
-        current_file = os.path.join(path, FILENAME_BLOCKS)
-        self._write_to_file(current_file, blocks_xml)
-
-        # Save groups
-        current_file = os.path.join(path, FILENAME_GROUPS)
-        self._write_to_file(current_file, groups_xml)
-
-        # Save IOCs
-        current_file = os.path.join(path, FILENAME_IOCS)
-        self._write_to_file(current_file, iocs_xml)
-
-        # Save components
-        current_file = os.path.join(path, FILENAME_COMPONENTS)
-        self._write_to_file(current_file, components_xml)
-
-        # Save meta
-        current_file = os.path.join(path, FILENAME_META)
-        self._write_to_file(current_file, meta_xml)
+        files = [
+            (FILENAME_BLOCKS, blocks_xml),
+            (FILENAME_GROUPS, groups_xml),
+            (FILENAME_IOCS, iocs_xml),
+            (FILENAME_COMPONENTS, components_xml),
+            (FILENAME_META, meta_xml),
+        ]
+
+        # Only write the files whose contents have changed
+        files_written = []
+        for filename, data in files:
+            current_file = os.path.join(path, filename)
+            if self._write_to_file(current_file, data):
+                files_written.append(current_file)
+        return files_written
 
     @retry(RETRY_MAX_ATTEMPTS, RETRY_INTERVAL, (OSError, IOError))
     def delete(self, name, is_component):
@@ -244,8 +270,20 @@ class ConfigurationFileManager(object):
                           "is not in use by another process.".format(path=file_path))
 
     def _write_to_file(self, file_path, data):
+        """ Write data to a file if it differs from what is already there.
+
+        Args:
+            file_path (string): The location of the file being written
+            data (string): The data to be saved
+
+        Returns:
+            bool: True if the file was written; False if it already contained the data
+        """
         try:
-            return self._attempt_write(file_path, data)
+            if self._attempt_read_contents(file_path) == data:
+                return False
+            self._attempt_write(file_path, data)
+            return True
         except MaxAttemptsExceededException:
             raise IOError("Could not write to file at {path}. Please check the file is "
                           "not in use by another process.".format(path=file_path))
@@ -260,18 +298,48 @@ class ConfigurationFileManager(object):
         """
         return ElementTree.parse(file_path).getroot()
 
+    @staticmethod
+    @retry(RETRY_MAX_ATTEMPTS, RETRY_INTERVAL, (OSError, IOError))
+    def _attempt_read_contents(file_path):
+        """ Read the current contents of a file.
+
+        Args:
+            file_path (string): The location of the file being read
+
+        Returns:
+            string: The contents of the file, or None if it does not exist
+        """
+        if not os.path.isfile(file_path):
+            return None
+        with open(file_path, 'r') as f:
+            return f.read()
+
     @staticmethod
     @retry(RETRY_MAX_ATTEMPTS, RETRY_INTERVAL, (OSError, IOError))
     def _attempt_write(file_path, data):
         """ Write xml data to a given configuration file.
 
+        The data is written to a temporary file in the same folder which then replaces the original, so a
+        crash part way through a save can never leave a partially written file behind. The file keeps the
+        permissions of the original, or those open would give a new file.
+
         Args:
             file_path (string): The location of the file being written
             data (string): The XML data to be saved
         """
-        with open(file_path, 'w') as f:
-            f.write(data)
-            return
+        handle, temp_path = _create_temp_file(file_path)
+        try:
+            with os.fdopen(handle, 'w') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            if os.path.exists(file_path):
+                shutil.copymode(file_path, temp_path)
+            replace_file(temp_path, file_path)
+        except:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
 
     def get_files_in_directory(self, path):
         """Gets a list of the files in the specified folder
@@ -19,3 +19,6 @@ class MockArchiverWrapper(object):
         self.restart_count = 0
     def restart_archiver(self):
         self.restart_count += 1
+
+    def wait_for_ready(self, timeout=None):
+        return True
@@ -23,6 +23,7 @@ class MockBlockServer(object):
         self._confs = list()
         self.pvs = dict()
         self.monitor_lock = RLock()
+        self.changed_files = list()
 
     def set_config_list(self, cl):
         self._config_list = cl
@@ -45,15 +46,26 @@ class MockBlockServer(object):
     def load_last_config(self):
         pass
 
+    def notify_files_changed(self, paths):
+        self.changed_files.extend(paths)
+
     def does_pv_exist(self, name):
         return name in self.pvs
 
     def delete_pv_from_db(self, name):
         del self.pvs[name]
 
+    def delete_pvs_from_db(self, names):
+        for name in names:
+            self.pvs.pop(name, None)
+
     def add_string_pv_to_db(self, name, count=1000):
         self.pvs[name] = ""
 
+    def add_string_pvs_to_db(self, counts):
+        for name in counts:
+            self.pvs.setdefault(name, "")
+
     def setParam(self, name, data):
         self.pvs[name] = data
 
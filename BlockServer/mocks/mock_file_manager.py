@@ -55,6 +55,7 @@ class MockConfigurationFileManager(object):
             self.comps[configuration.get_name().lower()] = configuration
         else:
             self.confs[configuration.get_name().lower()] = configuration
+        return list()
 
     def delete(self, name, is_component):
         if is_component:
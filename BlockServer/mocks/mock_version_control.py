@@ -29,6 +29,9 @@ class MockVersionControl(object):
     def add_all_edited_files(self):
         pass
 
+    def notify_changed(self, paths):
+        pass
+
     def remove(self, file_path):
         if os.path.isdir(file_path):
             shutil.rmtree(file_path)
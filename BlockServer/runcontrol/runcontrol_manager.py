@@ -99,6 +99,8 @@ class RunControlManager(OnTheFlyPvInterface):
         """
         super(RunControlManager, self).__init__()
         self._rc_ioc_start_time = None
+        # The contents of the settings file last written, which the run-control IOC loads when it is restarted
+        self._runcontrol_settings = None
         self._prefix = prefix
         self._settings_file = os.path.join(config_dir, RUNCONTROL_SETTINGS)
         self._block_prefix = prefix + "CS:SB:"
@@ -149,8 +151,7 @@ class RunControlManager(OnTheFlyPvInterface):
         self.create_runcontrol_pvs(full_init)
 
     def _create_standard_pvs(self):
-        self._bs.add_string_pv_to_db(RUNCONTROL_OUT_PV, 16000)
-        self._bs.add_string_pv_to_db(RUNCONTROL_GET_PV, 16000)
+        self._bs.add_string_pvs_to_db({RUNCONTROL_OUT_PV: 16000, RUNCONTROL_GET_PV: 16000})
 
     def _intialise_runcontrol_ioc(self):
         # Start runcontrol IOC
@@ -172,41 +173,54 @@ class RunControlManager(OnTheFlyPvInterface):
                 started
         """
         if self._active_configholder.blocks_changed() or clear_autosave:
-            print_and_log("Start creating runcontrol PVs")
-            self.update_runcontrol_blocks(
-                self._active_configholder.get_block_details())
-            self.restart_ioc(clear_autosave)
-            # Need to wait for RUNCONTROL_IOC to restart
-            self.wait_for_ioc_start(time_between_tries)
-            print_and_log("Finish creating runcontrol PVs")
-
-            print_and_log("Start arbitrary wait after creating runcontrol PVs")
-            # If this sleep is not done, sometimes the config settings will not overwrite the current settings
-            # correctly. See https://github.com/ISISComputingGroup/IBEX/issues/4344
-            sleep(2)
-            print_and_log("Finish arbitrary wait after creating runcontrol PVs")
+            blocks = self._active_configholder.get_block_details()
+            # The IOC only needs restarting if the set of run-control PVs has changed, otherwise the settings can
+            # be pushed to the running IOC
+            if self.update_runcontrol_blocks(blocks) or clear_autosave:
+                print_and_log("Start creating runcontrol PVs")
+                self.restart_ioc(clear_autosave)
+                # Need to wait for RUNCONTROL_IOC to restart
+                self.wait_for_ioc_start(time_between_tries)
+                print_and_log("Finish creating runcontrol PVs")
+
+                print_and_log("Start arbitrary wait after creating runcontrol PVs")
+                # If this sleep is not done, sometimes the config settings will not overwrite the current settings
+                # correctly. See https://github.com/ISISComputingGroup/IBEX/issues/4344
+                sleep(2)
+                print_and_log("Finish arbitrary wait after creating runcontrol PVs")
+            else:
+                print_and_log("Runcontrol PVs unchanged, not restarting the runcontrol IOC")
 
             print_and_log("Restoring config settings...")
-            self.restore_config_settings(
-                self._active_configholder.get_block_details())
+            self.restore_config_settings(blocks)
             print_and_log("Finish restoring config settings")
 
     def update_runcontrol_blocks(self, blocks):
         """
         Update the run-control settings in the IOC with the current blocks.
 
+        The settings file is only rewritten if the set of run-control PVs has changed since it was last written.
+
         Args:
             blocks (OrderedDict): The blocks that are part of the current
                 configuration
+
+        Returns:
+            bool : True if the set of run-control PVs has changed, so the IOC needs restarting to load them
         """
+        # Need an extra blank line
+        settings = "".join(create_db_load_string(block) for block in blocks.values()) + "\n"
+        if settings == self._runcontrol_settings:
+            return False
+
         try:
             with open(self._settings_file, 'w') as f:
-                for block in blocks.values():
-                    f.write(create_db_load_string(block))
-                # Need an extra blank line
-                f.write("\n")
+                f.write(settings)
+            self._runcontrol_settings = settings
         except Exception as err:
+            self._runcontrol_settings = None
             print_and_log(str(err))
+        return True
 
     def get_out_of_range_pvs(self):
         """
@@ -250,18 +264,35 @@ class RunControlManager(OnTheFlyPvInterface):
         """
         Restore run-control settings based on what is stored in a configuration.
 
+        The settings are written to the running IOC as a batch of puts, which are all sent before waiting for them
+        to complete.
+
         Args:
             blocks (OrderedDict): The blocks for the configuration
         """
+        puts = []
         for block in blocks.values():
             run_control_prefix = self._block_prefix + block.name
+            puts.append((block, run_control_prefix + TAG_RC_ENABLE, block.rc_enabled))
+            puts.append((block, run_control_prefix + TAG_RC_SUSPEND_ON_INVALID, block.rc_suspend_on_invalid))
+            if block.rc_lowlimit is not None:
+                puts.append((block, run_control_prefix + TAG_RC_LOW, block.rc_lowlimit))
+            if block.rc_highlimit is not None:
+                puts.append((block, run_control_prefix + TAG_RC_HIGH, block.rc_highlimit))
+
+        # Send all the puts before waiting for any of them to complete
+        pending = []
+        for block, pv, value in puts:
+            try:
+                pending.append((block, self._channel_access.caput(pv, value)))
+            except Exception as err:
+                print_and_log("Problem with setting runcontrol for {}: {}".format(block.name, err))
+
+        for block, put in pending:
+            if put is None:
+                continue
             try:
-                self._channel_access.caput(run_control_prefix + TAG_RC_ENABLE, block.rc_enabled)
-                self._channel_access.caput(run_control_prefix + TAG_RC_SUSPEND_ON_INVALID, block.rc_suspend_on_invalid)
-                if block.rc_lowlimit is not None:
-                    self._channel_access.caput(run_control_prefix + TAG_RC_LOW, block.rc_lowlimit)
-                if block.rc_highlimit is not None:
-                    self._channel_access.caput(run_control_prefix + TAG_RC_HIGH, block.rc_highlimit)
+                put.result()
             except Exception as err:
                 print_and_log("Problem with setting runcontrol for {}: {}".format(block.name, err))
 
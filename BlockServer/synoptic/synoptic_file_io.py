@@ -45,6 +45,12 @@ class SynopticFileIO(object):
 
         return data
 
+    def get_modified_time(self, directory, fullname):
+        # Not retried, as this is called on every read of a synoptic PV; raises OSError if the file does not exist
+        path = os.path.join(directory, fullname)
+
+        return os.path.getmtime(path)
+
     @retry(RETRY_MAX_ATTEMPTS, RETRY_INTERVAL, (OSError, IOError))
     def delete_synoptic(self, directory, fullname):
         path = os.path.join(directory, fullname)
@@ -21,8 +21,9 @@ from BlockServer.core.on_the_fly_pv_interface import OnTheFlyPvInterface
 from BlockServer.fileIO.schema_checker import ConfigurationSchemaChecker
 from lxml import etree
 from server_common.common_exceptions import MaxAttemptsExceededException
+from server_common.pv_names import compact_pv_name
 from server_common.utilities import print_and_log, compress_and_hex, create_pv_name, \
-    convert_to_json, convert_from_json
+    convert_to_json, convert_from_json, compress_and_base64, compact_waveform_length
 from synoptic_file_io import SynopticFileIO
 
 
@@ -42,7 +43,7 @@ SYNOPTIC_SCHEMA_FILE = "synoptic.xsd"
 
 class SynopticManager(OnTheFlyPvInterface):
     """Class for managing the PVs associated with synoptics"""
-    def __init__(self, block_server, schema_folder, active_configholder, file_io=SynopticFileIO()):
+    def __init__(self, block_server, schema_folder, active_configholder, file_io=SynopticFileIO(), compact_pvs=False):
         """Constructor.
 
         Args:
@@ -50,15 +51,19 @@ class SynopticManager(OnTheFlyPvInterface):
             schema_folder (string): The filepath for the synoptic schema
             active_configholder (ActiveConfigHolder): A reference to the active configuration
             file_io (SynopticFileIO): Responsible for file IO
+            compact_pvs (bool): Whether to also publish each synoptic compressed and base64 encoded
         """
         super(SynopticManager, self).__init__()
         self.pvs_to_write.extend([SYNOPTIC_PRE + SYNOPTIC_DELETE, SYNOPTIC_PRE + SYNOPTIC_SET_DETAILS])
         self._directory = FILEPATH_MANAGER.synoptic_dir
         self._schema_folder = schema_folder
         self._synoptic_pvs = dict()
+        self._synoptic_read_pvs = dict()
+        self._synoptic_cache = dict()
         self._bs = block_server
         self._activech = active_configholder
         self._file_io = file_io
+        self._compact_pvs = compact_pvs
         self._default_syn_xml = ""
         self._create_standard_pvs()
         self._load_initial()
@@ -77,8 +82,8 @@ class SynopticManager(OnTheFlyPvInterface):
             print_and_log("Error writing to PV %s: %s" % (pv, str(err)), "MAJOR")
 
     def handle_pv_read(self, pv):
-        # Nothing to do as it is all handled by monitors
-        pass
+        name, encode = self._synoptic_read_pvs[pv]
+        return encode(self._get_synoptic_xml(name))
 
     def update_monitors(self):
         with self._bs.monitor_lock:
@@ -96,12 +101,9 @@ class SynopticManager(OnTheFlyPvInterface):
         self.update_monitors()
 
     def _create_standard_pvs(self):
-        self._bs.add_string_pv_to_db(SYNOPTIC_PRE + SYNOPTIC_NAMES, 16000)
-        self._bs.add_string_pv_to_db(SYNOPTIC_PRE + SYNOPTIC_GET_DEFAULT, 16000)
-        self._bs.add_string_pv_to_db(SYNOPTIC_PRE + SYNOPTIC_BLANK + SYNOPTIC_GET, 16000)
-        self._bs.add_string_pv_to_db(SYNOPTIC_PRE + SYNOPTIC_SET_DETAILS, 16000)
-        self._bs.add_string_pv_to_db(SYNOPTIC_PRE + SYNOPTIC_DELETE, 16000)
-        self._bs.add_string_pv_to_db(SYNOPTIC_PRE + SYNOPTIC_SCHEMA, 16000)
+        self._bs.add_string_pvs_to_db({SYNOPTIC_PRE + pv: 16000 for pv in [
+            SYNOPTIC_NAMES, SYNOPTIC_GET_DEFAULT, SYNOPTIC_BLANK + SYNOPTIC_GET, SYNOPTIC_SET_DETAILS, SYNOPTIC_DELETE,
+            SYNOPTIC_SCHEMA]})
 
         # Set values for PVs that don't change
         self.update_pv_value(SYNOPTIC_PRE + SYNOPTIC_BLANK + SYNOPTIC_GET,
@@ -109,40 +111,124 @@ class SynopticManager(OnTheFlyPvInterface):
         self.update_pv_value(SYNOPTIC_PRE + SYNOPTIC_SCHEMA, compress_and_hex(self.get_synoptic_schema()))
 
     def _load_initial(self):
-        """Create the PVs for all the synoptics found in the synoptics directory."""
-        for f in self._file_io.get_list_synoptic_files(self._directory):
-            # Load the data, checking the schema
-            try:
-                data = self._file_io.read_synoptic_file(self._directory, f)
-                ConfigurationSchemaChecker.check_xml_matches_schema(
-                    os.path.join(self._schema_folder, SYNOPTIC_SCHEMA_FILE), data, "Synoptic")
-                # Get the synoptic name
-                self._create_pv(data)
-            except MaxAttemptsExceededException:
-                print_and_log("Could not open synoptic file {path}. Please check the file is "
-                              "not in use by another process.".format(path=f), "MAJOR")
-            except Exception as err:
-                print_and_log("Error creating synoptic PV: {error}".format(error=err), "MAJOR")
+        """Create the PVs for all the synoptics found in the synoptics directory.
+
+        Only the file names are indexed here, the contents are loaded and checked against the schema the first time
+        each synoptic is read.
+        """
+        self._add_synoptics([os.path.splitext(f)[0] for f in self._file_io.get_list_synoptic_files(self._directory)])
+
+    def _add_synoptic(self, name):
+        """Adds a synoptic to the dictionary returned on get_synoptic_list and creates a PV for reading it.
+
+        Args:
+            name (string): The name of the synoptic
+        """
+        self._add_synoptics([name])
+
+    def _add_synoptics(self, names):
+        """Adds synoptics to the dictionary returned on get_synoptic_list and creates the PVs for reading them in one
+        step.
+
+        Args:
+            names (list): The names of the synoptics
+        """
+        pv_counts = {}
+        for name in names:
+            if name not in self._synoptic_pvs:
+                # Extra check, if a non-case sensitive match exist remove it
+                for key in list(self._synoptic_pvs.keys()):
+                    if name.lower() == key.lower():
+                        for pv_name in self._synoptic_pv_counts(self._synoptic_pvs[key]):
+                            pv_counts.pop(pv_name, None)
+                        self._remove_synoptic(key)
+                pv = create_pv_name(name, self._synoptic_pvs.values(), "SYNOPTIC")
+                self._synoptic_pvs[name] = pv
+
+            for pv_name, count in self._synoptic_pv_counts(self._synoptic_pvs[name]).items():
+                pv_counts[pv_name] = count
+                if pv_name not in self.pvs_to_read:
+                    self.pvs_to_read.append(pv_name)
+
+            pv_name = SYNOPTIC_PRE + self._synoptic_pvs[name] + SYNOPTIC_GET
+            self._synoptic_read_pvs[pv_name] = (name, compress_and_hex)
+            if self._compact_pvs:
+                self._synoptic_read_pvs[compact_pv_name(pv_name)] = (name, compress_and_base64)
+        self._bs.add_string_pvs_to_db(pv_counts)
+
+    def _synoptic_pv_counts(self, pv):
+        """Gets the names and lengths of the PVs for reading a synoptic.
+
+        Args:
+            pv (string): The PV name of the synoptic, as in get_synoptic_list
+
+        Returns:
+            dict : The length of each PV for reading the synoptic, by PV name
+        """
+        pv_name = SYNOPTIC_PRE + pv + SYNOPTIC_GET
+        pv_counts = {pv_name: 16000}
+        if self._compact_pvs:
+            pv_counts[compact_pv_name(pv_name)] = compact_waveform_length(16000)
+        return pv_counts
+
+    def _remove_synoptic(self, name):
+        """Removes a synoptic from the synoptic list, along with its PV and any cached data.
+
+        Args:
+            name (string): The name of the synoptic
+        """
+        pv_names = list(self._synoptic_pv_counts(self._synoptic_pvs.pop(name)))
+        self._bs.delete_pvs_from_db(pv_names)
+        for pv_name in pv_names:
+            if pv_name in self.pvs_to_read:
+                self.pvs_to_read.remove(pv_name)
+            self._synoptic_read_pvs.pop(pv_name, None)
+        self._synoptic_cache.pop(name, None)
 
     def _create_pv(self, data):
         """Creates a single PV based on a name and data. Adds this PV to the dictionary returned on get_synoptic_list
 
+        The PV is served on read, from the file, so it is not given a value here.
+
         Args:
-            data (string): Starting data for the pv, the pv name is derived from the name tag of this
+            data (string): The synoptic XML, the pv name is derived from the name tag of this
         """
         name = self._get_synoptic_name_from_xml(data)
-        if name not in self._synoptic_pvs:
-            # Extra check, if a non-case sensitive match exist remove it
-            for key in self._synoptic_pvs.keys():
-                if name.lower() == key.lower():
-                    self._synoptic_pvs.pop(key)
-            pv = create_pv_name(name, self._synoptic_pvs.values(), "SYNOPTIC")
-            self._synoptic_pvs[name] = pv
-
-        # Create the PV
-        self._bs.add_string_pv_to_db(SYNOPTIC_PRE + self._synoptic_pvs[name] + SYNOPTIC_GET, 16000)
-        # Update the value
-        self.update_pv_value(SYNOPTIC_PRE + self._synoptic_pvs[name] + SYNOPTIC_GET, compress_and_hex(data))
+        self._add_synoptic(name)
+
+    def _get_synoptic_xml(self, name):
+        """Gets the XML for a synoptic, loading and checking it against the schema if it has changed on disk since
+        it was last read.
+
+        If the file has been removed outside the server, the synoptic is removed too.
+
+        Args:
+            name (string): The name of the synoptic
+
+        Returns:
+            string : The XML for the synoptic
+        """
+        fullname = name + ".xml"
+        try:
+            modified_time = self._file_io.get_modified_time(self._directory, fullname)
+        except OSError:
+            self._remove_synoptic(name)
+            raise IOError("Synoptic file {path} no longer exists.".format(path=fullname))
+
+        try:
+            cached = self._synoptic_cache.get(name)
+            if cached is not None and cached[0] == modified_time:
+                return cached[1]
+
+            data = self._file_io.read_synoptic_file(self._directory, fullname)
+        except MaxAttemptsExceededException:
+            raise IOError("Could not open synoptic file {path}. Please check the file is "
+                          "not in use by another process.".format(path=fullname))
+
+        ConfigurationSchemaChecker.check_xml_matches_schema(
+            os.path.join(self._schema_folder, SYNOPTIC_SCHEMA_FILE), data, "Synoptic")
+        self._synoptic_cache[name] = (modified_time, data)
+        return data
 
     def update_pv_value(self, name, data):
         """ Updates value of a PV holding synoptic information with new data
@@ -184,11 +270,12 @@ class SynopticManager(OnTheFlyPvInterface):
         if fullname in f:
             # Load the data
             try:
-                data = self._file_io.read_synoptic_file(self._directory, fullname)
-                self._default_syn_xml = data
-            except MaxAttemptsExceededException:
-                print_and_log("Could not open synoptic file {path}. Please check the file is not "
-                              "in use by another process.".format(path=fullname), "MAJOR")
+                self._default_syn_xml = self._get_synoptic_xml(name)
+            except IOError as err:
+                print_and_log(str(err), "MAJOR")
+                self._default_syn_xml = ""
+            except Exception as err:
+                print_and_log("Error loading default synoptic {name}: {error}".format(name=name, error=err), "MAJOR")
                 self._default_syn_xml = ""
         else:
             # No synoptic
@@ -235,6 +322,9 @@ class SynopticManager(OnTheFlyPvInterface):
         except MaxAttemptsExceededException:
             raise IOError("Could not save to synoptic file at {path}. Please check the file is "
                           "not in use by another process.".format(path=save_path))
+        # The file on disk has changed so must be reloaded when it is next read
+        self._synoptic_cache.pop(name, None)
+        self._bs.notify_files_changed([save_path])
         print_and_log("Synoptic saved: " + name)
 
     def delete(self, delete_list):
@@ -256,21 +346,21 @@ class SynopticManager(OnTheFlyPvInterface):
                               "not in use by another process.".format(name=fullname), "MINOR")
                 continue
 
-            self._bs.delete_pv_from_db(SYNOPTIC_PRE + self._synoptic_pvs[synoptic] + SYNOPTIC_GET)
-            del self._synoptic_pvs[synoptic]
+            self._bs.notify_files_changed([os.path.join(self._directory, fullname)])
+            self._remove_synoptic(synoptic)
 
     def update(self, xml_data):
         """Updates the synoptic list when modifications are made via the filesystem.
 
+        The synoptic PVs are served from the file when read, so only a new synoptic needs its PVs creating.
+
         Args:
-            xml_data (string): The xml data to update the PV with
+            xml_data (string): The xml data of the modified synoptic
 
         """
         name = self._get_synoptic_name_from_xml(xml_data)
-        names = self._synoptic_pvs.keys()
-        if name in names:
-            self.update_pv_value(SYNOPTIC_PRE + self._synoptic_pvs[name] + SYNOPTIC_GET, compress_and_hex(xml_data))
-        else:
+        self._synoptic_cache.pop(name, None)
+        if name not in self._synoptic_pvs:
             self._create_pv(xml_data)
 
         self.update_monitors()
@@ -13,11 +13,14 @@
 # along with this program; if not, you can obtain a copy from
 # https://www.eclipse.org/org/documents/epl-v10.php or
 # http://opensource.org/licenses/eclipse-1.0.php
+import os
+import shutil
+import tempfile
 import unittest
 import json
 
 import six
-from mock import Mock
+from mock import Mock, patch
 from parameterized import parameterized
 
 from BlockServer.config.block import Block
@@ -178,6 +181,20 @@ class TestActiveConfigHolderSequence(unittest.TestCase):
         config_holder.clear_config()
         self.assertRaises(IOError, lambda: config_holder.load_active("TEST_COMPONENT"))
 
+    def test_GIVEN_notify_files_changed_WHEN_setting_last_config_THEN_last_config_file_notified(self):
+        notify_files_changed = Mock()
+        config_holder = ActiveConfigHolder(MACROS, self.mock_archive, self.mock_file_manager, MockIocControl(""),
+                                           notify_files_changed)
+        config_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, config_dir)
+        last_config_file_path = os.path.join(config_dir, "last_config.txt")
+
+        with patch("BlockServer.core.active_config_holder.FILEPATH_MANAGER.get_last_config_file_path",
+                   return_value=last_config_file_path):
+            config_holder.set_last_config("TEST_CONFIG")
+
+        notify_files_changed.assert_called_once_with([last_config_file_path])
+
     @unittest.skipIf(IS_LINUX, "Location of last_config.txt not correctly configured on Linux")
     def test_load_last_config(self):
         config_holder = self.active_config_holder
@@ -25,6 +25,7 @@ from BlockServer.config.block import Block
 os.environ['MYPVPREFIX'] = ""
 
 from BlockServer.epics.archiver_manager import ArchiverManager
+from BlockServer.mocks.mock_archiver_wrapper import MockArchiverWrapper
 import unittest
 
 
@@ -158,3 +159,26 @@ class TestArchiveManager(unittest.TestCase):
         self.archiver_manager.update_archiver(prefix, blocks)
 
         assert_that(mock_file.file_contents[self._setting_path], has_items(*block_str_rc_low.splitlines()))
+
+    @patch('__builtin__.open', new_callable=mock_open, mock=FileStub)
+    def test_GIVEN_blocks_unchanged_WHEN_update_THEN_archiver_only_restarted_once(self, mock_file):
+        archiver = MockArchiverWrapper()
+        archiver_manager = ArchiverManager(uploader_path="uploader", settings_path=self._setting_path,
+                                           archiver=archiver)
+        blocks = [Block("block", "pv", log_periodic=True, log_rate=30, log_deadband=1)]
+
+        archiver_manager.update_archiver("prefix", blocks)
+        archiver_manager.update_archiver("prefix", blocks)
+
+        assert_that(archiver.restart_count, is_(1))
+
+    @patch('__builtin__.open', new_callable=mock_open, mock=FileStub)
+    def test_GIVEN_blocks_changed_WHEN_update_THEN_archiver_restarted_again(self, mock_file):
+        archiver = MockArchiverWrapper()
+        archiver_manager = ArchiverManager(uploader_path="uploader", settings_path=self._setting_path,
+                                           archiver=archiver)
+
+        archiver_manager.update_archiver("prefix", [Block("block", "pv", log_periodic=True, log_rate=30)])
+        archiver_manager.update_archiver("prefix", [Block("block", "pv", log_periodic=True, log_rate=60)])
+
+        assert_that(archiver.restart_count, is_(2))
@@ -0,0 +1,81 @@
+# This file is part of the ISIS IBEX application.
+# Copyright (C) 2012-2016 Science & Technology Facilities Council.
+# All rights reserved.
+#
+# This program is distributed in the hope that it will be useful.
+# This program and the accompanying materials are made available under the
+# terms of the Eclipse Public License v1.0 which accompanies this distribution.
+# EXCEPT AS EXPRESSLY SET FORTH IN THE ECLIPSE PUBLIC LICENSE V1.0, THE PROGRAM
+# AND ACCOMPANYING MATERIALS ARE PROVIDED ON AN "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND.  See the Eclipse Public License v1.0 for more details.
+#
+# You should have received a copy of the Eclipse Public License v1.0
+# along with this program; if not, you can obtain a copy from
+# https://www.eclipse.org/org/documents/epl-v10.php or
+# http://opensource.org/licenses/eclipse-1.0.php
+import socket
+import threading
+import time
+import unittest
+
+from six.moves.BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+
+from BlockServer.epics.archiver_wrapper import ArchiverWrapper
+
+
+class _ArchiveEngineStub(BaseHTTPRequestHandler):
+    """Stands in for the archive engine's web server, recording the paths requested."""
+    requests = []
+
+    def do_GET(self):
+        _ArchiveEngineStub.requests.append(self.path)
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+def _unused_port():
+    sock = socket.socket()
+    sock.bind(("localhost", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+class TestArchiverWrapper(unittest.TestCase):
+
+    def setUp(self):
+        _ArchiveEngineStub.requests = []
+        self.server = HTTPServer(("localhost", 0), _ArchiveEngineStub)
+        self.server_thread = threading.Thread(target=self.server.serve_forever)
+        self.server_thread.daemon = True
+        self.server_thread.start()
+        self.archiver = ArchiverWrapper("http://localhost:{}".format(self.server.server_address[1]))
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_GIVEN_archive_engine_running_WHEN_wait_for_ready_THEN_ready(self):
+        self.assertTrue(self.archiver.wait_for_ready(timeout=1))
+
+    def test_GIVEN_archive_engine_not_running_WHEN_wait_for_ready_THEN_not_ready(self):
+        archiver = ArchiverWrapper("http://localhost:{}".format(_unused_port()))
+
+        self.assertFalse(archiver.wait_for_ready(timeout=0.5))
+
+    def test_GIVEN_archive_engine_not_running_WHEN_wait_for_ready_THEN_gives_up_within_about_a_second(self):
+        archiver = ArchiverWrapper("http://localhost:{}".format(_unused_port()))
+        start = time.time()
+
+        archiver.wait_for_ready()
+
+        self.assertLess(time.time() - start, 2.0)
+
+    def test_WHEN_restart_archiver_THEN_restart_requested(self):
+        self.archiver.restart_archiver()
+
+        self.assertEqual(_ArchiveEngineStub.requests, ["/restart"])
@@ -24,6 +24,7 @@ from server_common.pv_names import BlockserverPVNames, prepend_blockserver
 from BlockServer.mocks.mock_block_server import MockBlockServer
 from BlockServer.core.inactive_config_holder import InactiveConfigHolder
 from BlockServer.core.constants import DEFAULT_COMPONENT
+from BlockServer.core.file_path_manager import FILEPATH_MANAGER
 from BlockServer.config.configuration import Configuration
 from BlockServer.mocks.mock_ioc_control import MockIocControl
 from BlockServer.mocks.mock_archiver_wrapper import MockArchiverWrapper
@@ -360,6 +361,13 @@ class TestInactiveConfigsSequence(unittest.TestCase):
         self.assertTrue("TEST_CONFIG2" in config_names)
         self.assertFalse("TEST_CONFIG1" in config_names)
 
+    def test_GIVEN_config_deleted_THEN_version_control_notified_of_its_folder(self):
+        self._create_configs(["TEST_CONFIG1", "TEST_CONFIG2"], self.clm)
+
+        self.clm.delete_configs(["TEST_CONFIG1"])
+
+        self.assertEqual([FILEPATH_MANAGER.get_config_path("TEST_CONFIG1")], self.bs.changed_files)
+
     def test_delete_one_inactive_component_works(self):
         comps = ["TEST_COMPONENT1", "TEST_COMPONENT2"]
         self._create_components(comps)
@@ -143,3 +143,13 @@ class TestDevicesManagerSequence(unittest.TestCase):
         # Assert:
         # Device screens in blockserver should have been updated with value written to device manager
         self.assertEquals(EXAMPLE_DEVICES, dehex_and_decompress(self.bs.pvs[GET_SCREENS]))
+
+    def test_given_valid_devices_data_when_device_xml_saved_then_version_control_notified(self):
+        self.dm.save_devices_xml(EXAMPLE_DEVICES)
+
+        self.assertEqual([self.dm.get_devices_filename()], self.bs.changed_files)
+
+    def test_given_invalid_devices_data_when_device_xml_saved_then_version_control_not_notified(self):
+        self.dm.save_devices_xml(INVALID_DEVICES)
+
+        self.assertEqual([], self.bs.changed_files)
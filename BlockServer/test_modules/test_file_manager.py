@@ -0,0 +1,99 @@
+# This file is part of the ISIS IBEX application.
+# Copyright (C) 2012-2016 Science & Technology Facilities Council.
+# All rights reserved.
+#
+# This program is distributed in the hope that it will be useful.
+# This program and the accompanying materials are made available under the
+# terms of the Eclipse Public License v1.0 which accompanies this distribution.
+# EXCEPT AS EXPRESSLY SET FORTH IN THE ECLIPSE PUBLIC LICENSE V1.0, THE PROGRAM
+# AND ACCOMPANYING MATERIALS ARE PROVIDED ON AN "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND.  See the Eclipse Public License v1.0 for more details.
+#
+# You should have received a copy of the Eclipse Public License v1.0
+# along with this program; if not, you can obtain a copy from
+# https://www.eclipse.org/org/documents/epl-v10.php or
+# http://opensource.org/licenses/eclipse-1.0.php
+import os
+import stat
+import shutil
+import tempfile
+import unittest
+
+from mock import patch
+
+from BlockServer.fileIO.file_manager import ConfigurationFileManager
+
+
+class TestConfigurationFileManagerWrite(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.folder, "blocks.xml")
+        self.file_manager = ConfigurationFileManager()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def _read(self):
+        with open(self.file_path, 'r') as f:
+            return f.read()
+
+    def test_GIVEN_no_file_WHEN_write_THEN_file_written(self):
+        written = self.file_manager._write_to_file(self.file_path, "<blocks/>\n")
+
+        self.assertTrue(written)
+        self.assertEqual(self._read(), "<blocks/>\n")
+
+    def test_GIVEN_file_with_same_contents_WHEN_write_THEN_file_not_rewritten(self):
+        self.file_manager._write_to_file(self.file_path, "<blocks/>\n")
+
+        with patch.object(ConfigurationFileManager, "_attempt_write") as attempt_write:
+            written = self.file_manager._write_to_file(self.file_path, "<blocks/>\n")
+
+        self.assertFalse(written)
+        attempt_write.assert_not_called()
+
+    def test_GIVEN_file_with_different_contents_WHEN_write_THEN_file_replaced(self):
+        self.file_manager._write_to_file(self.file_path, "<blocks/>\n")
+
+        written = self.file_manager._write_to_file(self.file_path, "<groups/>\n")
+
+        self.assertTrue(written)
+        self.assertEqual(self._read(), "<groups/>\n")
+
+    def test_WHEN_write_THEN_no_temporary_files_left_behind(self):
+        self.file_manager._write_to_file(self.file_path, "<blocks/>\n")
+        self.file_manager._write_to_file(self.file_path, "<groups/>\n")
+
+        self.assertEqual(os.listdir(self.folder), ["blocks.xml"])
+
+    def test_GIVEN_write_fails_part_way_WHEN_write_THEN_original_file_kept_and_temporary_file_removed(self):
+        self.file_manager._write_to_file(self.file_path, "<blocks/>\n")
+
+        with patch("BlockServer.fileIO.file_manager.replace_file", side_effect=KeyboardInterrupt):
+            self.assertRaises(KeyboardInterrupt, ConfigurationFileManager._attempt_write, self.file_path,
+                              "<groups/>\n")
+
+        self.assertEqual(self._read(), "<blocks/>\n")
+        self.assertEqual(os.listdir(self.folder), ["blocks.xml"])
+
+    def _mode(self):
+        return stat.S_IMODE(os.stat(self.file_path).st_mode)
+
+    @unittest.skipIf(os.name == "nt", "File modes are not kept on Windows")
+    def test_GIVEN_no_file_WHEN_write_THEN_file_has_permissions_of_a_new_file(self):
+        new_file_path = os.path.join(self.folder, "new.xml")
+        open(new_file_path, "w").close()
+
+        self.file_manager._write_to_file(self.file_path, "<blocks/>\n")
+
+        self.assertEqual(self._mode(), stat.S_IMODE(os.stat(new_file_path).st_mode))
+
+    @unittest.skipIf(os.name == "nt", "File modes are not kept on Windows")
+    def test_GIVEN_file_WHEN_write_THEN_file_keeps_its_permissions(self):
+        self.file_manager._write_to_file(self.file_path, "<blocks/>\n")
+        os.chmod(self.file_path, 0o640)
+
+        self.file_manager._write_to_file(self.file_path, "<groups/>\n")
+
+        self.assertEqual(self._mode(), 0o640)
@@ -176,6 +176,40 @@ class TestRunControlSequence(unittest.TestCase):
         self.assertIn("RUNCTRL_01", self.ioc_control.restarted_iocs)
         self.assertTrue(self.rcash.clear_autosave_files.called)
 
+    @patch("BlockServer.runcontrol.runcontrol_manager.sleep")
+    def test_GIVEN_only_block_runcontrol_limits_changed_WHEN_initialised_THEN_runcontrol_not_restarted_and_limits_written(self, sleep_patch):
+        config_details = self.active_config.get_config_details()
+        config_details['blocks'].append(Block(name="TESTNAME", pv="TESTPV").to_dict())
+        self._modify_active(self.active_config, config_details)
+        self.run_control_manager.on_config_change(False)
+        self.ioc_control.restarted_iocs = []
+
+        config_details = self.active_config.get_config_details()
+        config_details['blocks'][0].update({"runcontrol": True, "lowlimit": -3, "highlimit": 3})
+        self._modify_active(self.active_config, config_details)
+        self.run_control_manager.on_config_change(False)
+
+        self.assertNotIn("RUNCTRL_01", self.ioc_control.restarted_iocs)
+        rc_prefix = "CS:SB:TESTNAME{}"
+        self.assertEqual(-3, self.cs.caget(rc_prefix.format(TAG_RC_LOW)))
+        self.assertEqual(3, self.cs.caget(rc_prefix.format(TAG_RC_HIGH)))
+        self.assertTrue(self.cs.caget(rc_prefix.format(TAG_RC_ENABLE)))
+
+    @patch("BlockServer.runcontrol.runcontrol_manager.sleep")
+    def test_GIVEN_block_added_after_previous_change_WHEN_initialised_THEN_runcontrol_restarts(self, sleep_patch):
+        config_details = self.active_config.get_config_details()
+        config_details['blocks'].append(Block(name="TESTNAME", pv="TESTPV").to_dict())
+        self._modify_active(self.active_config, config_details)
+        self.run_control_manager.on_config_change(False)
+        self.ioc_control.restarted_iocs = []
+
+        config_details = self.active_config.get_config_details()
+        config_details['blocks'].append(Block(name="OTHERNAME", pv="OTHERPV").to_dict())
+        self._modify_active(self.active_config, config_details)
+        self.run_control_manager.on_config_change(False)
+
+        self.assertIn("RUNCTRL_01", self.ioc_control.restarted_iocs)
+
     def test_GIVEN_enabled_block_WHEN_restore_config_settings_THEN_PVs_written_to(self):
         expected_low_limit, expected_high_limit = 10, 20
         blocks = {"my_block": Block("my_block", "my_pv", runcontrol=True,
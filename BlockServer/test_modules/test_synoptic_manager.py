@@ -16,12 +16,15 @@
 
 import unittest
 import os
+from mock import patch
 
 
 from BlockServer.synoptic.synoptic_manager import SynopticManager, SYNOPTIC_PRE, SYNOPTIC_GET
 from BlockServer.core.config_list_manager import InvalidDeleteException
 from BlockServer.mocks.mock_block_server import MockBlockServer
 from BlockServer.synoptic.synoptic_file_io import SynopticFileIO
+from server_common.pv_names import compact_pv_name
+from server_common.utilities import dehex_and_decompress, base64_and_decompress
 
 TEST_DIR = os.path.abspath(".")
 
@@ -44,13 +47,22 @@ class MockSynopticFileIO(SynopticFileIO):
     def __init__(self):
         # Store the synoptics in memory
         self.syns = dict()
+        self.modified_times = dict()
+        self.read_count = 0
 
     def write_synoptic_file(self, name, save_path, xml_data):
         self.syns[name.lower() + ".xml"] = xml_data
+        self.modified_times[name.lower() + ".xml"] = self.modified_times.get(name.lower() + ".xml", 0) + 1
 
     def read_synoptic_file(self, directory, fullname):
+        self.read_count += 1
         return self.syns[fullname.lower()]
 
+    def get_modified_time(self, directory, fullname):
+        if fullname.lower() not in self.syns:
+            raise OSError("No such file: {}".format(fullname))
+        return self.modified_times[fullname.lower()]
+
     def get_list_synoptic_files(self, directory):
         return self.syns.keys()
 
@@ -192,3 +204,142 @@ class TestSynopticManagerSequence(unittest.TestCase):
         self.assertEqual(len(synoptic_names), initial_len)
         self.assertTrue(self.bs.does_pv_exist(construct_pv_name(SYNOPTIC_1.upper())))
         self.assertTrue(self.bs.does_pv_exist(construct_pv_name(SYNOPTIC_2.upper())))
+
+    def test_GIVEN_synoptic_files_WHEN_load_initial_THEN_pvs_created_without_reading_files(self):
+        # Arrange
+        self.fileIO.write_synoptic_file(SYNOPTIC_1, "", EXAMPLE_SYNOPTIC % SYNOPTIC_1)
+
+        # Act
+        self.sm._load_initial()
+
+        # Assert
+        self.assertTrue(self.bs.does_pv_exist(construct_pv_name(SYNOPTIC_1.upper())))
+        self.assertTrue(self.sm.read_pv_exists(construct_pv_name(SYNOPTIC_1.upper())))
+        self.assertEqual(self.fileIO.read_count, 0)
+
+    def test_GIVEN_synoptic_not_yet_read_WHEN_pv_read_THEN_synoptic_loaded_from_file(self):
+        # Arrange
+        self.fileIO.write_synoptic_file(SYNOPTIC_1, "", EXAMPLE_SYNOPTIC % SYNOPTIC_1)
+        self.sm._load_initial()
+
+        # Act
+        value = self.sm.handle_pv_read(construct_pv_name(SYNOPTIC_1.upper()))
+
+        # Assert
+        self.assertEqual(dehex_and_decompress(value).decode("utf-8"), EXAMPLE_SYNOPTIC % SYNOPTIC_1)
+        self.assertEqual(self.fileIO.read_count, 1)
+
+    def test_GIVEN_synoptic_already_read_WHEN_pv_read_again_THEN_cached_synoptic_used(self):
+        # Arrange
+        self.fileIO.write_synoptic_file(SYNOPTIC_1, "", EXAMPLE_SYNOPTIC % SYNOPTIC_1)
+        self.sm._load_initial()
+        self.sm.handle_pv_read(construct_pv_name(SYNOPTIC_1.upper()))
+
+        # Act
+        self.sm.handle_pv_read(construct_pv_name(SYNOPTIC_1.upper()))
+
+        # Assert
+        self.assertEqual(self.fileIO.read_count, 1)
+
+    def test_GIVEN_synoptic_modified_on_disk_after_read_WHEN_pv_read_again_THEN_synoptic_reloaded(self):
+        # Arrange
+        self.fileIO.write_synoptic_file(SYNOPTIC_1, "", EXAMPLE_SYNOPTIC % SYNOPTIC_1)
+        self.sm._load_initial()
+        self.sm.handle_pv_read(construct_pv_name(SYNOPTIC_1.upper()))
+        new_xml = (EXAMPLE_SYNOPTIC % SYNOPTIC_1).replace("<name>", "<!-- edited --><name>")
+        self.fileIO.write_synoptic_file(SYNOPTIC_1, "", new_xml)
+
+        # Act
+        value = self.sm.handle_pv_read(construct_pv_name(SYNOPTIC_1.upper()))
+
+        # Assert
+        self.assertEqual(dehex_and_decompress(value).decode("utf-8"), new_xml)
+        self.assertEqual(self.fileIO.read_count, 2)
+
+    def test_GIVEN_invalid_synoptic_file_WHEN_pv_read_THEN_exception_raised(self):
+        # Arrange
+        self.fileIO.write_synoptic_file(SYNOPTIC_1, "", "<instrument><invalid/></instrument>")
+        self.sm._load_initial()
+
+        # Act
+        self.assertRaises(Exception, self.sm.handle_pv_read, construct_pv_name(SYNOPTIC_1.upper()))
+
+    def test_GIVEN_compact_pvs_WHEN_synoptic_saved_THEN_compact_pv_created(self):
+        sm = SynopticManager(self.bs, os.path.join(self.dir, SCHEMA_FOLDER), None, self.fileIO, compact_pvs=True)
+
+        self._create_a_synoptic(SYNOPTIC_1, sm)
+
+        self.assertTrue(self.bs.does_pv_exist(compact_pv_name(construct_pv_name(SYNOPTIC_1.upper()))))
+
+    def test_GIVEN_compact_pvs_WHEN_compact_pv_read_THEN_synoptic_returned(self):
+        sm = SynopticManager(self.bs, os.path.join(self.dir, SCHEMA_FOLDER), None, self.fileIO, compact_pvs=True)
+        self._create_a_synoptic(SYNOPTIC_1, sm)
+
+        value = sm.handle_pv_read(compact_pv_name(construct_pv_name(SYNOPTIC_1.upper())))
+
+        self.assertEqual(base64_and_decompress(value).decode("utf-8"), EXAMPLE_SYNOPTIC % SYNOPTIC_1)
+
+    def test_GIVEN_compact_pvs_WHEN_synoptic_deleted_THEN_compact_pv_removed(self):
+        sm = SynopticManager(self.bs, os.path.join(self.dir, SCHEMA_FOLDER), None, self.fileIO, compact_pvs=True)
+        self._create_a_synoptic(SYNOPTIC_1, sm)
+
+        sm.delete([SYNOPTIC_1])
+
+        self.assertFalse(self.bs.does_pv_exist(compact_pv_name(construct_pv_name(SYNOPTIC_1.upper()))))
+
+    def test_GIVEN_synoptic_files_WHEN_load_initial_THEN_all_pvs_created_in_one_step(self):
+        self.fileIO.write_synoptic_file(SYNOPTIC_1, "", EXAMPLE_SYNOPTIC % SYNOPTIC_1)
+        self.fileIO.write_synoptic_file(SYNOPTIC_2, "", EXAMPLE_SYNOPTIC % SYNOPTIC_2)
+
+        with patch.object(self.bs, "add_string_pvs_to_db", wraps=self.bs.add_string_pvs_to_db) as add_pvs:
+            self.sm._load_initial()
+
+        add_pvs.assert_called_once()
+        self.assertTrue(self.bs.does_pv_exist(construct_pv_name(SYNOPTIC_1.upper())))
+        self.assertTrue(self.bs.does_pv_exist(construct_pv_name(SYNOPTIC_2.upper())))
+
+    def test_GIVEN_synoptic_saved_WHEN_pv_read_THEN_saved_synoptic_served_on_read_only(self):
+        with patch.object(self.bs, "setParam", wraps=self.bs.setParam) as set_param:
+            self._create_a_synoptic(SYNOPTIC_1, self.sm)
+
+        pv_name = construct_pv_name(SYNOPTIC_1.upper())
+        self.assertNotIn(pv_name, [c[0][0] for c in set_param.call_args_list])
+        self.assertTrue(self.sm.read_pv_exists(pv_name))
+        self.assertEqual(dehex_and_decompress(self.sm.handle_pv_read(pv_name)).decode("utf-8"),
+                         EXAMPLE_SYNOPTIC % SYNOPTIC_1)
+
+    def test_GIVEN_compact_pvs_WHEN_synoptic_deleted_THEN_both_pvs_no_longer_read(self):
+        sm = SynopticManager(self.bs, os.path.join(self.dir, SCHEMA_FOLDER), None, self.fileIO, compact_pvs=True)
+        self._create_a_synoptic(SYNOPTIC_1, sm)
+
+        sm.delete([SYNOPTIC_1])
+
+        self.assertFalse(sm.read_pv_exists(construct_pv_name(SYNOPTIC_1.upper())))
+        self.assertFalse(sm.read_pv_exists(compact_pv_name(construct_pv_name(SYNOPTIC_1.upper()))))
+
+    def test_GIVEN_synoptic_file_removed_WHEN_pv_read_THEN_synoptic_removed_without_retrying(self):
+        self._create_a_synoptic(SYNOPTIC_1, self.sm)
+        del self.fileIO.syns[SYNOPTIC_1 + ".xml"]
+
+        with patch.object(self.fileIO, "get_modified_time", wraps=self.fileIO.get_modified_time) as get_modified_time:
+            self.assertRaises(IOError, self.sm.handle_pv_read, construct_pv_name(SYNOPTIC_1.upper()))
+
+        get_modified_time.assert_called_once()
+        self.assertFalse(self.sm.read_pv_exists(construct_pv_name(SYNOPTIC_1.upper())))
+        self.assertNotIn(SYNOPTIC_1, [c["name"] for c in self.sm.get_synoptic_list()])
+
+    def test_GIVEN_synoptic_exists_WHEN_updated_from_filesystem_THEN_cached_synoptic_dropped(self):
+        self._create_a_synoptic(SYNOPTIC_1, self.sm)
+        self.sm.handle_pv_read(construct_pv_name(SYNOPTIC_1.upper()))
+
+        self.sm.update(EXAMPLE_SYNOPTIC % SYNOPTIC_1)
+        self.sm.handle_pv_read(construct_pv_name(SYNOPTIC_1.upper()))
+
+        self.assertEqual(self.fileIO.read_count, 2)
+
+    def test_GIVEN_new_synoptic_WHEN_updated_from_filesystem_THEN_pv_created(self):
+        self.fileIO.write_synoptic_file(SYNOPTIC_1, "", EXAMPLE_SYNOPTIC % SYNOPTIC_1)
+
+        self.sm.update(EXAMPLE_SYNOPTIC % SYNOPTIC_1)
+
+        self.assertTrue(self.sm.read_pv_exists(construct_pv_name(SYNOPTIC_1.upper())))
@@ -5,10 +5,19 @@ from time import sleep
 
 import numpy as np
 import ode
-from genie_python.genie import set_pv
+
+try:
+    from genie_python.genie import set_pv
+except ImportError:
+    # Collisions can still be detected, for example when replaying recorded moves, but the motors can't be stopped
+    print("ERROR: No genie_python on the system, collisions will not stop the motors!")
+    set_pv = None
 
 from move import move_all
 
+# Longest time in seconds between collision checks when no axis updates arrive
+DETECTION_HEARTBEAT = 1.0
+
 
 def collide(geometries, ignore, collision_func=ode.collide):
     """
@@ -32,9 +41,11 @@ def collide(geometries, ignore, collision_func=ode.collide):
     return collisions
 
 
-def detect_collisions(collision_reported, driver, geometries, ignore, is_moving, logger, op_mode, pvs):
-    # Check for collisions
-    collisions = collide(geometries, ignore)
+def detect_collisions(collision_reported, driver, geometries, ignore, is_moving, logger, op_mode, pvs,
+                      collisions=None):
+    # Check for collisions, unless the collisions are already known because nothing has moved
+    if collisions is None:
+        collisions = collide(geometries, ignore)
     # Get some data to the user:
     driver.setParam('COLLIDED', [int(c) for c in collisions])
     # If there has been a collision:
@@ -53,7 +64,7 @@ def detect_collisions(collision_reported, driver, geometries, ignore, is_moving,
             collision_reported = collisions[:]
 
         # Stop the moving motors based on the operating mode auto_stop
-        if op_mode.auto_stop.is_set():
+        if op_mode.auto_stop.is_set() and set_pv is not None:
             logging.debug("Stopping motors %s" % [i for i, m in enumerate(is_moving) if m.value()])
             for moving, pv in zip(is_moving, pvs):
                 if not moving.value():  # Invert the logic as we are monitoring DMOV not MOVN
@@ -71,7 +82,8 @@ class CollisionDetector(threading.Thread):
     """
     Thread that runs and detects collisions.
     """
-    def __init__(self, driver, geometries, moves, monitors, ignore, is_moving, logger, op_mode, pvs):
+    def __init__(self, driver, geometries, moves, monitors, ignore, is_moving, logger, op_mode, pvs,
+                 update_signal=None):
         threading.Thread.__init__(self, name="CollisionDetector")
 
         self.driver = driver
@@ -83,24 +95,40 @@ class CollisionDetector(threading.Thread):
         self.logger = logger
         self.op_mode = op_mode
         self.pvs = pvs
+        self.update_signal = update_signal
 
         self._lock_message = threading.RLock()
         self._message = "Nothing to report!"
         self._lock_collisions = threading.RLock()
         self._collisions = [0] * len(geometries)
 
+        self._collision_reported = None
+        self._last_collisions = None
+
         self.setDaemon(True)
 
     def run(self):
-        collision_reported = None
         while True:
-            move_all(self.geometries, self.moves, monitors=self.monitors)
-            collisions, collision_reported, message = \
-                detect_collisions(collision_reported, self.driver, self.geometries, self.ignore, self.is_moving,
-                                  self.logger, self.op_mode, self.pvs)
-            self.collisions = collisions
-            self.message = message
-            sleep(0.05)
+            if self.update_signal is None:
+                self.check()
+                sleep(0.05)
+            else:
+                # Check again as soon as an axis updates
+                seen = self.update_signal.count
+                self.check()
+                self.update_signal.wait(seen, DETECTION_HEARTBEAT)
+
+    def check(self):
+        """
+        Moves the geometries to the latest positions from the monitors, and checks them for collisions.
+        """
+        moved = move_all(self.geometries, self.moves, monitors=self.monitors)
+        collisions, self._collision_reported, message = \
+            detect_collisions(self._collision_reported, self.driver, self.geometries, self.ignore, self.is_moving,
+                              self.logger, self.op_mode, self.pvs, None if moved else self._last_collisions)
+        self._last_collisions = collisions
+        self.collisions = collisions
+        self.message = message
 
     @property
     def collisions(self):
@@ -0,0 +1,256 @@
+import hashlib
+import importlib
+import inspect
+import itertools
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+
+import numpy as np
+import ode
+
+from collide import collide
+from geometry import GeometryBox
+from move import move_all
+
+# Largest number of axes to build a map for, as the number of points grows exponentially with the number of axes
+MAX_MAP_AXES = 3
+
+# Largest number of points in a map
+MAX_MAP_POINTS = 1000000
+
+# Change when the way maps are built changes, so that maps cached by older versions aren't used
+MAP_VERSION = 1
+
+# Most cells along an axis a single boundary between free and colliding positions leaves undecided: the cells either
+# side of the last free and first colliding points, and the cell between them
+BOUNDARY_CELLS = 3
+
+# Where maps are cached between runs
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "collision_maps")
+
+
+def map_points(config):
+    """
+    Works out how many points to sample along each axis: one every coarse step, within the limit on the total.
+
+    Args:
+        config: The configuration module
+
+    Returns:
+        The number of points along each axis
+    """
+    most = int(MAX_MAP_POINTS ** (1.0 / len(config.hardlimits)))
+    return [max(2, min(most, int((max(l) - min(l)) / config.coarse) + 1)) for l in config.hardlimits]
+
+
+def map_key(config, oversize, points):
+    """
+    Returns: a hash of the configuration, the oversize and the number of points, which identifies a map
+    """
+    key = "{}|{}|{}|{}".format(MAP_VERSION, inspect.getsource(config), repr(float(oversize)), list(points))
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def map_path(config, oversize, points, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Returns: the file a map is cached in
+    """
+    name = config.__name__.split(".")[-1]
+    return os.path.join(cache_dir, "{}_{}.npz".format(name, map_key(config, oversize, points)))
+
+
+class CollisionMap(object):
+    """
+    A grid of which positions of the axes collide, sampled over their hard limits.
+
+    Only cells where every corner and every neighbour of every corner agree are answered from the grid. Cells near a
+    boundary between colliding and free positions are left to exact checks.
+    """
+    def __init__(self, axes, occupancy):
+        """
+        Constructor.
+
+        Args:
+            axes: The positions sampled along each axis, in increasing order
+            occupancy: An array of whether each point collides, with one dimension for each axis
+        """
+        self.axes = [np.asarray(a, dtype=float) for a in axes]
+        self.occupancy = np.asarray(occupancy, dtype=bool)
+
+        # A point is settled if all its neighbours, including diagonal ones, agree with it
+        padded = np.pad(self.occupancy, 1, mode="edge")
+        self.settled = np.ones(self.occupancy.shape, dtype=bool)
+        for offset in itertools.product((0, 1, 2), repeat=self.occupancy.ndim):
+            neighbours = padded[tuple(slice(o, o + n) for o, n in zip(offset, self.occupancy.shape))]
+            self.settled &= neighbours == self.occupancy
+
+    @staticmethod
+    def build(config, oversize, points):
+        """
+        Builds a map by checking for collisions at every point, with its own geometries.
+
+        Args:
+            config: The configuration module
+            oversize: The oversize of the geometries
+            points: The number of points along each axis
+
+        Returns:
+            The map
+        """
+        space = ode.Space()
+        geometries = [GeometryBox(space, oversize=oversize, **geometry) for geometry in config.geometries]
+        axes = [np.linspace(min(l), max(l), n) for l, n in zip(config.hardlimits, points)]
+
+        occupancy = np.zeros(points, dtype=bool)
+        for index in itertools.product(*[range(n) for n in points]):
+            move_all(geometries, config.moves, values=[float(a[i]) for a, i in zip(axes, index)])
+            occupancy[index] = any(collide(geometries, config.ignore))
+
+        return CollisionMap(axes, occupancy)
+
+    @staticmethod
+    def load(config, oversize, cache_dir=DEFAULT_CACHE_DIR):
+        """
+        Loads a cached map.
+
+        Returns:
+            The map, or None if there isn't one cached for the configuration and oversize
+        """
+        path = map_path(config, oversize, map_points(config), cache_dir)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            return CollisionMap([data["axis{}".format(i)] for i in range(len(config.hardlimits))], data["occupancy"])
+
+    def save(self, path):
+        """
+        Saves the map, writing it to a temporary file first so that nothing reads a partly written map.
+        """
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        arrays = {"axis{}".format(i): a for i, a in enumerate(self.axes)}
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            np.savez_compressed(f, occupancy=self.occupancy, **arrays)
+        if os.path.exists(path):
+            os.remove(path)
+        os.rename(temp_path, path)
+
+    def lookup(self, values):
+        """
+        Checks whether a position collides, if the map can tell.
+
+        Args:
+            values: The positions of the axes
+
+        Returns:
+            True if the position collides, False if it doesn't, None if it needs an exact check
+        """
+        cell = []
+        for axis, value in zip(self.axes, values):
+            if not axis[0] <= value <= axis[-1]:
+                return None
+            lower = min(max(np.searchsorted(axis, value, side="right") - 1, 0), len(axis) - 2)
+            cell.append(slice(lower, lower + 2))
+        corners = self.occupancy[tuple(cell)]
+        if not self.settled[tuple(cell)].all() or corners.any() != corners.all():
+            return None
+        return bool(corners.flat[0])
+
+    def bracket(self, values, axis_index, end_value):
+        """
+        Follows an axis through the map from the current position towards an end value, to find how far it is
+        certainly free, and where it first certainly collides. A collision is only returned when the cells between the
+        two are no more than a single boundary between free and colliding positions leaves undecided. Any more, or a
+        free cell beyond them, and the undecided cells could hold obstacles of any thickness, so no collision is
+        returned.
+
+        Args:
+            values: The current positions of all the axes
+            axis_index: The index of the axis to follow
+            end_value: The position to follow the axis towards
+
+        Returns:
+            A tuple of the furthest position known to be free, and the nearest position beyond it known to collide,
+            or None if the map doesn't show one
+        """
+        start_value = values[axis_index]
+        direction = 1 if end_value > start_value else -1
+        axis = self.axes[axis_index]
+        crossings = [a for a in axis if direction * start_value < direction * a < direction * end_value]
+        points = [start_value] + sorted(crossings, key=lambda a: direction * a) + [end_value]
+
+        position = list(values)
+        safe_value = start_value
+        undecided = 0
+        for near, far in zip(points[:-1], points[1:]):
+            # Each step between crossings lies within one cell
+            position[axis_index] = (near + far) / 2.0
+            state = self.lookup(position)
+            if state:
+                return safe_value, position[axis_index]
+            if state is None:
+                undecided += 1
+                if undecided > BOUNDARY_CELLS:
+                    break
+            elif undecided:
+                break
+            else:
+                safe_value = far
+        return safe_value, None
+
+
+def load_or_build(config, oversize, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Loads the map for a configuration and oversize from the cache, building and caching it if it isn't there.
+
+    Args:
+        config: The configuration module
+        oversize: The oversize of the geometries
+        cache_dir: The directory maps are cached in
+
+    Returns:
+        The map
+    """
+    collision_map = CollisionMap.load(config, oversize, cache_dir)
+    if collision_map is None:
+        points = map_points(config)
+        logging.info("Building collision map of %s points" % points)
+        collision_map = CollisionMap.build(config, oversize, points)
+        collision_map.save(map_path(config, oversize, points, cache_dir))
+        logging.info("Built collision map")
+    return collision_map
+
+
+def _build_in_process(config_name, oversize, cache_dir):
+    load_or_build(importlib.import_module(config_name), oversize, cache_dir)
+
+
+def start_build(config_name, oversize, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Builds and caches the map for a configuration and oversize in a separate process, unless it is already cached,
+    so that building it doesn't hold up the monitor.
+
+    Args:
+        config_name: The full name of the configuration module, e.g. configurations.config_zoom
+        oversize: The oversize of the geometries
+        cache_dir: The directory maps are cached in
+
+    Returns:
+        The process building the map
+    """
+    process = multiprocessing.Process(target=_build_in_process, args=(config_name, oversize, cache_dir))
+    process.daemon = True
+    process.start()
+    return process
+
+
+# Build a map offline, e.g. python collision_map.py configurations.config_zoom [oversize]
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    config_module = importlib.import_module(sys.argv[1])
+    load_or_build(config_module, float(sys.argv[2]) if len(sys.argv) > 2 else config_module.oversize)
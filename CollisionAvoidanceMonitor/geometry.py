@@ -3,6 +3,16 @@ import ode
 
 from transform import Transformation
 
+# The vertices of a unit cube centred on the origin
+BOX_VERTICES = np.array([(-0.5, -0.5, 0.5),
+                         (0.5, -0.5, 0.5),
+                         (0.5, 0.5, 0.5),
+                         (-0.5, 0.5, 0.5),
+                         (-0.5, -0.5, -0.5),
+                         (0.5, -0.5, -0.5),
+                         (0.5, 0.5, -0.5),
+                         (-0.5, 0.5, -0.5)])
+
 
 class GeometryBox(object):
     def __init__(self, space, position=(0, 0, 0), size=(1, 1, 1), color=(1, 1, 1), oversize=1, name=None):
@@ -19,6 +29,10 @@ class GeometryBox(object):
         # A friendly name
         self.name = name
 
+        # The last move applied, and the axis positions which drove it, so unchanged moves can be skipped
+        self.applied_move = None
+        self.driving_axes = None
+
     # Set the size of the ODE geometry
     def set_size(self, x=None, y=None, z=None, oversize=None):
         # Only need to set the size of dimensions supplied
@@ -32,6 +46,9 @@ class GeometryBox(object):
             self.oversize = oversize
         self.geom.setLengths([s + 2 * self.oversize for s in self.size])
 
+        # Make sure the change is picked up on the next move
+        self.driving_axes = None
+
     # Set the transform for the geometry
     def set_transform(self, transform):
         # Get the rotation and position elements from the transformation matrix
@@ -50,16 +67,5 @@ class GeometryBox(object):
         return t
 
     def get_vertices(self):
-        vertices = np.array([(-0.5, -0.5, 0.5),
-                             (0.5, -0.5, 0.5),
-                             (0.5, 0.5, 0.5),
-                             (-0.5, 0.5, 0.5),
-                             (-0.5, -0.5, -0.5),
-                             (0.5, -0.5, -0.5),
-                             (0.5, 0.5, -0.5),
-                             (-0.5, 0.5, -0.5)])
-
-        vertices *= self.geom.getLengths()
-        t = self.get_transform()
-        vertices = [t.evaluate(v) for v in vertices]
-        return vertices
+        vertices = BOX_VERTICES * self.geom.getLengths()
+        return self.get_transform().evaluate_all(vertices)
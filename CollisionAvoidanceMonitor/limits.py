@@ -0,0 +1,265 @@
+import logging
+import itertools
+import importlib
+import multiprocessing
+
+import ode
+from collide import collide
+from collision_map import CollisionMap
+from geometry import GeometryBox
+from move import move_all
+import numpy as np
+
+# The configuration and geometries used by the limit searches in a worker process
+_worker = {}
+
+
+def max_delta(geometries, new_points, old_points):
+    # Calculate the greatest distance any vertex has moved
+    return float(np.max(np.linalg.norm(np.asarray(new_points) - np.asarray(old_points), axis=-1)))
+
+
+def clearance(geometries, ignore):
+    """
+    Calculates a lower bound on the distance between the closest pair of geometries which are not ignored, using a
+    bounding sphere around each geometry.
+
+    Args:
+        geometries: A list of GeometryBox objects
+        ignore: A list of pairs of geometries to ignore
+
+    Returns:
+        The lower bound, which is negative when any pair of bounding spheres overlap
+    """
+    spheres = [(np.array(g.geom.getPosition()), np.linalg.norm(g.geom.getLengths()) / 2.0) for g in geometries]
+    gap = float("inf")
+    for (ind1, (centre1, radius1)), (ind2, (centre2, radius2)) in itertools.combinations(enumerate(spheres), 2):
+        if not ([ind1, ind2] in ignore or [ind2, ind1] in ignore):
+            gap = min(gap, np.linalg.norm(centre1 - centre2) - radius1 - radius2)
+    return gap
+
+
+def auto_seek(start_step_size, start_values, end_value, geometries, moves, axis_index, ignore, fine_step=None,
+              collision_map=None):
+    """
+    Finds how far an axis can move from its current position towards an end value before there is a collision.
+
+    Steps out from the current position with steps doubling from the coarse step, then steps through the step
+    containing the first collision at the fine step. Steps are scaled so that no vertex moves further than the coarse
+    (or fine) step size, as the search always has, unless the geometries are far enough apart that a longer step
+    cannot bring any two of them together. Given a collision map, starts from the furthest position the map shows is
+    free, and steps towards the collision the map shows just beyond it, once both are confirmed exactly.
+
+    Args:
+        start_step_size: The coarse step size
+        start_values: The current positions of all the axes
+        end_value: The position to seek towards, normally a hard limit
+        geometries: A list of GeometryBox objects
+        moves: The moves from the configuration
+        axis_index: The index of the axis to seek along
+        ignore: A list of pairs of geometries to ignore collisions between
+        fine_step: The tolerance to find the collision to, defaults to the coarse step size
+        collision_map: An optional CollisionMap of the configuration
+
+    Returns:
+        The furthest position found without a collision: the end value if there are no collisions, or the current
+        position if it is already colliding.
+    """
+    values = list(start_values)
+    start_value = values[axis_index]
+
+    if start_value == end_value:
+        return end_value
+
+    def move_to(value):
+        values[axis_index] = value
+        move_all(geometries, moves, values=values[:])
+
+    def collides_at(value):
+        move_to(value)
+        return any(collide(geometries, ignore))
+
+    if collides_at(start_value):
+        return start_value
+    start_clearance = clearance(geometries, ignore)
+
+    direction = 1.0 if end_value > start_value else -1.0
+    distance = abs(end_value - start_value)
+    coarse_step = abs(start_step_size)
+    fine_step = abs(fine_step) if fine_step else coarse_step
+
+    # Scale the steps by how far the geometries move for a given move of the axis
+    start_points = [g.get_vertices() for g in geometries]
+    probe_distance = min(coarse_step, distance)
+    move_to(start_value + direction * probe_distance)
+    movement = max_delta(geometries, [g.get_vertices() for g in geometries], start_points) / probe_distance
+    if movement > 1.0:
+        coarse_step /= movement
+        fine_step /= movement
+    fine_step = min(fine_step, coarse_step)
+
+    def max_step(gap):
+        # Two geometries can close on each other by at most twice the furthest any vertex moves
+        if movement == 0:
+            return distance
+        return max(coarse_step, gap / (2.0 * movement))
+
+    # Skip the way the map shows is free, and find the collision beyond it, checking both exactly
+    safe_value, collision_value = start_value, None
+    if collision_map is not None:
+        mapped_safe, mapped_collision = collision_map.bracket(start_values, axis_index, end_value)
+        if mapped_safe != start_value and not collides_at(mapped_safe):
+            if mapped_safe == end_value:
+                return end_value
+            safe_value = mapped_safe
+            if mapped_collision is not None and collides_at(mapped_collision):
+                collision_value = mapped_collision
+
+    # Step out until a step collides, or the end is reached
+    if collision_value is None:
+        if safe_value == start_value:
+            safe_step = max_step(start_clearance)
+        else:
+            move_to(safe_value)
+            safe_step = max_step(clearance(geometries, ignore))
+        step = coarse_step
+        while True:
+            step = min(step, safe_step)
+            if abs(end_value - safe_value) <= step:
+                next_value = end_value
+            else:
+                next_value = safe_value + direction * step
+            if collides_at(next_value):
+                collision_value = next_value
+                break
+            if next_value == end_value:
+                return end_value
+            safe_value = next_value
+            safe_step = max_step(clearance(geometries, ignore))
+            step *= 2
+
+    # Step through to the collision at the fine step, as bisecting could settle on the far side of an obstacle thinner
+    # than the step, skipping ahead as far as the clearance shows is free
+    move_to(safe_value)
+    while True:
+        if movement == 0:
+            step = fine_step
+        else:
+            step = max(fine_step, clearance(geometries, ignore) / (2.0 * movement))
+        if abs(collision_value - safe_value) <= step:
+            return safe_value
+        next_value = safe_value + direction * step
+        if collides_at(next_value):
+            return safe_value
+        safe_value = next_value
+
+
+def auto_seek_limits(geometries, ignore, moves, values, limits, coarse=1.0, fine=0.1, collision_map=None):
+    dynamic_limits = []
+    for i in range(len(values)):
+        logging.debug("Seeking for axis %d" % i)
+
+        lower_limit = auto_seek(coarse, values[:], min(limits[i]), geometries, moves, i, ignore, fine, collision_map)
+        upper_limit = auto_seek(coarse, values[:], max(limits[i]), geometries, moves, i, ignore, fine, collision_map)
+
+        dynamic_limits.append([lower_limit, upper_limit])
+
+        logging.debug("Found limits for axis %d at %s, %s" % (i, upper_limit, lower_limit))
+
+    return dynamic_limits
+
+
+def _start_worker(config_name, use_map=False):
+    """
+    Builds the worker process's own copy of the geometries from the configuration, as ODE geometries can't be shared
+    between processes.
+
+    Args:
+        config_name: The full name of the configuration module, e.g. configurations.config_zoom
+        use_map: Whether to use the configuration's collision map, once it has been cached
+    """
+    config = importlib.import_module(config_name)
+    space = ode.Space()
+    _worker["config"] = config
+    _worker["use_map"] = use_map
+    _worker["map"] = None
+    _worker["space"] = space
+    _worker["geometries"] = [GeometryBox(space, oversize=config.oversize, **geometry) for geometry in config.geometries]
+
+
+def _worker_map(oversize):
+    # The monitor builds the map in the background, so keep looking for it until it has been cached
+    if _worker["map"] is None or _worker["map_oversize"] != oversize:
+        _worker["map"] = CollisionMap.load(_worker["config"], oversize)
+        _worker["map_oversize"] = oversize
+    return _worker["map"]
+
+
+def _seek_axis_limits(job):
+    """
+    Seeks the lower and upper limits of one axis using the worker process's geometries.
+
+    Args:
+        job: A tuple of the axis index, the current positions of all the axes, the hard limits of the axis, the
+            oversize, and the coarse and fine step sizes
+
+    Returns:
+        A tuple of the axis index and its [lower, upper] limits
+    """
+    axis_index, values, limits, oversize, coarse, fine = job
+    config = _worker["config"]
+    geometries = _worker["geometries"]
+
+    for geometry in geometries:
+        if geometry.oversize != oversize:
+            geometry.set_size(oversize=oversize)
+    collision_map = _worker_map(oversize) if _worker["use_map"] else None
+
+    lower_limit = auto_seek(coarse, values[:], min(limits), geometries, config.moves, axis_index, config.ignore, fine,
+                            collision_map)
+    upper_limit = auto_seek(coarse, values[:], max(limits), geometries, config.moves, axis_index, config.ignore, fine,
+                            collision_map)
+
+    logging.debug("Found limits for axis %d at %s, %s" % (axis_index, upper_limit, lower_limit))
+
+    return axis_index, [lower_limit, upper_limit]
+
+
+class ParallelLimitSeeker(object):
+    """
+    Seeks the limits of each axis in a separate worker process, each with its own copy of the geometries.
+    """
+    def __init__(self, config_name, processes=None, use_map=False):
+        """
+        Constructor.
+
+        Args:
+            config_name: The full name of the configuration module the workers build their geometries from
+            processes: The number of worker processes, defaults to the number of CPUs
+            use_map: Whether the workers should use the configuration's collision map, once it has been cached
+        """
+        self._pool = multiprocessing.Pool(processes, initializer=_start_worker, initargs=(config_name, use_map))
+
+    def seek(self, values, limits, oversize, coarse=1.0, fine=0.1):
+        """
+        Starts seeking the limits of every axis.
+
+        Args:
+            values: The current positions of all the axes
+            limits: The hard limits of each axis
+            oversize: The oversize to apply to the geometries
+            coarse: The coarse step size
+            fine: The fine step size
+
+        Returns:
+            An iterator of (axis index, [lower, upper]) tuples, in the order the axes finish
+        """
+        jobs = [(i, list(values), list(limits[i]), oversize, coarse, fine) for i in range(len(values))]
+        return self._pool.imap_unordered(_seek_axis_limits, jobs)
+
+    def close(self):
+        """
+        Stops the worker processes.
+        """
+        self._pool.terminate()
+        self._pool.join()
@@ -3,19 +3,23 @@ import os
 import ode
 import logging
 import threading
-from time import sleep, time
+import multiprocessing
+from time import time
 from genie_python.genie_startup import *
 
+import collision_map
 import pv_server
 import render
+import sweep
 from configurations import config_zoom as config
 from collide import collide, CollisionDetector
 from geometry import GeometryBox
 from move import move_all
+from limits import ParallelLimitSeeker
 
 sys.path.insert(0, os.path.abspath(os.environ["MYDIRCD"]))
 
-from monitor import Monitor
+from monitor import Monitor, UpdateSignal
 from server_common.loggers.isis_logger import IsisLogger
 
 
@@ -23,220 +27,28 @@ logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s (%(threadName)-2s) %(message)s',
                     )
 
+# Longest time in seconds between passes of the main loop when no axis updates or PV writes arrive
+MAIN_LOOP_HEARTBEAT = 0.5
 
-def auto_seek(start_step_size, start_values, end_value, geometries, moves, axis_index, ignore, fine_step=None):
-    limit = end_value
-    current_value = start_values[axis_index]
 
-    if current_value == end_value:
-        return end_value
-
-    values = start_values[:]
-
-    last_value = None
-    old_points = None
-
-    step_checked = False
-
-    if current_value < end_value:
-        # Going up
-        def comp(a, b):
-            return a < b
-
-        step_size = abs(start_step_size)
-    else:
-        # Going down
-        def comp(a, b):
-            return a > b
-
-        step_size = -abs(start_step_size)
-
-    while last_value is None or comp(last_value, end_value):
-        # Move if we need to
-        if last_value is not None:
-            current_value += step_size
-            # print "Using step size of %f" % step_size
-        else:
-            current_value = start_values[axis_index]
-
-        if not comp(current_value, end_value):
-            current_value = end_value
-
-        values[axis_index] = current_value
-        move_all(geometries, moves, values=values[:])
-
-        # Check nothing moved too far
-        if step_checked is False:
-            new_points = [g.get_vertices() for g in geometries]
-            if old_points is not None:
-                delta = max_delta(geometries, new_points, old_points)
-                if delta > start_step_size:
-                    # Work out a new step size
-                    step_size *= start_step_size/delta
-                    last_value = None
-                    continue
-                step_checked = True
-
-        # Check for collisions
-        collisions = collide(geometries, ignore)
-
-        if any(collisions):
-            if current_value == start_values[axis_index]:
-                # There was already a collision
-                limit = current_value
-                break
-            elif fine_step and fine_step < step_size:
-                start_values[axis_index] = last_value
-                limit = auto_seek(fine_step, start_values, current_value, geometries, moves, axis_index, ignore)
-            else:
-                limit = last_value
-            break
-
-        old_points = new_points[:]
-        last_value = current_value
-
-    # print "Found limits for axis %d using step size of %f" % (axis_index, step_size)
-
-    if limit is None:
-        raise ValueError("Null limit")
-
-    return limit
-
-
-def max_delta(geometries, new_points, old_points):
-    # Calculate the greatest position deltas
-    delta = 0
-    for j in range(len(geometries)):
-        old = old_points[j]
-        new = new_points[j]
-        deltas = [map(float, n - o) for n, o in zip(new, old)]
-        for i, (x, y, z) in enumerate(deltas):
-            mag = float(x) ** 2 + float(y) ** 2 + float(z) ** 2
-            if mag > delta:
-                delta = mag
-                # print "New max delta of %f (%f, %f, %f) for body %d at %s from %s" % \
-                #       (mag ** 0.5, x, y, z, j, new[i], old[i])
-    delta = float(delta) ** 0.5
-    return delta
-
-
-def compare(sign):
-    if sign > 0:
-        return lambda a, b: a > b
-    else:
-        return lambda a, b: a < b
-
-
-def auto_seek_limits(geometries, ignore, moves, values, limits, coarse=1.0, fine=0.1):
-    dynamic_limits = []
-    for i in range(len(values)):
-        logging.debug("Seeking for axis %d" % i)
-
-        lower_limit = auto_seek(coarse, values[:], min(limits[i]), geometries, moves, i, ignore, fine)
-        upper_limit = auto_seek(coarse, values[:], max(limits[i]), geometries, moves, i, ignore, fine)
-
-        dynamic_limits.append([lower_limit, upper_limit])
-
-        logging.debug("Found limits for axis %d at %s, %s" % (i, upper_limit, lower_limit))
-
-    return dynamic_limits
-
-
-def look_ahead(start_values, pvs, is_moving, geometries, moves, ignore, max_movement=1.0, max_time=10., time_step=0.1):
+def look_ahead(start_values, pvs, is_moving, geometries, moves, ignore, max_movement=1.0, max_time=10.):
     # Get the indices of the axes currently moving
-    moving = [i for i, m in enumerate(is_moving) if m == 0]  # DMOV = 0 when motors not moving
-
-    msg = "No collisions predicted in the next %fs" % max_time
-    safe_time = max_time
-    safe = True
+    moving = [i for i, m in enumerate(is_moving) if m]  # is_moving is already inverted from DMOV
 
     # Only worth calculating if more than one axis is moving
-    if len(moving) > 1:
-
-        set_points = [None] * len(pvs)
-        speeds = [None] * len(pvs)
-        directions = [None] * len(pvs)
-
-        # Assume everything has finished moving
-        move_complete = [True] * len(pvs)
-
-        # Get some settings:
-        for i in moving:
-            pv = pvs[i]
-
-            set_point = get_pv(pv + '.DVAL')
-            speed = get_pv(pv + '.VELO')
-
-            direction = 0.
-            move = set_point - start_values[i]
-            if move > 0:
-                direction = 1.
-            if move < 0:
-                direction = -1.
-
-            set_points[i] = set_point
-            speeds[i] = speed
-            directions[i] = direction
-
-            # This axis has not finished moving!
-            move_complete[i] = False
-
-        current_time = 0.
-        values = start_values[:]
-        old_points = None
-        step_checked = False
-        last_time = None
-
-        while current_time < max_time:
-            if last_time is None:
-                values = start_values[:]
-                current_time = 0.
-                old_points = None
-            else:
-                current_time += time_step
-
-            for i in moving:
-                if move_complete[i] is False:
-                    values[i] = start_values[i] + (directions[i] * speeds[i] * current_time)
-                    comp = compare(directions[i])(values[i], set_points[i])
-                    if comp:
-                        values[i] = set_points[i]
-
-            # Move the bodies
-            move_all(geometries, moves, values=values)
-
-            if step_checked is False:
-                new_points = [g.get_vertices() for g in geometries]
-                if old_points is not None:
-                    delta = max_delta(geometries, new_points, old_points)
+    if len(moving) <= 1:
+        return "No collisions predicted in the next %fs" % max_time, max_time, True
 
-                    if delta > max_movement:
-                        # Reduce the size of the time step
-                        time_step *= max_movement/delta
-                        # Reset to starting point
-                        last_time = None
-                        old_points = None
-                        continue
+    set_points = [None] * len(pvs)
+    speeds = [None] * len(pvs)
 
-                    step_checked = True
+    # Get some settings:
+    for i in moving:
+        set_points[i] = get_pv(pvs[i] + '.DVAL')
+        speeds[i] = get_pv(pvs[i] + '.VELO')
 
-            # Check for collisions
-            collisions = collide(geometries, ignore)
-
-            if any(collisions):
-                if last_time is None:
-                    msg = "There is already a collision"
-                    safe_time = 0.
-                else:
-                    msg = "Collision expected in %.1fs - %.1fs" % (last_time, current_time)
-                    safe_time = last_time
-                safe = False
-                break
-
-            old_points = new_points[:]
-            last_time = current_time
-
-    return msg, safe_time, safe
+    return sweep.look_ahead(start_values, set_points, speeds, geometries, moves, ignore,
+                            max_movement=max_movement, max_time=max_time)
 
 
 # Set the high and low dial limits for each motor
@@ -246,6 +58,17 @@ def set_limits(limits, pvs):
         set_pv(pv + '.DHLM', limit[1])
 
 
+# Publish the dynamic limits, and the travel they allow from the current positions
+def publish_limits(driver, dynamic_limits, frozen):
+    driver.setParam('HI_LIM', [l[1] for l in dynamic_limits])
+    driver.setParam('LO_LIM', [l[0] for l in dynamic_limits])
+    driver.setParam('TRAVEL', [min([l[0] - m, l[1] - m], key=abs)
+                               for l, m in zip(dynamic_limits, frozen)])
+    driver.setParam('TRAV_F', [l[1] - m for l, m in zip(dynamic_limits, frozen)])
+    driver.setParam('TRAV_R', [l[0] - m for l, m in zip(dynamic_limits, frozen)])
+    driver.updatePVs()
+
+
 # Contains operating mode events
 class OperatingMode(object):
     def __init__(self):
@@ -305,15 +128,16 @@ def main():
         render_geometries.append(GeometryBox(render_space, **geometry))
         collision_geometries.append(GeometryBox(collision_space, oversize=config.oversize, **geometry))
 
-    # Create and populate two lists of monitors
+    # Create and populate two lists of monitors, which signal the loops when they update
+    axis_updates = UpdateSignal()
     monitors = []
     is_moving = []
     for pv in pvs:
-        m = Monitor(pv + ".DRBV")
+        m = Monitor(pv + ".DRBV", axis_updates)
         m.start()
         monitors.append(m)
 
-        any_moving = Monitor(pv + ".DMOV")
+        any_moving = Monitor(pv + ".DMOV", axis_updates)
         any_moving.start()
         is_moving.append(any_moving)
 
@@ -347,7 +171,7 @@ def main():
                 if val is pv_server.body_count:
                     pv_server.pvdb[pv]['count'] = len(config.geometries)
 
-    driver = pv_server.start_thread(config.control_pv, op_mode)
+    driver = pv_server.start_thread(config.control_pv, op_mode, axis_updates)
 
     driver.setParam('OVERSIZE', config.oversize)
     driver.setParam('COARSE', config.coarse)
@@ -356,11 +180,24 @@ def main():
 
     # Only report for new collisions
     collision_detector = CollisionDetector(driver, collision_geometries, config.moves, monitors, config.ignore,
-                                           is_moving, logger, op_mode, config.pvs)
+                                           is_moving, logger, op_mode, config.pvs, axis_updates)
     collision_detector.start()
 
+    # Map which positions collide when asked to, if there are few enough axes for it to be practical to build
+    use_map = 'map' in sys.argv and len(pvs) <= collision_map.MAX_MAP_AXES
+    map_builder = None
+    if use_map:
+        # Build the map in its own process, so that it doesn't compete with the collision detection
+        map_builder = collision_map.start_build(config.__name__, config.oversize)
+
+    # Seek the limits of each axis in its own process, so that one slow axis doesn't hold up the others
+    limit_seeker = ParallelLimitSeeker(config.__name__, processes=min(len(pvs), multiprocessing.cpu_count()),
+                                       use_map=use_map)
+    dynamic_limits = [list(l) for l in config_limits]
+
     # Main loop
     while True:
+        seen = axis_updates.count
 
         # Freeze the positions of our current monitors by creating some dummies
         # This stops the threads from trying to reading each monitor sequentially, and holding each other up
@@ -376,6 +213,11 @@ def main():
                 collision_geometry.set_size(oversize=driver.getParam('OVERSIZE'))
             driver.new_data.clear()
             op_mode.calc_limits.set()
+            if use_map:
+                # Only the map for the new oversize is any use now
+                if map_builder.is_alive():
+                    map_builder.terminate()
+                map_builder = collision_map.start_build(config.__name__, driver.getParam('OVERSIZE'))
 
         if driver.getParam("CALC") != 0:
             op_mode.calc_limits.set()
@@ -408,9 +250,16 @@ def main():
             # Start timing for diagnostics
             time_passed = time()
 
-            # Seek the correct limit values
-            dynamic_limits = auto_seek_limits(geometries, ignore, moves, frozen, config_limits,
-                                              coarse=driver.getParam('COARSE'), fine=driver.getParam('FINE'))
+            # Seek the correct limit values, publishing each axis's limits as soon as they are found
+            for axis_index, axis_limits in limit_seeker.seek(frozen, config_limits, driver.getParam('OVERSIZE'),
+                                                             coarse=driver.getParam('COARSE'),
+                                                             fine=driver.getParam('FINE')):
+                dynamic_limits[axis_index] = axis_limits
+                publish_limits(driver, dynamic_limits, frozen)
+
+                if op_mode.set_limits.is_set() and not axis_limits == old_limits[axis_index]:
+                    threading.Thread(target=set_limits, args=([axis_limits], [pvs[axis_index]])).start()
+                    old_limits[axis_index] = axis_limits
 
             # Calculate and log the time taken to calculate
             time_passed = (time() - time_passed) * 1000
@@ -427,17 +276,10 @@ def main():
                 new_limits = config_limits[:]
 
             # Update the render thread parameters
-            parameters.update_params(dynamic_limits, collisions, time_passed)
+            parameters.update_params(dynamic_limits[:], collisions, time_passed)
 
             # # Update the PVs
             driver.setParam('TIME', time_passed)
-            driver.setParam('HI_LIM', [l[1] for l in dynamic_limits])
-            driver.setParam('LO_LIM', [l[0] for l in dynamic_limits])
-            driver.setParam('TRAVEL', [min([l[0] - m, l[1] - m], key=abs)
-                                       for l, m in zip(dynamic_limits, frozen)])
-            driver.setParam('TRAV_F', [l[1] - m for l, m in zip(dynamic_limits, frozen)])
-            driver.setParam('TRAV_R', [l[0] - m for l, m in zip(dynamic_limits, frozen)])
-
             driver.updatePVs()
 
             if 'blind' not in sys.argv:
@@ -462,14 +304,17 @@ def main():
         if op_mode.close.is_set():
             # Restore the configuration limits
             set_limits(config_limits, pvs)
+            limit_seeker.close()
             return
 
-        # Give the CPU a break
-        sleep(0.01)
+        # Wait for an axis to update or a PV to be written, or the heartbeat
+        axis_updates.wait(seen, MAIN_LOOP_HEARTBEAT)
 
         if 'return' in sys.argv:
+            limit_seeker.close()
             return
 
 
-# Execute main
-main()
+# Execute main, but not when imported by a worker process
+if __name__ == "__main__":
+    main()
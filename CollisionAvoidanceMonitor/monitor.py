@@ -7,15 +7,59 @@ import time
 from server_common.utilities import print_and_log
 
 
+class UpdateSignal(object):
+    """
+    Lets threads wait for an update from any of a set of monitors, rather than polling them.
+    """
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._count = 0
+
+    @property
+    def count(self):
+        """
+        The number of updates so far. Read it before checking the monitors, and pass it to wait afterwards, so updates
+        which arrive during the checks aren't missed.
+        """
+        with self._condition:
+            return self._count
+
+    def notify(self):
+        """
+        Signals an update to all the waiting threads.
+        """
+        with self._condition:
+            self._count += 1
+            self._condition.notify_all()
+
+    def wait(self, seen, timeout):
+        """
+        Waits for an update, unless there have been updates since the given count.
+
+        Args:
+            seen: The count of updates when the caller last checked the monitors
+            timeout: The longest time to wait, in seconds
+
+        Returns:
+            True if there has been an update, False if the wait timed out
+        """
+        with self._condition:
+            if self._count == seen:
+                self._condition.wait(timeout)
+            return self._count != seen
+
+
 class Monitor(object):
 
-    def __init__(self, pv):
+    def __init__(self, pv, update_signal=None):
         self.pv = pv
+        self.update_signal = update_signal
         self.val = None
         self.channel = CaChannel()
         self.running = False
         self.lock = threading.Lock()
         self.stale = True
+        self.updates = 0
 
     def start(self):
         if self.running:
@@ -42,6 +86,12 @@ class Monitor(object):
         with self.lock:
             self.val = epics_args['pv_value']
             self.stale = False
+            self.updates += 1
+        self._signal()
+
+    def _signal(self):
+        if self.update_signal is not None:
+            self.update_signal.notify()
 
     def value(self):
         with self.lock:
@@ -60,69 +110,71 @@ class Monitor(object):
 
 
 class MonitorQueue(Monitor):
-    def __init__(self, pv, initial=None):
-        self.queue = []
+    """
+    Monitors a PV, keeping the first value and the latest value rather than every update in between, so a fast moving
+    axis can't build up a backlog of stale values.
+    """
+    def __init__(self, pv, initial=None, update_signal=None):
+        Monitor.__init__(self, pv, update_signal)
         self.time = None
         self.frozen = False
-        if initial:
-            self.queue.append(initial)
-        Monitor.__init__(self, pv)
+        self._first = None
+        self._initialised = False
+        if initial is not None:
+            self._set(initial)
+
+    def _set(self, value):
+        if not self._initialised:
+            self._first = value
+            self._initialised = True
+        self.val = value
 
     def update(self, epics_args, user_args):
         value = epics_args['pv_value']
-        if value == self.last():
-            # Duplicate value
-            pass
-        else:
-            if not self.frozen:
-                with self.lock:
-                    self.queue.append(value)
-                    self.time = time.time()
+        if self.frozen:
+            return
+        with self.lock:
+            if self._initialised and value == self.val:
+                # Duplicate value
+                return
+            self._set(value)
+            self.stale = False
+            self.updates += 1
+            self.time = time.time()
+        self._signal()
 
     def clear(self):
         """
-        Sets the queue to the last value
+        Sets the first value to the last value
         """
         with self.lock:
-            self.queue[:] = [self.queue[-1]]
+            self._first = self.val
 
     def reset(self):
         """
-        Sets the queue to the first value
+        Sets the last value to the first value
         """
         with self.lock:
-            self.queue[:] = [self.queue[0]]
+            self.val = self._first
 
     def initialised(self):
         """
-        Is the queue populated?
+        Has a value been received?
         """
         with self.lock:
-            if len(self.queue) > 0:
-                return True
-            else:
-                return False
+            return self._initialised
 
     def first(self):
         with self.lock:
-            if len(self.queue) > 0:
-                return self.queue[0]
-            else:
-                return None
+            return self._first
 
     def last(self):
         with self.lock:
-            if len(self.queue) > 0:
-                return self.queue[-1]
-            else:
-                return None
+            return self.val
 
     def changed(self):
         with self.lock:
-            if self.first() == self.last():
-                return False
-            else:
-                return True
+            return self._first != self.val
 
 
 class DummyMonitor(object):
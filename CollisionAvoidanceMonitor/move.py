@@ -1,11 +1,59 @@
 from collections import Sequence
+
+import numpy as np
+
 from transform import Transformation
 
 
+class AxisReads(Sequence):
+    """
+    The axis positions given to a move, which records which of them the move reads.
+    """
+    def __init__(self, axes):
+        self._axes = axes
+        self.read = set()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            self.read.update(range(*index.indices(len(self._axes))))
+        elif -len(self._axes) <= index < len(self._axes):
+            self.read.add(index % len(self._axes))
+        return self._axes[index]
+
+    def __len__(self):
+        return len(self._axes)
+
+    def positions(self):
+        """
+        Returns:
+            A dictionary of the positions of the axes read, keyed by axis index
+        """
+        return {i: self._axes[i] for i in self.read}
+
+
+def driving_axes_moved(geometry, move, axes):
+    """
+    Checks whether any of the axes which drove the last move of a geometry have moved since.
+
+    Args:
+        geometry: The geometry to check
+        move: The move which will be applied to the geometry
+        axes: The current axis positions
+
+    Returns:
+        True if the geometry needs to be moved again, False if it is where the move would put it
+    """
+    last = getattr(geometry, "driving_axes", None)
+    return last is None or last[0] is not move or any(axes[i] != value for i, value in last[1].items())
+
+
 def move_all(geometries, moves, monitors=None, values=None):
     """
     Applies moves to all axes in the given geometries.
 
+    Geometries are only moved again when an axis their move reads has changed since their last move, so nothing is
+    recalculated while the axes are still.
+
     Args:
         geometries: A list of geometries. This list should have the same length as the list of moves provided.
         moves: A list of moves to apply
@@ -13,6 +61,9 @@ def move_all(geometries, moves, monitors=None, values=None):
             monitors: A list of monitor objects to get motor positions from
         Or:
             values: A list of the current motor positions
+
+    Returns:
+        True if any of the geometries moved or changed size, False if they are all where they were
     """
     if monitors is not None:
         axes = [m.value() for m in monitors]
@@ -21,12 +72,28 @@ def move_all(geometries, moves, monitors=None, values=None):
     else:
         raise ValueError("No monitors or values provided")
 
+    moved = False
     if isinstance(moves, list):
         for move, geometry in zip(moves, geometries):
-            apply_move(move(axes), geometry)
-    else:
-        for move, geometry in zip(moves(axes), geometries):
-            apply_move(move, geometry)
+            if driving_axes_moved(geometry, move, axes):
+                reads = AxisReads(axes)
+                moved = _update(geometry, move(reads), move, reads) or moved
+    elif any(driving_axes_moved(geometry, moves, axes) for geometry in geometries):
+        reads = AxisReads(axes)
+        new_moves = list(moves(reads))
+        # Geometries beyond the end of the moves stay where they are
+        new_moves += [None] * (len(geometries) - len(new_moves))
+        for move, geometry in zip(new_moves, geometries):
+            moved = _update(geometry, move, moves, reads) or moved
+    return moved
+
+
+def _update(geometry, move, driver, reads):
+    # A geometry without driving axes is new or has been resized, so has changed even if the move leaves it in place
+    changed = getattr(geometry, "driving_axes", None) is None
+    moved = apply_move(move, geometry)
+    geometry.driving_axes = (driver, reads.positions())
+    return moved or changed
 
 
 def apply_move(move, geometry):
@@ -42,15 +109,25 @@ def apply_move(move, geometry):
                 corresponding to the new size.
         geometry:
             The geometry to apply this move to.
+
+    Returns:
+        True if the geometry was moved, False if the move left it where it was
     """
     if move is None:
-        return
+        return False
     elif isinstance(move, Transformation):
-        geometry.set_transform(move)
+        t, s = move, None
     elif isinstance(move, Sequence) and len(move) == 2:
         t, s = move
-        geometry.set_transform(t)
-        if s is not None:
-            geometry.set_size(**s)
     else:
         raise TypeError("Couldn't interpret move object of type {}: {}".format(move.__class__.__name__, move))
+
+    applied = getattr(geometry, "applied_move", None)
+    if applied is not None and np.array_equal(applied[0], t.matrix) and applied[1] == s:
+        return False
+
+    geometry.set_transform(t)
+    if s is not None:
+        geometry.set_size(**s)
+    geometry.applied_move = (t.matrix.copy(), None if s is None else dict(s))
+    return True
@@ -103,9 +103,10 @@ pvdb = {
 
 
 class MyDriver(Driver):
-    def __init__(self, op_mode):
+    def __init__(self, op_mode, update_signal=None):
         super(MyDriver, self).__init__()
         self.op_mode = op_mode
+        self.update_signal = update_signal
 
         self.new_data = threading.Event()
 
@@ -157,10 +158,12 @@ class MyDriver(Driver):
             self.setParam(reason, True)
 
         self.new_data.set()
+        if self.update_signal is not None:
+            self.update_signal.notify()
         return status
 
 
-def start_thread(prefix, op_mode):
+def start_thread(prefix, op_mode, update_signal=None):
 
     server = SimpleServer()
     server.createPV(prefix, pvdb)
@@ -171,6 +174,6 @@ def start_thread(prefix, op_mode):
     server_thread.daemon = True
     server_thread.start()
 
-    driver = MyDriver(op_mode)
+    driver = MyDriver(op_mode, update_signal)
 
     return driver
@@ -0,0 +1,221 @@
+import math
+
+import numpy as np
+
+from collide import collide
+from move import move_all
+
+# The furthest a point can travel along its path, relative to the straight line distance between its start and end.
+# Translations travel in a straight line, and an arc of up to half a turn is at most pi/2 times its chord.
+PATH_RATIO = math.pi / 2
+
+# The smallest fraction of an interval to split off its end
+MIN_SPLIT = 0.25
+
+
+def axis_values(start_values, set_points, speeds, time):
+    """
+    Calculates the positions of the axes a given time into a move.
+
+    Args:
+        start_values: The positions of the axes at the start of the move
+        set_points: The set points of the axes, None for axes which aren't moving
+        speeds: The speeds of the axes, None for axes which aren't moving
+        time: The time into the move
+
+    Returns:
+        The positions of the axes, with moving axes stopped at their set points
+    """
+    values = list(start_values)
+    for i, (start, set_point, speed) in enumerate(zip(start_values, set_points, speeds)):
+        if set_point is not None and speed:
+            travel = speed * time
+            if abs(set_point - start) <= travel:
+                values[i] = set_point
+            else:
+                values[i] = start + math.copysign(travel, set_point - start)
+    return values
+
+
+def move_time(start_values, set_points, speeds):
+    """
+    Calculates how long it will take every moving axis to reach its set point.
+
+    Args:
+        start_values: The positions of the axes at the start of the move
+        set_points: The set points of the axes, None for axes which aren't moving
+        speeds: The speeds of the axes, None for axes which aren't moving
+
+    Returns:
+        The time taken by the slowest axis
+    """
+    times = [abs(set_point - start) / speed for start, set_point, speed in zip(start_values, set_points, speeds)
+             if set_point is not None and speed]
+    return max(times) if times else 0.
+
+
+def separations(vertices, ignore):
+    """
+    Calculates a lower bound on the distance between each pair of geometries, using a bounding sphere around each
+    geometry.
+
+    Args:
+        vertices: An array of the vertices of each geometry
+        ignore: A list of pairs of geometries to ignore
+
+    Returns:
+        A square array of the lower bound for each pair, which is negative where the bounding spheres overlap, and
+        infinite for ignored pairs and each geometry with itself
+    """
+    centres = vertices.mean(axis=1)
+    radii = np.max(np.linalg.norm(vertices - centres[:, np.newaxis], axis=2), axis=1)
+    gaps = np.linalg.norm(centres[:, np.newaxis] - centres[np.newaxis], axis=2) - radii[:, np.newaxis] - radii
+    np.fill_diagonal(gaps, np.inf)
+    for ind1, ind2 in ignore:
+        gaps[ind1, ind2] = gaps[ind2, ind1] = np.inf
+    return gaps
+
+
+def travel(start_values, end_values, vertices, geometries, moves):
+    """
+    Bounds how far any point of each geometry travels while the axes move from one set of positions to another.
+
+    Axes moving together can carry a point out and back again, e.g. a rotation on top of a translation, so the
+    distance between where a point starts and ends says nothing about how far it went. Instead, adds up how far each
+    axis moving on its own carries the point, with each arc allowed for by PATH_RATIO.
+
+    Args:
+        start_values: The positions of the axes at the start
+        end_values: The positions of the axes at the end
+        vertices: An array of the vertices of each geometry at the start
+        geometries: A list of GeometryBox objects
+        moves: The moves from the configuration
+
+    Returns:
+        An array of the bound for each geometry
+    """
+    margins = np.zeros(len(geometries))
+    for i, (start, end) in enumerate(zip(start_values, end_values)):
+        if start != end:
+            values = list(start_values)
+            values[i] = end
+            move_all(geometries, moves, values=values)
+            moved = np.array([g.get_vertices() for g in geometries])
+            margins += np.max(np.linalg.norm(moved - vertices, axis=2), axis=1)
+    return PATH_RATIO * margins
+
+
+def swept_collision(geometries, moves, ignore, start_values, margins):
+    """
+    Checks whether the volumes the geometries sweep through over an interval of a move could intersect.
+
+    Each geometry is grown by the furthest any of its points travels over the interval, at its position at the start
+    of the interval, which contains every position it passes through.
+
+    Args:
+        geometries: A list of GeometryBox objects
+        moves: The moves from the configuration
+        ignore: A list of pairs of geometries to ignore collisions between
+        start_values: The positions of the axes at the start of the interval
+        margins: The furthest any point of each geometry travels over the interval
+
+    Returns:
+        True if the swept volumes could intersect, False if there can be no collision during the interval
+    """
+    move_all(geometries, moves, values=start_values[:])
+    lengths = [g.geom.getLengths() for g in geometries]
+    try:
+        for g, length, margin in zip(geometries, lengths, margins):
+            g.geom.setLengths([l + 2 * margin for l in length])
+        return any(collide(geometries, ignore))
+    finally:
+        for g, length in zip(geometries, lengths):
+            g.geom.setLengths(length)
+
+
+def look_ahead(start_values, set_points, speeds, geometries, moves, ignore, max_movement=1.0, max_time=10.):
+    """
+    Predicts whether the current move will cause a collision.
+
+    Rather than checking for collisions at fixed time steps, checks the volume each geometry sweeps through over an
+    interval of the move, and only splits the intervals where the swept volumes could intersect. Intervals are split
+    until no point moves further than max_movement over them, and no pair of geometries which could meet moves
+    further relative to each other than the thinner of the two, then checked for a collision at their end. So no
+    geometry can pass through another between checks, and any overlap missed between checks is shallower than
+    max_movement.
+
+    How far points move over an interval is bounded by adding up how far each axis moves them on its own. This holds
+    when moving one axis doesn't change how far another moves a point, as with a rotation on top of a translation,
+    and is close for short intervals otherwise. Assumes no rotation turns more than half a turn within the look ahead
+    time.
+
+    The separation between the geometries sets the step sizes: pairs of geometries which can't close the gap between
+    them over an interval aren't checked over it, and intervals which need splitting are split where the closest pair
+    could first meet, so the steps are long far from obstacles and short close to them.
+
+    Args:
+        start_values: The current positions of the axes
+        set_points: The set points of the axes, None for axes which aren't moving
+        speeds: The speeds of the axes, None for axes which aren't moving
+        geometries: A list of GeometryBox objects
+        moves: The moves from the configuration
+        ignore: A list of pairs of geometries to ignore collisions between
+        max_movement: The furthest any point may move between collision checks
+        max_time: How far ahead to look, in seconds
+
+    Returns:
+        A tuple of a message, the time until a collision is possible, and whether the move is safe
+    """
+    msg = "No collisions predicted in the next %fs" % max_time
+
+    move_all(geometries, moves, values=start_values[:])
+    if any(collide(geometries, ignore)):
+        return "There is already a collision", 0., False
+
+    end_time = min(max_time, move_time(start_values, set_points, speeds))
+    if end_time <= 0:
+        return msg, max_time, True
+
+    sizes = np.array([min(g.geom.getLengths()) for g in geometries])
+    thicknesses = np.minimum(sizes[:, np.newaxis], sizes)
+
+    vertices = {}
+
+    def vertices_at(time):
+        if time not in vertices:
+            move_all(geometries, moves, values=axis_values(start_values, set_points, speeds, time))
+            vertices[time] = np.array([g.get_vertices() for g in geometries])
+        return vertices[time]
+
+    # Check the earliest interval first, so that the first collision found is the soonest
+    intervals = [(0., end_time)]
+    while intervals:
+        start_time, end_time = intervals.pop()
+        old = vertices_at(start_time)
+        margins = travel(axis_values(start_values, set_points, speeds, start_time),
+                         axis_values(start_values, set_points, speeds, end_time), old, geometries, moves)
+
+        # Pairs of geometries which can't close the gap between them can't collide during the interval
+        with np.errstate(divide="ignore", invalid="ignore"):
+            reach = np.nan_to_num(separations(old, ignore) / (margins[:, np.newaxis] + margins))
+        if reach.min() > 1:
+            continue
+        apart = ignore + [[int(i), int(j)] for i, j in zip(*np.nonzero(np.triu(reach > 1, 1)))]
+
+        if not swept_collision(geometries, moves, apart, axis_values(start_values, set_points, speeds, start_time),
+                               margins):
+            continue
+
+        steps = np.where(reach <= 1, margins[:, np.newaxis] + margins, 0)
+        if max(margins) <= max_movement and (steps <= thicknesses).all():
+            move_all(geometries, moves, values=axis_values(start_values, set_points, speeds, end_time))
+            if any(collide(geometries, apart)):
+                return "Collision expected in %.1fs - %.1fs" % (start_time, end_time), start_time, False
+            continue
+
+        # Split where the closest pair could first meet, so that the steps shorten as the geometries close in
+        split_time = start_time + (end_time - start_time) * min(max(reach.min(), 0.5), 1 - MIN_SPLIT)
+        intervals.append((split_time, end_time))
+        intervals.append((start_time, split_time))
+
+    return msg, max_time, True
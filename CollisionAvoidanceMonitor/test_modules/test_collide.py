@@ -13,8 +13,8 @@
 # along with this program; if not, you can obtain a copy from
 # https://www.eclipse.org/org/documents/epl-v10.php or
 # http://opensource.org/licenses/eclipse-1.0.php
-from mock import MagicMock
-from CollisionAvoidanceMonitor.collide import collide
+from mock import MagicMock, patch
+from CollisionAvoidanceMonitor.collide import collide, detect_collisions
 from unittest import TestCase
 
 
@@ -77,3 +77,12 @@ class TestCollide(TestCase):
 
         collisions = collide([MockGeometry(), MockGeometry(), MockGeometry()], ignored, collision_func=always_report_collisions)
         self.assertEqual(len([x for x in collisions if x is True]), 2)
+
+    def test_GIVEN_collisions_already_known_WHEN_detecting_collisions_THEN_collisions_not_checked_again(self):
+        driver = MagicMock()
+        with patch("CollisionAvoidanceMonitor.collide.collide") as mock_collide:
+            collisions, _, msg = detect_collisions(None, driver, [MockGeometry(), MockGeometry()], [], [], MagicMock(),
+                                                   MagicMock(), [], collisions=[False, False])
+        mock_collide.assert_not_called()
+        self.assertEqual(collisions, [False, False])
+        driver.setParam.assert_any_call('SAFE', 1)
@@ -0,0 +1,105 @@
+# This file is part of the ISIS IBEX application.
+# Copyright (C) 2012-2018 Science & Technology Facilities Council.
+# All rights reserved.
+#
+# This program is distributed in the hope that it will be useful.
+# This program and the accompanying materials are made available under the
+# terms of the Eclipse Public License v1.0 which accompanies this distribution.
+# EXCEPT AS EXPRESSLY SET FORTH IN THE ECLIPSE PUBLIC LICENSE V1.0, THE PROGRAM
+# AND ACCOMPANYING MATERIALS ARE PROVIDED ON AN "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND.  See the Eclipse Public License v1.0 for more details.
+#
+# You should have received a copy of the Eclipse Public License v1.0
+# along with this program; if not, you can obtain a copy from
+# https://www.eclipse.org/org/documents/epl-v10.php or
+# http://opensource.org/licenses/eclipse-1.0.php
+import os
+import sys
+import random
+import shutil
+import tempfile
+import numpy as np
+from unittest import TestCase
+
+# The configurations import the other modules as the monitor itself does, from its own directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("MYPVPREFIX", "")
+
+import ode
+from geometry import GeometryBox
+from move import move_all
+from collide import collide
+from collision_map import CollisionMap, map_path, map_points
+from configurations import config_zoom
+
+
+class CollisionMapTests(TestCase):
+    def setUp(self):
+        # Two axes from 0 to 100 in steps of 10, colliding where the first axis is at least 60
+        self.axes = [np.linspace(0.0, 100.0, 11), np.linspace(0.0, 100.0, 11)]
+        occupancy = np.zeros((11, 11), dtype=bool)
+        occupancy[6:, :] = True
+        self.collision_map = CollisionMap(self.axes, occupancy)
+
+    def test_GIVEN_position_far_from_collisions_WHEN_looking_up_THEN_free(self):
+        self.assertIs(self.collision_map.lookup([15.0, 50.0]), False)
+
+    def test_GIVEN_position_deep_in_collision_WHEN_looking_up_THEN_colliding(self):
+        self.assertIs(self.collision_map.lookup([85.0, 50.0]), True)
+
+    def test_GIVEN_position_near_boundary_WHEN_looking_up_THEN_needs_exact_check(self):
+        self.assertIsNone(self.collision_map.lookup([55.0, 50.0]))
+
+    def test_GIVEN_position_outside_map_WHEN_looking_up_THEN_needs_exact_check(self):
+        self.assertIsNone(self.collision_map.lookup([-5.0, 50.0]))
+
+    def test_GIVEN_axis_free_to_end_WHEN_bracketing_THEN_end_safe_and_no_collision(self):
+        self.assertEqual(self.collision_map.bracket([15.0, 5.0], 1, 95.0), (95.0, None))
+
+    def test_GIVEN_axis_moving_towards_boundary_WHEN_bracketing_THEN_safe_up_to_last_settled_cell(self):
+        self.assertEqual(self.collision_map.bracket([5.0, 50.0], 0, 55.0), (40.0, None))
+
+    def test_GIVEN_axis_moving_through_boundary_WHEN_bracketing_THEN_collision_in_first_settled_colliding_cell(self):
+        self.assertEqual(self.collision_map.bracket([5.0, 50.0], 0, 95.0), (40.0, 75.0))
+
+    def test_GIVEN_axis_moving_away_from_collision_WHEN_bracketing_THEN_no_collision(self):
+        self.assertEqual(self.collision_map.bracket([35.0, 50.0], 0, 5.0), (5.0, None))
+
+    def test_GIVEN_obstacle_in_undecided_cells_before_collision_WHEN_bracketing_THEN_no_collision(self):
+        axis = np.linspace(0.0, 30.0, 31)
+        collision_map = CollisionMap([axis], ((axis > 4.6) & (axis < 7.4)) | (axis > 20.0))
+        self.assertEqual(collision_map.bracket([0.5], 0, 30.0), (3.0, None))
+
+    def test_GIVEN_map_saved_WHEN_loading_THEN_same_map_loaded(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        points = map_points(config_zoom)
+        occupancy = np.random.RandomState(0).rand(*points) > 0.5
+        CollisionMap([np.arange(n, dtype=float) for n in points], occupancy).save(
+            map_path(config_zoom, 5.0, points, cache_dir))
+
+        loaded = CollisionMap.load(config_zoom, 5.0, cache_dir)
+
+        self.assertTrue((loaded.occupancy == occupancy).all())
+        self.assertIsNone(CollisionMap.load(config_zoom, 10.0, cache_dir))
+
+
+class CollisionMapConfigurationTests(TestCase):
+    def test_GIVEN_zoom_map_WHEN_looking_up_THEN_agrees_with_exact_checks(self):
+        config = config_zoom
+        collision_map = CollisionMap.build(config, config.oversize, [41, 41])
+        space = ode.Space()
+        geometries = [GeometryBox(space, oversize=config.oversize, **geometry) for geometry in config.geometries]
+        random.seed(0)
+
+        answered = 0
+        for _ in range(500):
+            values = [random.uniform(min(l), max(l)) for l in config.hardlimits]
+            mapped = collision_map.lookup(values)
+            if mapped is None:
+                continue
+            answered += 1
+            move_all(geometries, config.moves, values=values)
+            self.assertEqual(mapped, any(collide(geometries, config.ignore)), values)
+
+        self.assertGreater(answered, 250)
@@ -0,0 +1,266 @@
+# This file is part of the ISIS IBEX application.
+# Copyright (C) 2012-2018 Science & Technology Facilities Council.
+# All rights reserved.
+#
+# This program is distributed in the hope that it will be useful.
+# This program and the accompanying materials are made available under the
+# terms of the Eclipse Public License v1.0 which accompanies this distribution.
+# EXCEPT AS EXPRESSLY SET FORTH IN THE ECLIPSE PUBLIC LICENSE V1.0, THE PROGRAM
+# AND ACCOMPANYING MATERIALS ARE PROVIDED ON AN "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND.  See the Eclipse Public License v1.0 for more details.
+#
+# You should have received a copy of the Eclipse Public License v1.0
+# along with this program; if not, you can obtain a copy from
+# https://www.eclipse.org/org/documents/epl-v10.php or
+# http://opensource.org/licenses/eclipse-1.0.php
+import os
+import sys
+import random
+import importlib
+import numpy as np
+from mock import MagicMock, patch
+from unittest import TestCase
+
+# The configurations import the other modules as the monitor itself does, from its own directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("MYPVPREFIX", "")
+
+import ode
+from geometry import GeometryBox
+from move import move_all
+from collide import collide
+from CollisionAvoidanceMonitor import limits
+from CollisionAvoidanceMonitor.collision_map import CollisionMap
+from CollisionAvoidanceMonitor.limits import auto_seek, auto_seek_limits, _seek_axis_limits, max_delta
+
+
+class MockGeometry(object):
+    """
+    Object to mock a box, a unit cube by default, which moves along the x axis.
+    """
+    def __init__(self, position=0.0, scale=1.0, length=1.0):
+        self.scale = scale
+        self.position = position
+        self.length = length
+        self.oversize = 0.0
+        self.geom = MagicMock()
+        self.geom.getPosition.side_effect = lambda: (self.position, 0.0, 0.0)
+        self.geom.getLengths.side_effect = lambda: (self.length, 1.0, 1.0)
+
+    def set_size(self, oversize=None):
+        self.oversize = oversize
+
+    def move_to(self, value):
+        self.position = value * self.scale
+
+    def get_vertices(self):
+        return np.array([[self.position + x * self.length, y, z]
+                         for x in (-0.5, 0.5) for y in (-0.5, 0.5) for z in (-0.5, 0.5)])
+
+
+class LimitsTests(TestCase):
+    def setUp(self):
+        self.moving = MockGeometry()
+        self.obstacle = MockGeometry(position=50.0)
+        self.geometries = [self.moving, self.obstacle]
+        self.checks = 0
+
+        def move_all(geometries, moves, values):
+            self.moving.move_to(values[0])
+
+        def collide(geometries, ignore):
+            self.checks += 1
+            if [0, 1] in ignore:
+                return [False, False]
+            colliding = any(abs(self.moving.position - g.position) < (1.0 + g.length) / 2.0
+                            for g in self.geometries[1:])
+            return [colliding] * len(self.geometries)
+
+        move_patch = patch("CollisionAvoidanceMonitor.limits.move_all", side_effect=move_all)
+        collide_patch = patch("CollisionAvoidanceMonitor.limits.collide", side_effect=collide)
+        move_patch.start()
+        collide_patch.start()
+        self.addCleanup(move_patch.stop)
+        self.addCleanup(collide_patch.stop)
+
+    def test_GIVEN_no_obstacle_in_the_way_WHEN_seeking_THEN_end_value_returned(self):
+        limit = auto_seek(1.0, [0.0], -100.0, self.geometries, None, 0, [], 0.1)
+        self.assertEqual(limit, -100.0)
+
+    def test_GIVEN_obstacle_in_the_way_WHEN_seeking_up_THEN_limit_found_to_fine_step(self):
+        limit = auto_seek(1.0, [0.0], 100.0, self.geometries, None, 0, [], 0.1)
+        self.assertLessEqual(limit, 49.0)
+        self.assertGreater(limit, 48.9)
+
+    def test_GIVEN_obstacle_in_the_way_WHEN_seeking_down_THEN_limit_found_to_fine_step(self):
+        limit = auto_seek(1.0, [100.0], 0.0, self.geometries, None, 0, [], 0.1)
+        self.assertGreaterEqual(limit, 51.0)
+        self.assertLess(limit, 51.1)
+
+    def test_GIVEN_obstacle_in_the_way_WHEN_seeking_THEN_fewer_checks_than_stepping_at_the_fine_step(self):
+        auto_seek(1.0, [0.0], 100.0, self.geometries, None, 0, [], 0.1)
+        self.assertLess(self.checks, 49)
+
+    def test_GIVEN_geometry_moves_further_than_the_axis_WHEN_seeking_THEN_limit_found_to_scaled_fine_step(self):
+        self.moving.scale = 10.0
+        limit = auto_seek(1.0, [0.0], 10.0, self.geometries, None, 0, [], 0.1)
+        self.assertLessEqual(limit, 4.9)
+        self.assertGreater(limit, 4.89)
+
+    def test_GIVEN_already_colliding_WHEN_seeking_THEN_current_value_returned(self):
+        limit = auto_seek(1.0, [50.0], 100.0, self.geometries, None, 0, [], 0.1)
+        self.assertEqual(limit, 50.0)
+
+    def test_GIVEN_collision_ignored_WHEN_seeking_THEN_end_value_returned(self):
+        limit = auto_seek(1.0, [0.0], 100.0, self.geometries, None, 0, [[0, 1]], 0.1)
+        self.assertEqual(limit, 100.0)
+
+    def test_GIVEN_collision_map_WHEN_seeking_THEN_same_limit_found_with_fewer_checks(self):
+        axis = np.linspace(0.0, 100.0, 101)
+        collision_map = CollisionMap([axis], np.abs(axis - 50.0) < 1.0)
+
+        limit = auto_seek(1.0, [0.0], 100.0, self.geometries, None, 0, [], 0.1, collision_map)
+
+        self.assertLessEqual(limit, 49.0)
+        self.assertGreater(limit, 48.9)
+        self.assertLess(self.checks, 12)
+
+    def test_GIVEN_collision_map_showing_false_collision_WHEN_seeking_THEN_limit_found_by_exact_checks(self):
+        axis = np.linspace(0.0, 100.0, 101)
+        collision_map = CollisionMap([axis], (axis >= 28.0) & (axis <= 35.0))
+
+        limit = auto_seek(1.0, [0.0], 100.0, self.geometries, None, 0, [], 0.1, collision_map)
+
+        self.assertLessEqual(limit, 49.0)
+        self.assertGreater(limit, 48.9)
+
+    def test_GIVEN_obstacle_in_cells_the_map_cannot_tell_about_WHEN_seeking_THEN_limit_found_before_it(self):
+        # An obstacle from 4.6 to 7.4, and a wall from 20 to 30, which the map only shows colliding from 21
+        self.obstacle.position, self.obstacle.length = 6.0, 1.8
+        self.geometries.append(MockGeometry(position=25.0, length=9.0))
+        axis = np.linspace(0.0, 30.0, 31)
+        collision_map = CollisionMap([axis], ((axis > 4.6) & (axis < 7.4)) | (axis > 20.0))
+
+        limit = auto_seek(1.0, [0.0], 30.0, self.geometries, None, 0, [], 0.1, collision_map)
+
+        self.assertLessEqual(limit, 4.6)
+        self.assertGreater(limit, 4.5)
+
+    def test_GIVEN_obstacle_on_one_side_WHEN_seeking_limits_THEN_limits_returned_for_each_axis(self):
+        dynamic_limits = auto_seek_limits(self.geometries, [], None, [0.0], [[-100.0, 100.0]], coarse=1.0, fine=0.1)
+        self.assertEqual(len(dynamic_limits), 1)
+        self.assertEqual(dynamic_limits[0][0], -100.0)
+        self.assertAlmostEqual(dynamic_limits[0][1], 49.0, delta=0.1)
+
+    def _start_mock_worker(self):
+        config = MagicMock()
+        config.moves = None
+        config.ignore = []
+        patcher = patch.dict(limits._worker, {"config": config, "geometries": self.geometries, "use_map": False})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_GIVEN_worker_started_WHEN_seeking_axis_limits_THEN_axis_and_its_limits_returned(self):
+        self._start_mock_worker()
+        axis_index, axis_limits = _seek_axis_limits((0, [0.0], [100.0, -100.0], 0.0, 1.0, 0.1))
+        self.assertEqual(axis_index, 0)
+        self.assertEqual(axis_limits[0], -100.0)
+        self.assertAlmostEqual(axis_limits[1], 49.0, delta=0.1)
+
+    def test_GIVEN_oversize_changed_WHEN_seeking_axis_limits_THEN_worker_geometries_resized(self):
+        self._start_mock_worker()
+        _seek_axis_limits((0, [0.0], [-100.0, 100.0], 5.0, 1.0, 0.1))
+        self.assertEqual([g.oversize for g in self.geometries], [5.0, 5.0])
+
+
+class LimitsConfigurationTests(TestCase):
+    def _fixed_step_seek(self, start_step_size, start_values, end_value, geometries, moves, axis_index, ignore,
+                         fine_step=None):
+        # The search the monitor used before, stepping at the coarse step then again at the fine step
+        values = start_values[:]
+        current_value = start_values[axis_index]
+        direction = 1.0 if end_value > current_value else -1.0
+        step_size = direction * abs(start_step_size)
+        last_value = None
+        old_points = None
+        step_checked = False
+        limit = end_value
+
+        while last_value is None or direction * (end_value - last_value) > 0:
+            if last_value is not None:
+                current_value += step_size
+            else:
+                current_value = start_values[axis_index]
+            if direction * (end_value - current_value) <= 0:
+                current_value = end_value
+
+            values[axis_index] = current_value
+            move_all(geometries, moves, values=values[:])
+
+            if not step_checked:
+                new_points = [g.get_vertices() for g in geometries]
+                if old_points is not None:
+                    delta = max_delta(geometries, new_points, old_points)
+                    if delta > start_step_size:
+                        step_size *= start_step_size / delta
+                        last_value = None
+                        continue
+                    step_checked = True
+
+            if any(collide(geometries, ignore)):
+                if current_value == start_values[axis_index]:
+                    limit = current_value
+                elif fine_step and fine_step < abs(step_size):
+                    fine_values = start_values[:]
+                    fine_values[axis_index] = last_value
+                    limit = self._fixed_step_seek(fine_step, fine_values, current_value, geometries, moves,
+                                                  axis_index, ignore)
+                else:
+                    limit = last_value
+                break
+
+            old_points = new_points[:]
+            last_value = current_value
+
+        return limit
+
+    def _fine_step(self, config, geometries, values, end_value, axis_index):
+        # The fine step in axis units, scaled as auto_seek scales it by how far the vertices move with the axis
+        probe_values = values[:]
+        move_all(geometries, config.moves, values=probe_values[:])
+        start_points = [g.get_vertices() for g in geometries]
+        probe_distance = min(config.coarse, abs(end_value - values[axis_index]))
+        probe_values[axis_index] += probe_distance if end_value > values[axis_index] else -probe_distance
+        move_all(geometries, config.moves, values=probe_values[:])
+        movement = max_delta(geometries, [g.get_vertices() for g in geometries], start_points) / probe_distance
+        return config.fine / max(movement, 1.0)
+
+    def _check_configuration(self, name):
+        config = importlib.import_module("configurations." + name)
+        space = ode.Space()
+        geometries = [GeometryBox(space, oversize=config.oversize, **geometry) for geometry in config.geometries]
+        random.seed(1)
+
+        for _ in range(3):
+            values = [random.uniform(min(l), max(l)) for l in config.hardlimits]
+            for axis_index, axis_limits in enumerate(config.hardlimits):
+                for end_value in axis_limits:
+                    limit = auto_seek(config.coarse, values[:], end_value, geometries, config.moves, axis_index,
+                                      config.ignore, config.fine)
+                    fixed_step_limit = self._fixed_step_seek(config.coarse, values[:], end_value, geometries,
+                                                             config.moves, axis_index, config.ignore, config.fine)
+                    if limit == values[axis_index] or limit == end_value:
+                        self.assertEqual(limit, fixed_step_limit)
+                        continue
+                    fine_step = self._fine_step(config, geometries, values, end_value, axis_index)
+                    self.assertAlmostEqual(limit, fixed_step_limit, delta=fine_step,
+                                           msg="axis %d towards %s from %s" % (axis_index, end_value, values))
+
+    def test_GIVEN_larmor_configuration_WHEN_seeking_THEN_same_limits_as_fixed_step_search(self):
+        self._check_configuration("config_larmor")
+
+    def test_GIVEN_imat_configuration_WHEN_seeking_THEN_same_limits_as_fixed_step_search(self):
+        self._check_configuration("config_imat")
+
+    def test_GIVEN_zoom_configuration_WHEN_seeking_THEN_same_limits_as_fixed_step_search(self):
+        self._check_configuration("config_zoom")
@@ -0,0 +1,109 @@
+# This file is part of the ISIS IBEX application.
+# Copyright (C) 2012-2018 Science & Technology Facilities Council.
+# All rights reserved.
+#
+# This program is distributed in the hope that it will be useful.
+# This program and the accompanying materials are made available under the
+# terms of the Eclipse Public License v1.0 which accompanies this distribution.
+# EXCEPT AS EXPRESSLY SET FORTH IN THE ECLIPSE PUBLIC LICENSE V1.0, THE PROGRAM
+# AND ACCOMPANYING MATERIALS ARE PROVIDED ON AN "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND.  See the Eclipse Public License v1.0 for more details.
+#
+# You should have received a copy of the Eclipse Public License v1.0
+# along with this program; if not, you can obtain a copy from
+# https://www.eclipse.org/org/documents/epl-v10.php or
+# http://opensource.org/licenses/eclipse-1.0.php
+import threading
+from mock import patch
+from unittest import TestCase
+
+from CollisionAvoidanceMonitor.monitor import Monitor, MonitorQueue, UpdateSignal
+
+
+def send(monitor, value):
+    """
+    Sends a channel access update to a monitor.
+    :param monitor: The monitor
+    :param value: The new value
+    """
+    monitor.update({'pv_value': value}, None)
+
+
+@patch("CollisionAvoidanceMonitor.monitor.CaChannel")
+class TestMonitorQueue(TestCase):
+    def test_GIVEN_many_updates_WHEN_reading_THEN_only_first_and_latest_values_kept(self, _):
+        queue = MonitorQueue("PV")
+        for value in range(1000):
+            send(queue, value)
+        self.assertEqual(queue.first(), 0)
+        self.assertEqual(queue.last(), 999)
+        self.assertEqual(queue.value(), 999)
+        self.assertEqual(queue.updates, 1000)
+
+    def test_GIVEN_duplicate_update_WHEN_received_THEN_not_counted(self, _):
+        queue = MonitorQueue("PV", initial=1)
+        send(queue, 1)
+        self.assertEqual(queue.updates, 0)
+        self.assertFalse(queue.changed())
+
+    def test_GIVEN_value_changed_WHEN_cleared_THEN_first_value_is_latest_value(self, _):
+        queue = MonitorQueue("PV", initial=1)
+        send(queue, 2)
+        self.assertTrue(queue.changed())
+        queue.clear()
+        self.assertFalse(queue.changed())
+        self.assertEqual(queue.first(), 2)
+
+    def test_GIVEN_value_changed_WHEN_reset_THEN_latest_value_is_first_value(self, _):
+        queue = MonitorQueue("PV", initial=1)
+        send(queue, 2)
+        queue.reset()
+        self.assertEqual(queue.last(), 1)
+
+    def test_GIVEN_frozen_WHEN_updated_THEN_value_not_changed(self, _):
+        queue = MonitorQueue("PV", initial=1)
+        queue.frozen = True
+        send(queue, 2)
+        self.assertEqual(queue.last(), 1)
+
+    def test_GIVEN_no_values_WHEN_checking_initialised_THEN_not_initialised_until_value_received(self, _):
+        queue = MonitorQueue("PV")
+        self.assertFalse(queue.initialised())
+        send(queue, 0)
+        self.assertTrue(queue.initialised())
+
+    def test_GIVEN_monitor_WHEN_updated_THEN_updates_counted_and_value_fresh(self, _):
+        monitor = Monitor("PV")
+        send(monitor, 1)
+        send(monitor, 2)
+        self.assertEqual(monitor.updates, 2)
+        self.assertTrue(monitor.fresh())
+        self.assertEqual(monitor.value(), 2)
+
+
+class TestUpdateSignal(TestCase):
+    def test_GIVEN_update_since_count_read_WHEN_waiting_THEN_returns_straight_away(self):
+        signal = UpdateSignal()
+        seen = signal.count
+        signal.notify()
+        self.assertTrue(signal.wait(seen, 10))
+
+    def test_GIVEN_no_updates_WHEN_waiting_THEN_times_out(self):
+        signal = UpdateSignal()
+        self.assertFalse(signal.wait(signal.count, 0.01))
+
+    def test_GIVEN_waiting_WHEN_update_from_another_thread_THEN_wakes(self):
+        signal = UpdateSignal()
+        seen = signal.count
+        timer = threading.Timer(0.05, signal.notify)
+        timer.start()
+        self.assertTrue(signal.wait(seen, 10))
+        timer.join()
+
+    @patch("CollisionAvoidanceMonitor.monitor.CaChannel")
+    def test_GIVEN_monitor_with_signal_WHEN_updated_THEN_signal_notified(self, _):
+        signal = UpdateSignal()
+        monitor = Monitor("PV", signal)
+        seen = signal.count
+        send(monitor, 1)
+        self.assertTrue(signal.wait(seen, 0))
@@ -0,0 +1,105 @@
+# This file is part of the ISIS IBEX application.
+# Copyright (C) 2012-2018 Science & Technology Facilities Council.
+# All rights reserved.
+#
+# This program is distributed in the hope that it will be useful.
+# This program and the accompanying materials are made available under the
+# terms of the Eclipse Public License v1.0 which accompanies this distribution.
+# EXCEPT AS EXPRESSLY SET FORTH IN THE ECLIPSE PUBLIC LICENSE V1.0, THE PROGRAM
+# AND ACCOMPANYING MATERIALS ARE PROVIDED ON AN "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND.  See the Eclipse Public License v1.0 for more details.
+#
+# You should have received a copy of the Eclipse Public License v1.0
+# along with this program; if not, you can obtain a copy from
+# https://www.eclipse.org/org/documents/epl-v10.php or
+# http://opensource.org/licenses/eclipse-1.0.php
+from mock import MagicMock
+from unittest import TestCase
+
+from CollisionAvoidanceMonitor.move import move_all
+from CollisionAvoidanceMonitor.transform import Transformation
+
+
+class MockGeometry(object):
+    """
+    Object to mock a geometry.
+    """
+    def __init__(self):
+        self.set_transform = MagicMock()
+        self.set_size = MagicMock()
+
+
+def translate_by(axis):
+    """
+    Makes a move which translates along x by the position of an axis.
+    :param axis: The index of the axis
+    :return: The move
+    """
+    def move(axes):
+        t = Transformation()
+        t.translate(x=axes[axis])
+        return t
+    return move
+
+
+class TestMoveAll(TestCase):
+    def setUp(self):
+        self.geometries = [MockGeometry(), MockGeometry()]
+
+    def test_GIVEN_new_geometries_WHEN_moved_THEN_moves_applied_and_reported(self):
+        moved = move_all(self.geometries, [translate_by(0), translate_by(1)], values=[1.0, 2.0])
+        self.assertTrue(moved)
+        for geometry in self.geometries:
+            self.assertEqual(geometry.set_transform.call_count, 1)
+
+    def test_GIVEN_axes_unchanged_WHEN_moved_again_THEN_moves_not_recalculated_and_nothing_reported_moved(self):
+        moves = MagicMock(side_effect=lambda axes: [translate_by(0)(axes), translate_by(1)(axes)])
+        move_all(self.geometries, moves, values=[1.0, 2.0])
+        moved = move_all(self.geometries, moves, values=[1.0, 2.0])
+        self.assertFalse(moved)
+        self.assertEqual(moves.call_count, 1)
+
+    def test_GIVEN_separate_moves_WHEN_axis_driving_one_geometry_moves_THEN_only_that_geometry_recalculated(self):
+        first_move = MagicMock(side_effect=translate_by(0))
+        second_move = MagicMock(side_effect=translate_by(1))
+        move_all(self.geometries, [first_move, second_move], values=[1.0, 2.0])
+        moved = move_all(self.geometries, [first_move, second_move], values=[1.0, 3.0])
+        self.assertTrue(moved)
+        self.assertEqual(first_move.call_count, 1)
+        self.assertEqual(second_move.call_count, 2)
+        self.assertEqual(self.geometries[0].set_transform.call_count, 1)
+        self.assertEqual(self.geometries[1].set_transform.call_count, 2)
+
+    def test_GIVEN_single_move_function_WHEN_one_geometry_moves_THEN_only_that_geometry_updated(self):
+        moves = lambda axes: [translate_by(0)(axes), translate_by(1)(axes)]
+        move_all(self.geometries, moves, values=[1.0, 2.0])
+        move_all(self.geometries, moves, values=[1.0, 3.0])
+        self.assertEqual(self.geometries[0].set_transform.call_count, 1)
+        self.assertEqual(self.geometries[1].set_transform.call_count, 2)
+
+    def test_GIVEN_axis_not_read_by_any_move_WHEN_it_moves_THEN_nothing_reported_moved(self):
+        moves = MagicMock(side_effect=lambda axes: [translate_by(0)(axes), translate_by(1)(axes)])
+        move_all(self.geometries, moves, values=[1.0, 2.0, 3.0])
+        moved = move_all(self.geometries, moves, values=[1.0, 2.0, 4.0])
+        self.assertFalse(moved)
+        self.assertEqual(moves.call_count, 1)
+
+    def test_GIVEN_geometry_resized_since_last_move_WHEN_moved_again_THEN_reported_moved(self):
+        moves = [translate_by(0), translate_by(1)]
+        move_all(self.geometries, moves, values=[1.0, 2.0])
+        self.geometries[0].driving_axes = None
+        self.assertTrue(move_all(self.geometries, moves, values=[1.0, 2.0]))
+        self.assertEqual(self.geometries[0].set_transform.call_count, 1)
+
+    def test_GIVEN_move_with_size_WHEN_applied_THEN_size_set(self):
+        def move(axes):
+            return Transformation(), {"z": axes[0]}
+        move_all(self.geometries[:1], [move], values=[5.0])
+        self.geometries[0].set_size.assert_called_once_with(z=5.0)
+
+    def test_GIVEN_fewer_moves_than_geometries_WHEN_axes_unchanged_THEN_moves_not_recalculated(self):
+        moves = MagicMock(side_effect=lambda axes: [translate_by(0)(axes)])
+        move_all(self.geometries, moves, values=[1.0])
+        self.assertFalse(move_all(self.geometries, moves, values=[1.0]))
+        self.assertEqual(moves.call_count, 1)
+        self.geometries[1].set_transform.assert_not_called()
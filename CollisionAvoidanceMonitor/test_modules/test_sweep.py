@@ -0,0 +1,201 @@
+# This file is part of the ISIS IBEX application.
+# Copyright (C) 2012-2018 Science & Technology Facilities Council.
+# All rights reserved.
+#
+# This program is distributed in the hope that it will be useful.
+# This program and the accompanying materials are made available under the
+# terms of the Eclipse Public License v1.0 which accompanies this distribution.
+# EXCEPT AS EXPRESSLY SET FORTH IN THE ECLIPSE PUBLIC LICENSE V1.0, THE PROGRAM
+# AND ACCOMPANYING MATERIALS ARE PROVIDED ON AN "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND.  See the Eclipse Public License v1.0 for more details.
+#
+# You should have received a copy of the Eclipse Public License v1.0
+# along with this program; if not, you can obtain a copy from
+# https://www.eclipse.org/org/documents/epl-v10.php or
+# http://opensource.org/licenses/eclipse-1.0.php
+import os
+import sys
+import random
+import importlib
+import numpy as np
+from math import radians
+from mock import MagicMock, patch
+from unittest import TestCase
+
+# The configurations import the other modules as the monitor itself does, from its own directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("MYPVPREFIX", "")
+
+import ode
+from geometry import GeometryBox
+from move import move_all
+from collide import collide
+from transform import Transformation
+from sweep import look_ahead, axis_values, separations
+
+
+class MockGeometry(object):
+    """
+    Object to mock a box which moves along the x axis.
+    """
+    def __init__(self, position=0.0, length=1.0):
+        self.position = position
+        self.lengths = [length, 1.0, 1.0]
+        self.geom = MagicMock()
+        self.geom.getLengths.side_effect = lambda: list(self.lengths)
+        self.geom.setLengths.side_effect = self.set_lengths
+
+    def set_lengths(self, lengths):
+        self.lengths = list(lengths)
+
+    def get_vertices(self):
+        return np.array([[self.position + x * self.lengths[0], y, z]
+                         for x in (-0.5, 0.5) for y in (-0.5, 0.5) for z in (-0.5, 0.5)])
+
+
+class LookAheadTests(TestCase):
+    def setUp(self):
+        self.moving = MockGeometry()
+        self.obstacle = MockGeometry(position=50.0, length=0.1)
+        self.geometries = [self.moving, self.obstacle]
+        self.checks = 0
+
+        def move_all(geometries, moves, values):
+            self.moving.position = values[0]
+
+        def collide(geometries, ignore):
+            self.checks += 1
+            gap = abs(self.moving.position - self.obstacle.position)
+            colliding = gap < (self.moving.lengths[0] + self.obstacle.lengths[0]) / 2.0
+            return [colliding, colliding]
+
+        move_patch = patch("sweep.move_all", side_effect=move_all)
+        collide_patch = patch("sweep.collide", side_effect=collide)
+        move_patch.start()
+        collide_patch.start()
+        self.addCleanup(move_patch.stop)
+        self.addCleanup(collide_patch.stop)
+
+    def test_GIVEN_axis_moving_up_WHEN_getting_values_THEN_axis_moved_by_speed_times_time(self):
+        self.assertEqual(axis_values([0.0, 5.0], [10.0, None], [2.0, None], 2.0), [4.0, 5.0])
+
+    def test_GIVEN_axis_moving_down_WHEN_getting_values_past_set_point_THEN_axis_stopped_at_set_point(self):
+        self.assertEqual(axis_values([10.0], [4.0], [2.0], 5.0), [4.0])
+
+    def test_GIVEN_no_axes_moving_WHEN_looking_ahead_THEN_safe(self):
+        msg, safe_time, safe = look_ahead([0.0], [None], [None], self.geometries, None, [])
+        self.assertTrue(safe)
+        self.assertEqual(safe_time, 10.0)
+
+    def test_GIVEN_already_colliding_WHEN_looking_ahead_THEN_not_safe_from_now(self):
+        msg, safe_time, safe = look_ahead([50.0], [100.0], [10.0], self.geometries, None, [])
+        self.assertFalse(safe)
+        self.assertEqual(safe_time, 0.0)
+
+    def test_GIVEN_move_through_thin_obstacle_WHEN_looking_ahead_THEN_collision_found_before_it_happens(self):
+        msg, safe_time, safe = look_ahead([0.0], [100.0], [100.0], self.geometries, None, [], max_movement=1.0)
+        self.assertFalse(safe)
+        # The boxes touch when the moving box reaches 49.45, at 0.4945s
+        self.assertLessEqual(safe_time, 0.4945)
+        self.assertGreater(safe_time, 0.48)
+
+    def test_GIVEN_thin_box_moving_through_thin_obstacle_WHEN_looking_ahead_THEN_collision_found_wherever_it_is(self):
+        self.moving.lengths[0] = 0.05
+        self.obstacle.lengths[0] = 0.05
+        for offset in range(20):
+            self.obstacle.position = 50.0 + offset * 0.05
+            msg, safe_time, safe = look_ahead([0.0], [100.0], [100.0], self.geometries, None, [], max_movement=1.0)
+            self.assertFalse(safe)
+            # The boxes touch when the moving box is 0.05 short of the obstacle
+            self.assertLessEqual(safe_time, (self.obstacle.position - 0.05) / 100.0)
+
+    def test_GIVEN_move_away_from_obstacle_WHEN_looking_ahead_THEN_safe_with_fewer_checks_than_fixed_steps(self):
+        msg, safe_time, safe = look_ahead([0.0], [-100.0], [100.0], self.geometries, None, [], max_movement=1.0)
+        self.assertTrue(safe)
+        self.assertLess(self.checks, 100)
+
+    def test_GIVEN_obstacle_too_far_away_to_reach_WHEN_looking_ahead_THEN_safe_without_checking_the_move(self):
+        self.obstacle.position = 500.0
+        msg, safe_time, safe = look_ahead([0.0], [100.0], [100.0], self.geometries, None, [], max_movement=1.0)
+        self.assertTrue(safe)
+        self.assertEqual(self.checks, 1)
+
+    def test_GIVEN_boxes_apart_WHEN_getting_separations_THEN_gap_between_bounding_spheres_returned(self):
+        self.obstacle.position = 10.0
+        self.obstacle.lengths = [1.0, 1.0, 1.0]
+        gaps = separations(np.array([g.get_vertices() for g in self.geometries]), [])
+        self.assertAlmostEqual(gaps[0, 1], 10.0 - np.sqrt(3.0))
+        self.assertEqual(gaps[0, 0], np.inf)
+
+    def test_GIVEN_pair_ignored_WHEN_getting_separations_THEN_pair_infinitely_far_apart(self):
+        gaps = separations(np.array([g.get_vertices() for g in self.geometries]), [[0, 1]])
+        self.assertEqual(gaps[1, 0], np.inf)
+
+
+class LookAheadConfigurationTests(TestCase):
+    def _first_collision(self, config, geometries, start_values, set_points, speeds, max_time, time_step):
+        time = 0.0
+        while time <= max_time:
+            move_all(geometries, config.moves, values=axis_values(start_values, set_points, speeds, time))
+            if any(collide(geometries, config.ignore)):
+                return time
+            time += time_step
+        return None
+
+    def _check_configuration(self, name):
+        config = importlib.import_module("configurations." + name)
+        space = ode.Space()
+        geometries = [GeometryBox(space, oversize=config.oversize, **geometry) for geometry in config.geometries]
+        random.seed(0)
+
+        cases = 0
+        while cases < 5:
+            start_values = [random.uniform(min(l), max(l)) for l in config.hardlimits]
+            move_all(geometries, config.moves, values=start_values[:])
+            if any(collide(geometries, config.ignore)):
+                continue
+            set_points = [random.uniform(min(l), max(l)) for l in config.hardlimits]
+            speeds = [abs(s - v) / random.uniform(1.0, 8.0) for s, v in zip(set_points, start_values)]
+            cases += 1
+
+            msg, safe_time, safe = look_ahead(start_values, set_points, speeds, geometries, config.moves,
+                                              config.ignore, max_movement=config.coarse)
+            collision_time = self._first_collision(config, geometries, start_values, set_points, speeds, 10.0, 0.01)
+
+            if collision_time is not None:
+                self.assertFalse(safe, msg)
+                self.assertLessEqual(safe_time, collision_time)
+
+    def test_GIVEN_rotation_on_translation_ending_where_it_started_WHEN_looking_ahead_THEN_collision_found(self):
+        # A box 40 from the centre of a rotation, on a stage which moves it back to where it started as it turns
+        # half a turn, and an obstacle half way round
+        def moves(axes):
+            t = Transformation()
+            t.translate(x=40)
+            t.rotate(rz=radians(axes[1]))
+            t.translate(x=axes[0])
+            yield t
+
+            t = Transformation()
+            t.translate(x=40, y=40)
+            yield t
+
+        space = ode.Space()
+        geometries = [GeometryBox(space, oversize=0, size=(1, 1, 1)), GeometryBox(space, oversize=0, size=(2, 2, 2))]
+
+        msg, safe_time, safe = look_ahead([0.0, 0.0], [80.0, 180.0], [20.0, 45.0], geometries, moves, [],
+                                          max_movement=1.0)
+
+        self.assertFalse(safe, msg)
+        collision_time = self._first_collision(MagicMock(moves=moves, ignore=[]), geometries, [0.0, 0.0],
+                                               [80.0, 180.0], [20.0, 45.0], 4.0, 0.01)
+        self.assertLessEqual(safe_time, collision_time)
+
+    def test_GIVEN_larmor_configuration_WHEN_looking_ahead_THEN_no_collisions_missed(self):
+        self._check_configuration("config_larmor")
+
+    def test_GIVEN_imat_configuration_WHEN_looking_ahead_THEN_no_collisions_missed(self):
+        self._check_configuration("config_imat")
+
+    def test_GIVEN_zoom_configuration_WHEN_looking_ahead_THEN_no_collisions_missed(self):
+        self._check_configuration("config_zoom")
@@ -70,3 +70,20 @@ class TransformTests(unittest.TestCase):
 
         # Check that applying the inverse successfully undoes the original transformation.
         self.assertTrue(np.array_equal(test_position, inverse_transform.evaluate(transformed_position)))
+
+    def test_GIVEN_transformation_WHEN_evaluating_array_of_positions_THEN_each_position_transformed(self):
+        test_positions = np.array([[5, 6, 7], [-1, 0, 2], [0, 0, 0]])
+
+        t = Transformation()
+        t.rotate(50, 70, 90)
+        t.scale(4, 5, 6)
+        t.translate(7, 8, 9)
+
+        transformed_positions = t.evaluate(test_positions)
+
+        self.assertEqual(transformed_positions.shape, (3, 3))
+        for test_position, transformed_position in zip(test_positions, transformed_positions):
+            self.assertTrue(np.allclose(t.evaluate(list(test_position)), transformed_position))
+
+    def test_GIVEN_no_positions_WHEN_evaluating_all_THEN_empty_array_returned(self):
+        self.assertEqual(Transformation().evaluate_all(np.zeros((0, 3))).shape, (0, 3))
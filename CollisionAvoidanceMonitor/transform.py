@@ -115,14 +115,19 @@ class Transformation(object):
 
     def evaluate(self, position):
         """
-        Given a set of [x, y ,z] coordinates, calculate transformed position.
+        Given a set of [x, y ,z] coordinates, or an Nx3 array of them, calculate transformed positions.
 
         Args:
-            position: collection of 3 items [x, y, z], which correspond to a point in 3D space to be transformed.
+            position: collection of 3 items [x, y, z], which correspond to a point in 3D space to be transformed, or
+                an Nx3 array of such points.
 
         Returns:
-            a collection of 3 items [x, y, z] which are the result of applying the transformation to the position.
+            a collection of 3 items [x, y, z] which are the result of applying the transformation to the position, or
+            an Nx3 array of the transformed points.
         """
+        if np.ndim(position) == 2:
+            return self.evaluate_all(position)
+
         assert len(position) == 3
         x, y, z = position
 
@@ -130,6 +135,24 @@ class Transformation(object):
         # the dot product. The first 3 elements of the resulting vector are the new position.
         return np.dot(self.matrix, [x, y, z, 1.0])[0:3]
 
+    def evaluate_all(self, positions):
+        """
+        Calculate the transformed positions of many points at once.
+
+        Args:
+            positions: an Nx3 array of points in 3D space to be transformed.
+
+        Returns:
+            an Nx3 array of the transformed points.
+        """
+        positions = np.asarray(positions, dtype=float)
+        assert positions.ndim == 2 and positions.shape[1] == 3
+
+        # As for a single point, but with the points as the rows of an Nx4 matrix, so they are all transformed in one
+        # product with the transpose of the transformation matrix.
+        homogeneous = np.hstack((positions, np.ones((len(positions), 1))))
+        return np.dot(homogeneous, self.matrix.T)[:, 0:3]
+
     def get_position_matrix(self):
         """
         Gets the position vector from this transform.
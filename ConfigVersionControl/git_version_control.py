@@ -19,17 +19,27 @@ import socket
 import six
 from git import *
 from version_control_exceptions import *
-from threading import Thread, RLock
-from time import sleep
+from threading import Thread, RLock, Event
+from time import sleep, time
 from git_message_provider import GitMessageProvider
 from server_common.utilities import print_and_log, retry
 from server_common.common_exceptions import MaxAttemptsExceededException
 
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler, EVENT_TYPE_MODIFIED
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+    EVENT_TYPE_MODIFIED = "modified"
+    print("ERROR: No watchdog on the system, changes made outside the servers will not be committed")
+
 SYSTEM_TEST_PREFIX = "rcptt_"
 GIT_REMOTE_LOCATION = 'http://control-svcs.isis.cclrc.ac.uk/gitroot/instconfigs/test.git'
 ERROR_PREFIX = "Unable to commit to version control"
-PUSH_BASE_INTERVAL = 300
 PUSH_RETRY_INTERVAL = 10
+COMMIT_DEBOUNCE_INTERVAL = 2
+COMMIT_MAX_DELAY = 30
 RETRY_INTERVAL = 0.1
 RETRY_MAX_ATTEMPTS = 100
 
@@ -58,6 +68,31 @@ def check_branch_allowed(func):
     return wrapper
 
 
+class ChangedFolderNotifier(FileSystemEventHandler):
+    """ Notifies version control of the folders in which files change, so that changes made outside the servers are
+    committed. Folders rather than files are notified so that git skips any ignored files in them. """
+    def __init__(self, version_control):
+        """
+        Args:
+            version_control (GitVersionControl): The version control to notify
+        """
+        self._version_control = version_control
+
+    def on_any_event(self, event):
+        """ Notifies the folders containing the paths changed by a file system event.
+
+        Args:
+            event (watchdog.events.FileSystemEvent): The event
+        """
+        if event.is_directory and event.event_type == EVENT_TYPE_MODIFIED:
+            return  # A file in the folder changed, which has its own event
+
+        paths = [event.src_path]
+        if hasattr(event, "dest_path"):
+            paths.append(event.dest_path)
+        self._version_control.notify_changed_folders(paths)
+
+
 class GitVersionControl:
     """Version Control class for dealing with git file operations"""
     def __init__(self, working_directory, repo, is_local=False):
@@ -70,6 +105,13 @@ class GitVersionControl:
             self.remote = self.repo.remotes.origin
 
         self._push_lock = RLock()
+        self._changes_lock = RLock()
+        self._changed = Event()
+        self._changed_paths = set()
+        self._first_change_time = None
+        self._last_change_time = None
+        self._push_pending = True
+        self._observer = None
 
     @staticmethod
     def branch_allowed(branch_name):
@@ -105,11 +147,58 @@ class GitVersionControl:
         # Set git repository to ignore file permissions otherwise will reset to read only
         config_writer.set_value("core", "filemode", False)
 
+        # Commit anything changed while the server was not running, and watch for changes made outside it
+        self.notify_changed_folders(self._paths_changed_since_last_commit())
+        self._watch_working_tree()
+
         # Start a background thread for pushing
         push_thread = Thread(target=self._commit_and_push, args=())
         push_thread.daemon = True  # Daemonise thread
         push_thread.start()
 
+    def _watch_working_tree(self):
+        """ Starts watching the working tree for changes made outside the servers, if watchdog is available.
+        """
+        if Observer is None:
+            print_and_log("Not watching for changes made to configurations outside the servers, watchdog is not "
+                          "installed", "MINOR")
+            return
+        self._observer = Observer()
+        self._observer.schedule(ChangedFolderNotifier(self), self.repo.working_tree_dir, recursive=True)
+        self._observer.daemon = True
+        self._observer.start()
+
+    def _paths_changed_since_last_commit(self):
+        """ Finds the files changed since the last commit by looking at the file system rather than running git: those
+        modified or created after the commit and the tracked files which no longer exist.
+
+        Returns:
+            list: The paths of the changed files
+        """
+        root = self.repo.working_tree_dir
+        try:
+            last_commit_time = self.repo.head.commit.committed_date
+        except ValueError:
+            return [root]  # Nothing committed yet
+
+        git_dir = os.path.abspath(self.repo.git_dir)
+        changed = []
+        for folder, folders, files in os.walk(root):
+            folders[:] = [name for name in folders if os.path.abspath(os.path.join(folder, name)) != git_dir]
+            for name in files:
+                path = os.path.join(folder, name)
+                try:
+                    if max(os.path.getmtime(path), os.path.getctime(path)) >= last_commit_time:
+                        changed.append(path)
+                except OSError:
+                    changed.append(path)  # Removed while walking
+
+        for relative_path, stage in self.repo.index.entries:
+            path = os.path.join(root, relative_path)
+            if not os.path.exists(path):
+                changed.append(path)
+        return changed
+
     @retry(RETRY_MAX_ATTEMPTS, RETRY_INTERVAL, OSError)
     def _unlock(self):
         """ Removes index.lock if it exists, and it's not being used
@@ -133,21 +222,98 @@ class GitVersionControl:
         self.repo.index.commit(commit_comment)
         print_and_log("GIT: Committed {changed} changes".format(changed=num_files_changed))
 
+        self._push_pending = True
+
+    def notify_changed(self, paths):
+        """ Records that files or folders have been changed, added or removed, so that they are committed and pushed.
+
+        Changes are committed together once none have been notified for COMMIT_DEBOUNCE_INTERVAL seconds, or once
+        the first has waited COMMIT_MAX_DELAY seconds. Only the notified paths are added, paths outside the repository
+        are ignored.
+
+        Args:
+            paths (list): The paths of the changed files or folders
+        """
+        self._record_changes(paths)
+        self._changed.set()
+
+    def notify_changed_folders(self, paths):
+        """ Records that files or folders have been changed, added or removed outside the servers. The folders
+        containing them are committed, so that files ignored by git are skipped rather than failing the commit.
+
+        Args:
+            paths (list): The paths of the changed files or folders
+        """
+        git_dir = os.path.abspath(self.repo.git_dir)
+        folders = set()
+        for path in paths:
+            path = os.path.abspath(path)
+            if path != git_dir and not path.startswith(git_dir + os.sep):
+                folders.add(os.path.dirname(path))
+        if len(folders) > 0:
+            self.notify_changed(folders)
+
+    def _record_changes(self, paths):
+        """ Adds paths to those waiting to be committed.
+
+        Args:
+            paths (iterable): The paths of the changed files or folders
+        """
+        with self._changes_lock:
+            now = time()
+            if len(self._changed_paths) == 0:
+                self._first_change_time = now
+            self._last_change_time = now
+            self._changed_paths.update(paths)
+
+    def _wait_for_changes_to_settle(self):
+        """ Waits until changes stop being notified, or the first change has waited for COMMIT_MAX_DELAY seconds. """
+        while True:
+            with self._changes_lock:
+                if len(self._changed_paths) == 0:
+                    return
+                wait = min(self._last_change_time + COMMIT_DEBOUNCE_INTERVAL,
+                           self._first_change_time + COMMIT_MAX_DELAY) - time()
+            if wait <= 0:
+                return
+            sleep(wait)
+
+    def _commit_changes(self):
+        """ Adds and commits the paths notified as changed. If this fails the paths are kept to be retried with the
+        next commit, or after PUSH_RETRY_INTERVAL. """
+        with self._changes_lock:
+            paths = self._changed_paths
+            self._changed_paths = set()
+            self._changed.clear()
+        if len(paths) == 0:
+            return
+
+        try:
+            self._add_files(paths)
+            self._commit()
+        except Exception:
+            self._record_changes(paths)
+            raise
+
     def _commit_and_push(self):
-        """ Frequently adds, commits and pushes all file currently in the repository. """
-        push_interval = PUSH_BASE_INTERVAL
+        """ Adds, commits and pushes files as they are notified as changed. """
+        push_interval = None
         first_failure = True
 
         while True:
+            self._changed.wait(push_interval)
+            self._wait_for_changes_to_settle()
             with self._push_lock:
                 try:
-                    self._add_all_files()
-                    self._commit()
-                    self.remote.push()
-                    push_interval = PUSH_BASE_INTERVAL
+                    self._commit_changes()
+                    if self._push_pending:
+                        self.remote.push()
+                        self._push_pending = False
+                    push_interval = None
                     first_failure = True
 
                 except MaxAttemptsExceededException:
+                    push_interval = PUSH_RETRY_INTERVAL
                     print_and_log("{}, maximum tries exceeded.".format(ERROR_PREFIX))
 
                 except GitCommandError as e:
@@ -159,11 +325,34 @@ class GitVersionControl:
                 except NotUnderAllowedBranchException as e:
                     print_and_log("{}, {}".format(ERROR_PREFIX, e.message))
 
-            sleep(push_interval)
-
     @check_branch_allowed
-    def _add_all_files(self):
+    def _add_files(self, paths):
+        """
+        Does a 'git add -A' limited to the given paths, so that changes, additions and removals under them are staged.
+
+        Args:
+            paths (iterable): The paths of the changed files or folders
+        """
+        relative_paths = self._paths_in_repo(paths)
+        if len(relative_paths) > 0:
+            self.repo.git.add("--all", "--", *relative_paths)
+
+    def _paths_in_repo(self, paths):
         """
-        Does a 'git add -A' which adds all files in the repository.
+        Args:
+            paths (iterable): Paths of files or folders
+
+        Returns:
+            list: The paths relative to the repository root, excluding those outside the repository or which neither
+                exist nor are tracked, as git refuses to add those
         """
-        self.repo.git.add(A=True)
+        root = os.path.abspath(self.repo.working_tree_dir)
+        relative_paths = set()
+        for path in paths:
+            path = os.path.abspath(path)
+            relative_path = os.path.relpath(path, root)
+            if relative_path == os.pardir or relative_path.startswith(os.pardir + os.sep):
+                continue
+            if os.path.exists(path) or self.repo.git.ls_files("--", relative_path):
+                relative_paths.add(relative_path)
+        return sorted(relative_paths)
@@ -14,9 +14,14 @@
 # https://www.eclipse.org/org/documents/epl-v10.php or
 # http://opensource.org/licenses/eclipse-1.0.php
 
+import os
+import shutil
+import tempfile
 import unittest
+from time import time
 from mock import Mock
-from ConfigVersionControl.git_version_control import GitVersionControl, SYSTEM_TEST_PREFIX
+from ConfigVersionControl.git_version_control import GitVersionControl, ChangedFolderNotifier, SYSTEM_TEST_PREFIX
+from server_common.common_exceptions import MaxAttemptsExceededException
 import socket
 
 
@@ -33,3 +38,144 @@ class TestVersionControl(unittest.TestCase):
 
     def test_WHEN_branch_begins_contains_nd_THEN_branch_allowed(self):
         self.assertTrue(GitVersionControl.branch_allowed("testNDtest"))
+
+
+class TestVersionControlCommits(unittest.TestCase):
+
+    def setUp(self):
+        self.working_directory = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.working_directory, "configurations", "test"))
+        self.repo = Mock()
+        self.repo.working_tree_dir = self.working_directory
+        self.repo.git_dir = os.path.join(self.working_directory, ".git")
+        self.repo.index.entries = {}
+        self.repo.active_branch = "test_branch"
+        self.repo.git.ls_files.return_value = ""
+        self.repo.index.diff.return_value = []
+        self.vc = GitVersionControl(self.working_directory, self.repo, is_local=True)
+
+    def tearDown(self):
+        shutil.rmtree(self.working_directory)
+
+    def test_WHEN_nothing_changed_THEN_no_git_commands_run(self):
+        self.vc._commit_changes()
+
+        self.repo.git.add.assert_not_called()
+        self.repo.index.diff.assert_not_called()
+
+    def test_WHEN_file_changed_THEN_only_that_file_added(self):
+        self.vc.notify_changed([os.path.join(self.working_directory, "configurations", "test")])
+
+        self.vc._commit_changes()
+
+        self.repo.git.add.assert_called_once_with("--all", "--", os.path.join("configurations", "test"))
+
+    def test_WHEN_changes_committed_THEN_not_committed_again(self):
+        self.vc.notify_changed([os.path.join(self.working_directory, "configurations", "test")])
+        self.vc._commit_changes()
+
+        self.vc._commit_changes()
+
+        self.assertEqual(1, self.repo.git.add.call_count)
+
+    def test_WHEN_path_outside_repository_changed_THEN_not_added(self):
+        self.vc.notify_changed([os.path.dirname(self.working_directory)])
+
+        self.vc._commit_changes()
+
+        self.repo.git.add.assert_not_called()
+
+    def test_WHEN_untracked_path_removed_THEN_not_added(self):
+        self.vc.notify_changed([os.path.join(self.working_directory, "configurations", "removed")])
+
+        self.vc._commit_changes()
+
+        self.repo.git.add.assert_not_called()
+
+    def test_WHEN_tracked_path_removed_THEN_removal_added(self):
+        self.repo.git.ls_files.return_value = "configurations/removed/blocks.xml"
+        self.vc.notify_changed([os.path.join(self.working_directory, "configurations", "removed")])
+
+        self.vc._commit_changes()
+
+        self.repo.git.add.assert_called_once_with("--all", "--", os.path.join("configurations", "removed"))
+
+    def test_GIVEN_commit_fails_WHEN_retried_THEN_changes_added_again(self):
+        self.vc.notify_changed([os.path.join(self.working_directory, "configurations", "test")])
+        self.repo.git.add.side_effect = MaxAttemptsExceededException()
+        self.assertRaises(MaxAttemptsExceededException, self.vc._commit_changes)
+        self.repo.git.add.side_effect = None
+
+        self.vc._commit_changes()
+
+        self.assertEqual(2, self.repo.git.add.call_count)
+
+    def test_WHEN_file_changed_outside_servers_THEN_its_folder_added(self):
+        event = Mock(spec=["src_path", "is_directory", "event_type"], is_directory=False, event_type="modified",
+                     src_path=os.path.join(self.working_directory, "configurations", "test", "blocks.xml"))
+
+        ChangedFolderNotifier(self.vc).on_any_event(event)
+        self.vc._commit_changes()
+
+        self.repo.git.add.assert_called_once_with("--all", "--", os.path.join("configurations", "test"))
+
+    def test_WHEN_folder_moved_outside_servers_THEN_both_parent_folders_added(self):
+        os.makedirs(os.path.join(self.working_directory, "components"))
+        event = Mock(spec=["src_path", "dest_path", "is_directory", "event_type"], is_directory=True,
+                     event_type="moved", src_path=os.path.join(self.working_directory, "configurations", "old"),
+                     dest_path=os.path.join(self.working_directory, "components", "new"))
+
+        ChangedFolderNotifier(self.vc).on_any_event(event)
+        self.vc._commit_changes()
+
+        self.repo.git.add.assert_called_once_with("--all", "--", "components", "configurations")
+
+    def test_WHEN_folder_modified_outside_servers_THEN_nothing_added(self):
+        event = Mock(spec=["src_path", "is_directory", "event_type"], is_directory=True, event_type="modified",
+                     src_path=os.path.join(self.working_directory, "configurations", "test"))
+
+        ChangedFolderNotifier(self.vc).on_any_event(event)
+        self.vc._commit_changes()
+
+        self.repo.git.add.assert_not_called()
+
+    def test_WHEN_git_folder_changed_THEN_nothing_added(self):
+        self.vc.notify_changed_folders([os.path.join(self.working_directory, ".git", "index")])
+
+        self.vc._commit_changes()
+
+        self.repo.git.add.assert_not_called()
+
+    def test_GIVEN_nothing_changed_since_last_commit_WHEN_starting_THEN_no_changes_found(self):
+        self._write_file(os.path.join("configurations", "test", "blocks.xml"))
+        self.repo.head.commit.committed_date = time() + 10
+        self.repo.index.entries = {(os.path.join("configurations", "test", "blocks.xml"), 0): Mock()}
+
+        self.assertEqual([], self.vc._paths_changed_since_last_commit())
+
+    def test_GIVEN_file_written_since_last_commit_WHEN_starting_THEN_file_found(self):
+        self.repo.head.commit.committed_date = time() - 10
+        path = self._write_file(os.path.join("configurations", "test", "blocks.xml"))
+
+        self.assertEqual([path], self.vc._paths_changed_since_last_commit())
+
+    def test_GIVEN_tracked_file_removed_since_last_commit_WHEN_starting_THEN_file_found(self):
+        self.repo.head.commit.committed_date = time() + 10
+        self.repo.index.entries = {(os.path.join("configurations", "removed", "blocks.xml"), 0): Mock()}
+
+        self.assertEqual([os.path.join(self.working_directory, "configurations", "removed", "blocks.xml")],
+                         self.vc._paths_changed_since_last_commit())
+
+    def test_GIVEN_git_folder_written_since_last_commit_WHEN_starting_THEN_nothing_found(self):
+        self.repo.head.commit.committed_date = time() - 10
+        self._write_file(os.path.join(".git", "index"))
+
+        self.assertEqual([], self.vc._paths_changed_since_last_commit())
+
+    def _write_file(self, relative_path):
+        path = os.path.join(self.working_directory, relative_path)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, "w") as f:
+            f.write("data")
+        return path
@@ -19,9 +19,7 @@ from __future__ import print_function, absolute_import, division, unicode_litera
 import os
 import traceback
 
-import six
 import sys
-import json
 import argparse
 import codecs
 
@@ -37,14 +35,16 @@ from DatabaseServer.procserv_utils import ProcServWrapper
 from DatabaseServer.options_holder import OptionsHolder
 from DatabaseServer.options_loader import OptionsLoader
 
-from server_common.mysql_abstraction_layer import SQLAbstraction
+from server_common.mysql_abstraction_layer import SQLAbstraction, SLOW_QUERY_THRESHOLD
 from server_common.utilities import compress_and_hex, print_and_log, set_logger, convert_to_json, \
-    dehex_and_decompress, char_waveform
+    dehex_and_decompress, char_waveform, json_compress_and_hex, json_compress_and_base64, compact_waveform_length, \
+    set_compression_level
+from server_common.channel_access import ChannelAccess
 from server_common.channel_access_server import CAServer
 from server_common.constants import IOCS_NOT_TO_STOP
 from server_common.ioc_data import IOCData
 from server_common.ioc_data_source import IocDataSource
-from server_common.pv_names import DatabasePVNames as DbPVNames
+from server_common.pv_names import DatabasePVNames as DbPVNames, compact_pv_name
 from server_common.loggers.isis_logger import IsisLogger
 
 
@@ -66,7 +66,7 @@ class DatabaseServer(Driver):
     The class for handling all the static PV access and monitors etc.
     """
     def __init__(self, ca_server: CAServer, ioc_data: IOCData, exp_data: ExpData, options_folder: str,
-                 blockserver_prefix: str, test_mode: bool = False):
+                 blockserver_prefix: str, test_mode: bool = False, compact_pvs: bool = False):
         """
         Constructor.
 
@@ -77,6 +77,7 @@ class DatabaseServer(Driver):
             options_folder: The location of the folder containing the config.xml file that holds IOC options
             blockserver_prefix: The PV prefix to use
             test_mode: Enables starting the server in a mode suitable for unit tests
+            compact_pvs: Whether to also serve each PV compressed and base64 encoded, see generate_pv_info
         """
         if not test_mode:
             super(DatabaseServer, self).__init__()
@@ -84,6 +85,7 @@ class DatabaseServer(Driver):
         self._blockserver_prefix = blockserver_prefix
         self._ca_server = ca_server
         self._options_holder = OptionsHolder(options_folder, OptionsLoader())
+        self._compact_pvs = compact_pvs
         self._pv_info = self._generate_pv_acquisition_info()
         self._iocs = ioc_data
         self._ed = exp_data
@@ -102,7 +104,7 @@ class DatabaseServer(Driver):
         Returns:
             Dictionary containing the information to get the information for the PVs
         """
-        enhanced_info = DatabaseServer.generate_pv_info()
+        enhanced_info = DatabaseServer.generate_pv_info(self._compact_pvs)
 
         def add_get_method(pv, get_function):
             enhanced_info[pv]['get'] = get_function
@@ -118,14 +120,25 @@ class DatabaseServer(Driver):
         add_get_method(DbPVNames.BEAMLINE_PARS, self._get_beamline_par_names)
         add_get_method(DbPVNames.USER_PARS, self._get_user_par_names)
         add_get_method(DbPVNames.IOCS_NOT_TO_STOP, DatabaseServer._get_iocs_not_to_stop)
+        add_get_method(DbPVNames.QUERY_STATISTICS, self._get_query_statistics)
+        add_get_method(DbPVNames.PUT_STATISTICS, DatabaseServer._get_put_statistics)
+
+        if self._compact_pvs:
+            for pv in [pv for pv in enhanced_info if 'get' in enhanced_info[pv]]:
+                add_get_method(compact_pv_name(pv), enhanced_info[pv]['get'])
+                enhanced_info[compact_pv_name(pv)]['compact'] = True
         return enhanced_info
 
     @staticmethod
-    def generate_pv_info() -> dict:
+    def generate_pv_info(compact_pvs: bool = False) -> dict:
         """
         Generates information needed to construct PVs. Must be consumed by Server before
         DatabaseServer is initialized so must be static
 
+        Args:
+            compact_pvs: Whether to add, alongside each compressed and hexed PV, a PV holding the same data
+                compressed and base64 encoded, which is a third smaller
+
         Returns:
             Dictionary containing the information to construct PVs
         """
@@ -137,9 +150,14 @@ class DatabaseServer(Driver):
                    DbPVNames.FACILITY, DbPVNames.ACTIVE_PVS, DbPVNames.ALL_PVS, DbPVNames.IOCS_NOT_TO_STOP]:
             pv_info[pv] = char_waveform(pv_size_128k)
 
-        for pv in [DbPVNames.SAMPLE_PARS, DbPVNames.BEAMLINE_PARS, DbPVNames.USER_PARS]:
+        for pv in [DbPVNames.SAMPLE_PARS, DbPVNames.BEAMLINE_PARS, DbPVNames.USER_PARS, DbPVNames.QUERY_STATISTICS,
+                   DbPVNames.PUT_STATISTICS]:
             pv_info[pv] = char_waveform(pv_size_10k)
 
+        if compact_pvs:
+            for pv, info in list(pv_info.items()):
+                pv_info[compact_pv_name(pv)] = char_waveform(compact_waveform_length(info['count']))
+
         return pv_info
 
     def get_data_for_pv(self, pv: str) -> bytes:
@@ -150,10 +168,22 @@ class DatabaseServer(Driver):
             The name of the PV to get the data for.
 
         Return:
-            The data, compressed and hexed.
+            The data, compressed and hexed, or compressed and base64 encoded for the compact PVs.
         """
-        data = self._pv_info[pv]['get']()
-        data = compress_and_hex(six.text_type(json.dumps(data)))
+        return self._encode_pv_data(pv, self._pv_info[pv]['get']())
+
+    def _encode_pv_data(self, pv: str, data) -> bytes:
+        """
+        Encode data for the given pv name.
+
+        Args:
+            pv: The name of the PV the data is for.
+            data: The data to encode.
+
+        Return:
+            The data, compressed and hexed, or compressed and base64 encoded for the compact PVs.
+        """
+        data = json_compress_and_base64(data) if self._pv_info[pv].get('compact') else json_compress_and_hex(data)
         self._check_pv_capacity(pv, len(data), self._blockserver_prefix)
         return data
 
@@ -198,18 +228,28 @@ class DatabaseServer(Driver):
         """
         while True:
             if self._iocs is not None:
-                self._iocs.update_iocs_status()
-                for pv in [DbPVNames.IOCS, DbPVNames.HIGH_INTEREST, DbPVNames.MEDIUM_INTEREST, DbPVNames.FACILITY,
-                           DbPVNames.ACTIVE_PVS, DbPVNames.ALL_PVS]:
-                    encoded_data = self.get_data_for_pv(pv)
-                    # No need to update monitors if data hasn't changed
-                    if not self.getParam(pv) == encoded_data:
-                        self.setParam(pv, encoded_data)
-                # Update them
-                with self.monitor_lock:
-                    self.updatePVs()
+                self._update_ioc_pvs()
             sleep(1)
 
+    def _update_ioc_pvs(self) -> None:
+        """
+        Updates the PVs that hold information on the IOCS and their associated PVs once, getting the data for each
+        only once even when it is also served on a compact PV.
+        """
+        self._iocs.update_iocs_status()
+        for pv in [DbPVNames.IOCS, DbPVNames.HIGH_INTEREST, DbPVNames.MEDIUM_INTEREST, DbPVNames.FACILITY,
+                   DbPVNames.ACTIVE_PVS, DbPVNames.ALL_PVS, DbPVNames.QUERY_STATISTICS, DbPVNames.PUT_STATISTICS]:
+            data = self._pv_info[pv]['get']()
+            pvs = [pv, compact_pv_name(pv)] if self._compact_pvs else [pv]
+            for encoded_pv in pvs:
+                encoded_data = self._encode_pv_data(encoded_pv, data)
+                # No need to update monitors if data hasn't changed
+                if not self.getParam(encoded_pv) == encoded_data:
+                    self.setParam(encoded_pv, encoded_data)
+        # Update them
+        with self.monitor_lock:
+            self.updatePVs()
+
     def _check_pv_capacity(self, pv: str, size: int, prefix: str) -> None:
         """
         Check the capacity of a PV and write to the log if it is too small.
@@ -300,6 +340,28 @@ class DatabaseServer(Driver):
         """
         return self._get_pvs(self._iocs.get_user_pars, True)
 
+    def _get_query_statistics(self) -> dict:
+        """
+        Gets the statistics recorded for the queries made to the IOC database.
+
+        Returns:
+            A dictionary of query name to its statistics, empty if the database does not exist
+        """
+        if self._iocs is not None:
+            return self._iocs.get_query_statistics()
+        else:
+            return {}
+
+    @staticmethod
+    def _get_put_statistics() -> dict:
+        """
+        Gets the statistics recorded for the caputs this server has made without waiting.
+
+        Returns:
+            A dictionary of the counts and latencies of the puts
+        """
+        return ChannelAccess.put_statistics()
+
     @staticmethod
     def _get_iocs_not_to_stop() -> list:
         """
@@ -321,7 +383,19 @@ if __name__ == '__main__':
     parser.add_argument('-od', '--options_dir', nargs=1, type=str, default=['.'],
                         help='The directory from which to load the configuration options(default=current directory)')
 
+    parser.add_argument('-sq', '--slow_query_threshold', nargs=1, type=float, default=[SLOW_QUERY_THRESHOLD],
+                        help='The time in seconds after which a database query is logged as slow(default=%s)'
+                             % SLOW_QUERY_THRESHOLD)
+
+    parser.add_argument('-cp', '--compact_pvs', action='store_true',
+                        help='Also serve each PV compressed and base64 encoded, under the PV name with the suffix :B64')
+
+    parser.add_argument('-cl', '--compression_level', nargs=1, type=int, default=[-1],
+                        help='The zlib compression level for the PVs, from 1 (fastest) to 9 (smallest) '
+                             '(default=-1, the zlib default)')
+
     args = parser.parse_args()
+    set_compression_level(args.compression_level[0])
 
     BLOCKSERVER_PREFIX = args.blockserver_prefix[0]
     if not BLOCKSERVER_PREFIX.endswith(':'):
@@ -336,13 +410,14 @@ if __name__ == '__main__':
         os.makedirs(os.path.abspath(OPTIONS_DIR))
 
     SERVER = CAServer(BLOCKSERVER_PREFIX)
-    SERVER.createPV(BLOCKSERVER_PREFIX, DatabaseServer.generate_pv_info())
+    SERVER.createPV(BLOCKSERVER_PREFIX, DatabaseServer.generate_pv_info(args.compact_pvs))
     SERVER.createPV(MACROS["$(MYPVPREFIX)"], ExpData.EDPV)
 
     # Initialise IOC database connection
     try:
-        ioc_data = IOCData(IocDataSource(SQLAbstraction("iocdb", "iocdb", "$iocdb")), ProcServWrapper(),
-                           MACROS["$(MYPVPREFIX)"])
+        ioc_data = IOCData(IocDataSource(SQLAbstraction("iocdb", "iocdb", "$iocdb",
+                                                        slow_query_threshold=args.slow_query_threshold[0])),
+                           ProcServWrapper(), MACROS["$(MYPVPREFIX)"])
         print_and_log("Connected to IOCData database", INFO_MSG, LOG_TARGET)
     except Exception as e:
         ioc_data = None
@@ -358,7 +433,8 @@ if __name__ == '__main__':
         print_and_log("Problem connecting to experimental details database: {}".format(traceback.format_exc()),
                       MAJOR_MSG, LOG_TARGET)
 
-    DRIVER = DatabaseServer(SERVER, ioc_data, exp_data, OPTIONS_DIR, BLOCKSERVER_PREFIX)
+    DRIVER = DatabaseServer(SERVER, ioc_data, exp_data, OPTIONS_DIR, BLOCKSERVER_PREFIX,
+                            compact_pvs=args.compact_pvs)
 
     # Process CA transactions
     while True:
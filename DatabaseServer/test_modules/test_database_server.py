@@ -22,17 +22,19 @@ os.environ['MYPVPREFIX'] = ""
 os.environ['EPICS_KIT_ROOT'] = ""
 os.environ['ICPCONFIGROOT'] = ""
 import unittest
+from mock import MagicMock, patch
+from threading import RLock
 
 from DatabaseServer.database_server import DatabaseServer
 from server_common.mocks.mock_ca_server import MockCAServer
 from server_common.mocks.mock_ioc_data_source import MockIocDataSource, IOCS
 from server_common.test_modules.test_ioc_data import HIGH_PV_NAMES, MEDIUM_PV_NAMES, LOW_PV_NAMES, FACILITY_PV_NAMES
-from server_common.utilities import dehex_and_decompress, set_logger
+from server_common.utilities import dehex_and_decompress, base64_and_decompress, set_logger
 from DatabaseServer.mocks.mock_procserv_utils import MockProcServWrapper
 from server_common.ioc_data import IOCData
 from DatabaseServer.mocks.mock_exp_data import MockExpData
 from server_common.constants import IS_LINUX
-from server_common.pv_names import DatabasePVNames
+from server_common.pv_names import DatabasePVNames, compact_pv_name
 from server_common.loggers.logger import Logger
 
 # Use a dummy logger during tests as real logger requires log server
@@ -87,3 +89,47 @@ class TestDatabaseServer(unittest.TestCase):
         for name in IOCS:
             self.assertTrue(name in pv_data, msg="{name} in {pv_names}".format(name=name, pv_names=pv_data))
 
+
+    def test_GIVEN_compact_pvs_WHEN_compact_pv_read_THEN_same_data_as_hexed_pv(self):
+        test_files_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "test_files")
+        db_server = DatabaseServer(self.ms, self.ioc_data, self.exp_data, test_files_dir, "block_prefix", True,
+                                   compact_pvs=True)
+
+        hexed = dehex_and_decompress(db_server.read(DatabasePVNames.IOCS_NOT_TO_STOP))
+        compact = base64_and_decompress(db_server.read(compact_pv_name(DatabasePVNames.IOCS_NOT_TO_STOP)))
+
+        self.assertEqual(hexed, compact)
+
+    def test_GIVEN_compact_pvs_WHEN_ioc_pvs_updated_THEN_data_got_once_for_both_pvs(self):
+        test_files_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "test_files")
+        db_server = DatabaseServer(self.ms, self.ioc_data, self.exp_data, test_files_dir, "block_prefix", True,
+                                   compact_pvs=True)
+        get_all_pvs = MagicMock(return_value=[["PV", "ai", "description", "IOC"]])
+        db_server._pv_info[DatabasePVNames.ALL_PVS]['get'] = get_all_pvs
+        db_server._pv_info[compact_pv_name(DatabasePVNames.ALL_PVS)]['get'] = get_all_pvs
+
+        db_server.monitor_lock = RLock()
+        params = {}
+        with patch.object(db_server, "getParam", side_effect=params.get), \
+                patch.object(db_server, "setParam", side_effect=params.__setitem__), \
+                patch.object(db_server, "updatePVs"):
+            db_server._update_ioc_pvs()
+
+        get_all_pvs.assert_called_once_with()
+        self.assertEqual(dehex_and_decompress(params[DatabasePVNames.ALL_PVS]),
+                         base64_and_decompress(params[compact_pv_name(DatabasePVNames.ALL_PVS)]))
+
+    def test_GIVEN_caputs_made_WHEN_reading_put_statistics_THEN_channel_access_put_statistics_returned(self):
+        statistics = {"queue_depth": 0, "outstanding": 1, "completed": 2, "rejected": 0, "rejected_by_pv": {},
+                      "mean_latency": 0.1, "max_latency": 0.2}
+
+        with patch("DatabaseServer.database_server.ChannelAccess.put_statistics", return_value=statistics):
+            data = json.loads(dehex_and_decompress(self.db_server.get_data_for_pv(DatabasePVNames.PUT_STATISTICS)))
+
+        self.assertEqual(data, statistics)
+
+    def test_GIVEN_compact_pvs_WHEN_pv_info_generated_THEN_compact_pvs_smaller_than_hexed_pvs(self):
+        pv_info = DatabaseServer.generate_pv_info(compact_pvs=True)
+
+        for pv in DatabaseServer.generate_pv_info():
+            self.assertLess(pv_info[compact_pv_name(pv)]['count'], pv_info[pv]['count'])
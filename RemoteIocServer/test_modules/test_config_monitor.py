@@ -100,9 +100,10 @@ class TestConfigMonitor(unittest.TestCase):
     @patch("RemoteIocServer.config_monitor.print_and_log")
     @patch("__builtin__.open")
     @patch("BlockServer.fileIO.file_manager.os")
+    @patch("BlockServer.fileIO.file_manager.ConfigurationFileManager._attempt_write")
     @patch("RemoteIocServer.config_monitor._EpicsMonitor")
     def test_GIVEN_config_dir_not_existent_WHEN_write_config_as_xml_THEN_config_dir_created(
-            self, epicsmonitor, os_mock, open_mock, print_and_log):
+            self, epicsmonitor, write_mock, os_mock, open_mock, print_and_log):
         FILEPATH_MANAGER.initialise("test_dir", "", "")
         monitor = ConfigurationMonitor(LOCAL_TEST_PREFIX, lambda *a, **k: None)
 
@@ -115,9 +116,10 @@ class TestConfigMonitor(unittest.TestCase):
     @patch("RemoteIocServer.config_monitor.print_and_log")
     @patch("__builtin__.open")
     @patch("BlockServer.fileIO.file_manager.os")
+    @patch("BlockServer.fileIO.file_manager.ConfigurationFileManager._attempt_write")
     @patch("RemoteIocServer.config_monitor._EpicsMonitor")
     def test_GIVEN_config_dir_exists_WHEN_write_config_as_xml_THEN_config_dir_not_recreated(
-            self, epicsmonitor, os_mock, open_mock, print_and_log):
+            self, epicsmonitor, write_mock, os_mock, open_mock, print_and_log):
 
         monitor = ConfigurationMonitor(LOCAL_TEST_PREFIX, lambda *a, **k: None)
 
@@ -129,24 +131,26 @@ class TestConfigMonitor(unittest.TestCase):
 
     @patch("RemoteIocServer.config_monitor.print_and_log")
     @patch("__builtin__.open")
+    @patch("BlockServer.fileIO.file_manager.ConfigurationFileManager._attempt_write")
     @patch("RemoteIocServer.config_monitor._EpicsMonitor")
     def test_GIVEN_write_ioc_xml_called_WHEN_no_iocs_from_blockserver_THEN_appropriate_empty_xml_created(
-            self, epicsmonitor, mock_open, print_and_log):
+            self, epicsmonitor, write_mock, mock_open, print_and_log):
 
         monitor = ConfigurationMonitor(LOCAL_TEST_PREFIX, lambda *a, **k: None)
         FILEPATH_MANAGER.initialise("test_dir", "", "")
         with patch.object(FILEPATH_MANAGER, 'get_config_path', return_value="test_dir"):
             monitor.write_new_config_as_xml("{}")
 
-        mock_open.assert_any_call(os.path.join("test_dir", "iocs.xml"), "w")
-        mock_open.return_value.__enter__.return_value.write.assert_any_call(
+        write_mock.assert_any_call(
+            os.path.join("test_dir", "iocs.xml"),
             """<?xml version="1.0" ?>\n<iocs xmlns="http://epics.isis.rl.ac.uk/schema/iocs/1.0" xmlns:ioc="http://epics.isis.rl.ac.uk/schema/iocs/1.0" xmlns:xi="http://www.w3.org/2001/XInclude"/>\n""")
 
     @patch("RemoteIocServer.config_monitor.print_and_log")
     @patch("__builtin__.open")
+    @patch("BlockServer.fileIO.file_manager.ConfigurationFileManager._attempt_write")
     @patch("RemoteIocServer.config_monitor._EpicsMonitor")
     def test_GIVEN_write_ioc_xml_called_WHEN_iocs_from_blockserver_THEN_appropriate_xml_created(
-            self, epicsmonitor, mock_open, print_and_log):
+            self, epicsmonitor, write_mock, mock_open, print_and_log):
 
         FILEPATH_MANAGER.initialise("test_dir", "", "")
         with patch.object(FILEPATH_MANAGER, 'get_config_path', return_value="test_dir"):
@@ -159,8 +163,8 @@ class TestConfigMonitor(unittest.TestCase):
                      "remotePvPrefix": LOCAL_TEST_PREFIX, "restart": True, "simlevel": "none"},
                 ]}))
 
-        mock_open.assert_any_call(os.path.join("test_dir", "iocs.xml"), "w")
-        mock_open.return_value.__enter__.return_value.write.assert_any_call(
+        write_mock.assert_any_call(
+            os.path.join("test_dir", "iocs.xml"),
             '<?xml version="1.0" ?>\n'
             '<iocs xmlns="http://epics.isis.rl.ac.uk/schema/iocs/1.0" xmlns:ioc="http://epics.isis.rl.ac.uk/schema/iocs/1.0" xmlns:xi="http://www.w3.org/2001/XInclude">\n'
             '\t<ioc autostart="true" name="INSTETC_01" remotePvPrefix="{pf}" restart="true" simlevel="none">\n'
@@ -181,9 +185,10 @@ class TestConfigMonitor(unittest.TestCase):
 
     @patch("RemoteIocServer.config_monitor._EpicsMonitor")
     @patch("__builtin__.open")
+    @patch("BlockServer.fileIO.file_manager.ConfigurationFileManager._attempt_write")
     @patch("RemoteIocServer.config_monitor.print_and_log")
     def test_GIVEN_write_standard_config_files_called_THEN_standard_config_files_written(
-            self, epicsmonitor, mock_open, print_and_log):
+            self, epicsmonitor, write_mock, mock_open, print_and_log):
 
         FILEPATH_MANAGER.initialise("test_dir", "", "")
         with patch.object(FILEPATH_MANAGER, 'get_config_path', return_value="test_dir"),\
@@ -191,24 +196,17 @@ class TestConfigMonitor(unittest.TestCase):
             monitor = ConfigurationMonitor(LOCAL_TEST_PREFIX, lambda *a, **k: None)
             monitor.write_new_config_as_xml("{}")
 
-            all_writes = [args[0][0] for args in mock_open.return_value.__enter__.return_value.write.call_args_list]
-            mock_open.assert_any_call(os.path.join("test_dir", "groups.xml"), "w")
-            assert_that(all_writes, has_item(EMPTY_GROUPS_XML))
-
-            mock_open.assert_any_call(os.path.join("test_dir", "components.xml"), "w")
-            assert_that(all_writes, has_item(EMPTY_COMPONENTS_XML))
-
-            mock_open.assert_any_call(os.path.join("test_dir", "blocks.xml"), "w")
-            assert_that(all_writes, has_item(EMPTY_BLOCKS_XML))
-
-            mock_open.assert_any_call(os.path.join("test_dir", "meta.xml"), "w")
-            assert_that(all_writes, has_item(META_XML))
+            write_mock.assert_any_call(os.path.join("test_dir", "groups.xml"), EMPTY_GROUPS_XML)
+            write_mock.assert_any_call(os.path.join("test_dir", "components.xml"), EMPTY_COMPONENTS_XML)
+            write_mock.assert_any_call(os.path.join("test_dir", "blocks.xml"), EMPTY_BLOCKS_XML)
+            write_mock.assert_any_call(os.path.join("test_dir", "meta.xml"), META_XML)
 
     @patch("RemoteIocServer.config_monitor.print_and_log")
     @patch("__builtin__.open")
+    @patch("BlockServer.fileIO.file_manager.ConfigurationFileManager._attempt_write")
     @patch("RemoteIocServer.config_monitor._EpicsMonitor")
     def test_GIVEN_update_last_config_called_THEN_standard_config_files_written(
-            self, epicsmonitor, mock_open, print_and_log):
+            self, epicsmonitor, write_mock, mock_open, print_and_log):
 
         monitor = ConfigurationMonitor(LOCAL_TEST_PREFIX, lambda *a, **k: None)
         FILEPATH_MANAGER.initialise("test_dir", "", "")
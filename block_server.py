@@ -36,9 +36,10 @@ from BlockServer.core.active_config_holder import ActiveConfigHolder
 from BlockServer.core.inactive_config_holder import InactiveConfigHolder
 from server_common.channel_access_server import CAServer
 from server_common.utilities import compress_and_hex, dehex_and_decompress, print_and_log, set_logger, \
-    convert_to_json, convert_from_json, char_waveform
+    convert_to_json, convert_from_json, char_waveform, compress_and_base64, compact_waveform_length, \
+    set_compression_level
 from BlockServer.core.macros import MACROS, CONTROL_SYSTEM_PREFIX, BLOCK_PREFIX
-from server_common.pv_names import BlockserverPVNames
+from server_common.pv_names import BlockserverPVNames, compact_pv_name
 from BlockServer.core.config_list_manager import ConfigListManager
 from BlockServer.synoptic.synoptic_manager import SynopticManager
 from BlockServer.devices.devices_manager import DevicesManager
@@ -59,6 +60,9 @@ from Queue import Queue
 
 CURR_CONFIG_NAME_SEVR_VALUE = 0
 
+# Whether to also publish the larger payloads compressed and base64 encoded, set from the command line
+COMPACT_PVS = False
+
 # This IOC gets special treatment as it needs to be reloaded on every single config change, regardless of whether
 # it's macros have changed or not. For details see https://github.com/ISISComputingGroup/IBEX/issues/5590
 CAEN_DISCRIMINATOR_IOC_NAME = "CAENV895_01"
@@ -168,7 +172,7 @@ class BlockServer(Driver):
         arch = ArchiverManager(ARCHIVE_UPLOADER, ARCHIVE_SETTINGS)
 
         self._active_configserver = ActiveConfigHolder(MACROS, arch, ConfigurationFileManager(),
-                                                       self._ioc_control)
+                                                       self._ioc_control, self.notify_files_changed)
 
         if facility == "ISIS":
             self._run_control = RunControlManager(self.instrument_prefix, MACROS["$(ICPCONFIGROOT)"],
@@ -178,7 +182,7 @@ class BlockServer(Driver):
 
         # Import all the synoptic data and create PVs
         print_and_log("Creating synoptic manager...")
-        self._syn = SynopticManager(self, SCHEMA_DIR, self._active_configserver)
+        self._syn = SynopticManager(self, SCHEMA_DIR, self._active_configserver, compact_pvs=COMPACT_PVS)
         self.on_the_fly_handlers.append(self._syn)
         print_and_log("Finished creating synoptic manager")
 
@@ -471,12 +475,13 @@ class BlockServer(Driver):
         try:
             if not as_comp:
                 print_and_log("Saving configuration ({})".format(config_name))
-                inactive.save_inactive()
+                files_written = inactive.save_inactive()
                 self._config_list.update_a_config_in_list(inactive)
             else:
                 print_and_log("Saving component ({})".format(config_name))
-                inactive.save_inactive(as_comp=True)
+                files_written = inactive.save_inactive(as_comp=True)
                 self._config_list.update_a_config_in_list(inactive, True)
+            self.notify_files_changed(files_written)
 
             print_and_log("Finished saving ({})".format(config_name))
 
@@ -531,6 +536,9 @@ class BlockServer(Driver):
         with self.monitor_lock:
             config_details_json = convert_to_json(self._active_configserver.get_config_details())
             self.setParam(BlockserverPVNames.GET_CURR_CONFIG_DETAILS, compress_and_hex(config_details_json))
+            if COMPACT_PVS:
+                self.setParam(compact_pv_name(BlockserverPVNames.GET_CURR_CONFIG_DETAILS),
+                              compress_and_base64(config_details_json))
             self.updatePVs()
 
     def update_curr_config_name_monitors(self):
@@ -594,30 +602,56 @@ class BlockServer(Driver):
                 self._ioc_control.waitfor_running(i)
                 self._ioc_control.set_autorestart(i, True)
 
+    def notify_files_changed(self, paths):
+        """Tells version control that configuration files have been changed, added or removed so they are committed.
+
+        Args:
+            paths (list): The paths of the changed files or folders
+        """
+        self._vc.notify_changed(paths)
+
     # Code for handling on-the-fly PVs
     def does_pv_exist(self, name):
         return name in manager.pvs[self.port]
 
     def delete_pv_from_db(self, name):
-        if name in manager.pvs[self.port]:
-            print_and_log("Removing PV %s" % name)
-            fullname = manager.pvs[self.port][name].name
-            del manager.pvs[self.port][name]
-            del manager.pvf[fullname]
-            del self.pvDB[name]
+        self.delete_pvs_from_db([name])
+
+    def delete_pvs_from_db(self, names):
+        """Removes a set of on-the-fly PVs in one step.
+
+        Args:
+            names (list): The names of the PVs to remove, those which do not exist are ignored
+        """
+        pvs = manager.pvs[self.port]
+        names = [name for name in names if name in pvs]
+        if len(names) > 0:
+            print_and_log("Removing PVs {}".format(", ".join(names)))
+            for name in names:
+                del manager.pvf[pvs.pop(name).name]
+                del self.pvDB[name]
 
     def add_string_pv_to_db(self, name, count=1000):
+        self.add_string_pvs_to_db({name: count})
+
+    def add_string_pvs_to_db(self, counts):
+        """Adds a set of on-the-fly string PVs in one step.
+
+        Args:
+            counts (dict): The maximum length of each PV to add, by name. Names of PVs which already exist are ignored
+        """
         # Check name not already in PVDB and that a PV does not already exist
-        if name not in manager.pvs[self.port]:
+        new_pvs = {name: char_waveform(count) for name, count in counts.items() if name not in manager.pvs[self.port]}
+        if len(new_pvs) > 0:
             try:
-                print_and_log("Adding PV {}".format(name))
-                new_pv = {name: char_waveform(count)}
-                self._cas.createPV(CONTROL_SYSTEM_PREFIX, new_pv)
-                data = Data()
-                data.value = manager.pvs[self.port][name].info.value
-                self.pvDB[name] = data
+                print_and_log("Adding PVs {}".format(", ".join(new_pvs)))
+                self._cas.createPV(CONTROL_SYSTEM_PREFIX, new_pvs)
+                for name in new_pvs:
+                    data = Data()
+                    data.value = manager.pvs[self.port][name].info.value
+                    self.pvDB[name] = data
             except Exception as err:
-                print_and_log("Unable to add PV {}".format(name), "MAJOR")
+                print_and_log("Unable to add PVs {}".format(", ".join(new_pvs)), "MAJOR")
 
 
 if __name__ == '__main__':
@@ -646,6 +680,12 @@ if __name__ == '__main__':
                         help='The XML file containing the new PV Archiver log settings')
     parser.add_argument('-f', '--facility', nargs=1, type=str, default=['ISIS'],
                         help='Which facility is this being run for (default=ISIS)')
+    parser.add_argument('-cp', '--compact_pvs', action='store_true',
+                        help='Also publish the configuration details and synoptics compressed and base64 encoded, '
+                             'under the PV names with the suffix :B64')
+    parser.add_argument('-cl', '--compression_level', nargs=1, type=int, default=[-1],
+                        help='The zlib compression level for the PVs, from 1 (fastest) to 9 (smallest) '
+                             '(default=-1, the zlib default)')
 
     args = parser.parse_args()
 
@@ -679,6 +719,12 @@ if __name__ == '__main__':
 
     PVLIST_FILE = args.pvlist_name[0]
 
+    set_compression_level(args.compression_level[0])
+    COMPACT_PVS = args.compact_pvs
+    if COMPACT_PVS:
+        initial_dbs[compact_pv_name(BlockserverPVNames.GET_CURR_CONFIG_DETAILS)] = \
+            char_waveform(compact_waveform_length(initial_dbs[BlockserverPVNames.GET_CURR_CONFIG_DETAILS]['count']))
+
     print_and_log("BLOCKSERVER PREFIX = %s" % CONTROL_SYSTEM_PREFIX)
     SERVER = SimpleServer()
     SERVER.createPV(CONTROL_SYSTEM_PREFIX, initial_dbs)
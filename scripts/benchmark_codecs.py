@@ -0,0 +1,96 @@
+# This file is part of the ISIS IBEX application.
+# Copyright (C) 2012-2016 Science & Technology Facilities Council.
+# All rights reserved.
+#
+# This program is distributed in the hope that it will be useful.
+# This program and the accompanying materials are made available under the
+# terms of the Eclipse Public License v1.0 which accompanies this distribution.
+# EXCEPT AS EXPRESSLY SET FORTH IN THE ECLIPSE PUBLIC LICENSE V1.0, THE PROGRAM
+# AND ACCOMPANYING MATERIALS ARE PROVIDED ON AN "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND.  See the Eclipse Public License v1.0 for more details.
+#
+# You should have received a copy of the Eclipse Public License v1.0
+# along with this program; if not, you can obtain a copy from
+# https://www.eclipse.org/org/documents/epl-v10.php or
+# http://opensource.org/licenses/eclipse-1.0.php
+"""
+Script timing the conversions between char waveforms, strings, hex and JSON for the payload sizes the servers use.
+"""
+from __future__ import print_function
+import argparse
+import json
+import timeit
+
+import os
+import six
+import sys
+
+try:
+    from server_common.utilities import waveform_to_string
+except ImportError:
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+    from server_common.utilities import waveform_to_string
+from server_common.utilities import compress_and_hex, dehex_and_decompress, dehex_and_decompress_waveform, \
+    json_compress_and_hex, dehex_decompress_and_load_json
+
+# Sizes, in characters, of the char waveform PVs the servers serve
+PAYLOAD_SIZES = [16000, 64000, 128000]
+
+
+def waveform_to_string_by_concatenation(data):
+    """
+    The previous implementation of waveform_to_string, adding one character at a time, to compare against.
+    """
+    output = six.text_type()
+    for i in data:
+        if i == 0:
+            break
+        output += six.unichr(i)
+    return output
+
+
+def create_waveform(size):
+    """
+    Create a null terminated waveform holding a compressed and hexed JSON payload filling most of the size.
+
+    Args:
+        size: number of characters in the waveform
+
+    Returns: tuple of the waveform as a list of integers and the object in the payload
+    """
+    payload = {}
+    item = 0
+    # Random enough names that the payload does not compress to nothing
+    while len(compress_and_hex(str(json.dumps(payload)))) < size - 100:
+        payload["BLOCK_{}".format(item)] = [str(hash(str(item * j))) for j in range(5)]
+        item += 1
+    hexed = compress_and_hex(str(json.dumps(payload))).decode("ascii")
+    return [ord(c) for c in hexed] + [0] * (size - len(hexed)), payload
+
+
+def best_time(function, repeats):
+    """
+    Returns: best time in seconds of repeated calls to a function
+    """
+    return min(timeit.repeat(function, number=1, repeat=repeats))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark waveform, string, hex and JSON conversions")
+    parser.add_argument("--repeats", type=int, default=20, help="Number of times to repeat each timing")
+    args = parser.parse_args()
+
+    print("{:>8} {:>14} {:>14} {:>14} {:>14} {:>14} {:>14}".format(
+        "size", "concatenate", "waveform", "dehex wave", "dehex json", "json hex", "dumps then hex"))
+    for size in PAYLOAD_SIZES:
+        waveform, payload = create_waveform(size)
+        hexed = compress_and_hex(str(json.dumps(payload)))
+        times = [
+            best_time(lambda: waveform_to_string_by_concatenation(waveform), args.repeats),
+            best_time(lambda: waveform_to_string(waveform), args.repeats),
+            best_time(lambda: dehex_and_decompress_waveform(waveform), args.repeats),
+            best_time(lambda: dehex_decompress_and_load_json(hexed), args.repeats),
+            best_time(lambda: json_compress_and_hex(payload), args.repeats),
+            best_time(lambda: compress_and_hex(str(json.dumps(payload))), args.repeats),
+        ]
+        print("{:>8} ".format(size) + " ".join("{:>12.3f}ms".format(t * 1000) for t in times))
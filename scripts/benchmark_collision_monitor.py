@@ -0,0 +1,351 @@
+# This file is part of the ISIS IBEX application.
+# Copyright (C) 2012-2016 Science & Technology Facilities Council.
+# All rights reserved.
+#
+# This program is distributed in the hope that it will be useful.
+# This program and the accompanying materials are made available under the
+# terms of the Eclipse Public License v1.0 which accompanies this distribution.
+# EXCEPT AS EXPRESSLY SET FORTH IN THE ECLIPSE PUBLIC LICENSE V1.0, THE PROGRAM
+# AND ACCOMPANYING MATERIALS ARE PROVIDED ON AN "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND.  See the Eclipse Public License v1.0 for more details.
+#
+# You should have received a copy of the Eclipse Public License v1.0
+# along with this program; if not, you can obtain a copy from
+# https://www.eclipse.org/org/documents/epl-v10.php or
+# http://opensource.org/licenses/eclipse-1.0.php
+"""
+Script replaying recorded or synthetic axis trajectories through the collision monitor without any motors, reporting
+the time taken by each collision detection cycle and limit calculation, how long after the geometries first touch
+each collision is detected, and the CPU used, for each configuration.
+
+Trajectories are replayed in real time into a running collision detection thread, as the motor monitors would update
+it, with the limits calculated in a thread of their own as the main loop of the monitor does, so the latencies include
+the time the detection loop takes to wake and the CPU used reflects the monitor running at that rate.
+
+Recorded trajectories are CSV files with a header row, the time in seconds in the first column and the position of
+each axis of the configuration in the following columns.
+"""
+from __future__ import print_function
+import argparse
+import csv
+import importlib
+import random
+import resource
+import threading
+import time
+
+import numpy as np
+import os
+import sys
+
+# The collision monitor imports its modules from its own directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, "CollisionAvoidanceMonitor")))
+os.environ.setdefault("MYPVPREFIX", "")
+
+import ode
+from collide import CollisionDetector, collide, DETECTION_HEARTBEAT
+from geometry import GeometryBox
+from limits import auto_seek_limits
+from monitor import UpdateSignal
+from move import move_all
+
+CONFIGURATIONS = ["config_larmor", "config_imat", "config_zoom"]
+
+# Times between checks for the first touch of each collision, as a fraction of the time between updates
+ONSET_STEPS = 20
+
+
+class ReplayMonitor(object):
+    """
+    Stands in for a Monitor, returning whatever value the replay last set, and signalling the update.
+    """
+    def __init__(self, value=None, update_signal=None):
+        self.val = value
+        self.stale = True
+        self.update_signal = update_signal
+
+    def update(self, value):
+        self.val = value
+        self.stale = False
+        if self.update_signal is not None:
+            self.update_signal.notify()
+
+    def value(self):
+        self.stale = True
+        return self.val
+
+    def fresh(self):
+        fresh = not self.stale
+        self.stale = True
+        return fresh
+
+
+class RecordingDriver(object):
+    """
+    Stands in for the PV server driver, keeping the parameters set on it.
+    """
+    def __init__(self):
+        self.params = {}
+
+    def setParam(self, name, value):
+        self.params[name] = value
+
+    def getParam(self, name):
+        return self.params.get(name)
+
+
+class SilentLogger(object):
+    """
+    Stands in for the IOC logger.
+    """
+    def write_to_log(self, message, severity, src):
+        pass
+
+
+class ReplayOperatingMode(object):
+    """
+    Operating mode which doesn't stop the motors, as there are none.
+    """
+    def __init__(self):
+        self.auto_stop = threading.Event()
+
+
+class _ReplayFinished(Exception):
+    pass
+
+
+class ReplayDetector(CollisionDetector):
+    """
+    Collision detector which records the time taken by each check, and when each collision is first reported.
+    """
+    def __init__(self, *args, **kwargs):
+        CollisionDetector.__init__(self, *args, **kwargs)
+        self.cycle_times = []
+        self.detections = []
+        self.finished = threading.Event()
+        self._colliding = False
+
+    def run(self):
+        try:
+            CollisionDetector.run(self)
+        except _ReplayFinished:
+            pass
+
+    def check(self):
+        if self.finished.is_set():
+            raise _ReplayFinished()
+        start = time.time()
+        CollisionDetector.check(self)
+        end = time.time()
+        self.cycle_times.append(end - start)
+
+        colliding = any(self.collisions)
+        if colliding and not self._colliding:
+            self.detections.append(end)
+        self._colliding = colliding
+
+
+def synthetic_trajectory(config, duration, rate, rng):
+    """
+    Generates moves of every axis to random positions within its hard limits, at random speeds, with pauses between.
+
+    Args:
+        config: The configuration module
+        duration: The length of the trajectory in seconds
+        rate: The number of updates per second
+        rng: The random number generator
+
+    Returns:
+        A list of times and a list of the axis positions at each time
+    """
+    times = [i / float(rate) for i in range(int(duration * rate) + 1)]
+    positions = []
+    for limits in config.hardlimits:
+        low, high = min(limits), max(limits)
+        start, start_time = rng.uniform(low, high), 0.
+        axis = []
+        while start_time <= duration:
+            end = rng.uniform(low, high)
+            move_time = rng.uniform(1., 8.)
+            pause = rng.uniform(0., 2.)
+            for t in times[len(axis):]:
+                if t > start_time + move_time + pause:
+                    break
+                fraction = min(1., (t - start_time) / move_time)
+                axis.append(start + (end - start) * fraction)
+            start, start_time = end, start_time + move_time + pause
+        positions.append(axis[:len(times)])
+    return times, [list(p) for p in zip(*positions)]
+
+
+def recorded_trajectory(filename):
+    """
+    Reads a trajectory from a CSV file.
+
+    Args:
+        filename: The name of the file
+
+    Returns:
+        A list of times and a list of the axis positions at each time
+    """
+    with open(filename) as f:
+        rows = [[float(v) for v in row] for row in list(csv.reader(f))[1:] if row]
+    return [row[0] for row in rows], [row[1:] for row in rows]
+
+
+def collision_onsets(config, times, positions):
+    """
+    Finds when the geometries first touch in each collision, by checking at many times between each update.
+
+    Args:
+        config: The configuration module
+        times: The times of the updates
+        positions: The axis positions at each update
+
+    Returns:
+        A list of the times at which collisions start
+    """
+    space = ode.Space()
+    geometries = [GeometryBox(space, oversize=config.oversize, **g) for g in config.geometries]
+    onsets = []
+    colliding = False
+    for i in range(1, len(times)):
+        for step in range(1, ONSET_STEPS + 1):
+            fraction = step / float(ONSET_STEPS)
+            values = [a + (b - a) * fraction for a, b in zip(positions[i - 1], positions[i])]
+            move_all(geometries, config.moves, values=values)
+            now_colliding = any(collide(geometries, config.ignore))
+            if now_colliding and not colliding:
+                onsets.append(times[i - 1] + (times[i] - times[i - 1]) * fraction)
+            colliding = now_colliding
+    return onsets
+
+
+def percentiles(samples):
+    """
+    Returns: the 50th, 90th and 99th percentiles and maximum of the samples in milliseconds
+    """
+    if not samples:
+        return [float("nan")] * 4
+    return [1000 * p for p in np.percentile(samples, [50, 90, 99, 100])]
+
+
+def cpu_time():
+    """
+    Returns: the user and system CPU time used by this process so far
+    """
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def replay(config, times, positions, limits_every):
+    """
+    Replays a trajectory in real time through a running collision detector, and the limit calculation.
+
+    Args:
+        config: The configuration module
+        times: The times of the updates
+        positions: The axis positions at each update
+        limits_every: The number of updates between limit calculations
+
+    Returns:
+        A dictionary of the results
+    """
+    space = ode.Space()
+    geometries = [GeometryBox(space, oversize=config.oversize, **g) for g in config.geometries]
+    limit_space = ode.Space()
+    limit_geometries = [GeometryBox(limit_space, oversize=config.oversize, **g) for g in config.geometries]
+
+    axis_updates = UpdateSignal()
+    monitors = [ReplayMonitor(v, axis_updates) for v in positions[0]]
+    is_moving = [ReplayMonitor(1, axis_updates) for _ in positions[0]]
+    detector = ReplayDetector(RecordingDriver(), geometries, config.moves, monitors, config.ignore, is_moving,
+                              SilentLogger(), ReplayOperatingMode(), config.pvs, axis_updates)
+
+    # Calculate the limits from the latest positions as often as every limits_every updates, as the main loop would
+    limit_times = []
+    limits_period = (times[-1] - times[0]) * limits_every / max(len(times) - 1, 1)
+
+    def calculate_limits():
+        while not detector.finished.is_set():
+            start = time.time()
+            auto_seek_limits(limit_geometries, config.ignore, config.moves, [m.val for m in monitors],
+                             config.hardlimits, coarse=config.coarse, fine=config.fine)
+            limit_times.append(time.time() - start)
+            detector.finished.wait(max(0., limits_period - (time.time() - start)))
+
+    limits_thread = threading.Thread(target=calculate_limits, name="ReplayLimits")
+    limits_thread.daemon = True
+
+    wall_start, cpu_start = time.time(), cpu_time()
+    detector.start()
+    limits_thread.start()
+
+    for t, values in zip(times, positions):
+        delay = wall_start + t - times[0] - time.time()
+        if delay > 0:
+            time.sleep(delay)
+        for monitor, moving, value in zip(monitors, is_moving, values):
+            moving.update(int(monitor.val == value))  # DMOV is 1 when the motor isn't moving
+            monitor.update(value)
+
+    # Let the detector check the last positions, which it has done once a check has started since they were set
+    checks = len(detector.cycle_times)
+    deadline = time.time() + 2 * DETECTION_HEARTBEAT
+    while len(detector.cycle_times) < checks + 2 and time.time() < deadline:
+        time.sleep(0.01)
+
+    detector.finished.set()
+    axis_updates.notify()
+    detector.join()
+    limits_thread.join()
+    wall, cpu = time.time() - wall_start, cpu_time() - cpu_start
+    detections = [d - wall_start + times[0] for d in detector.detections]
+
+    # Match each collision to the first detection after it started
+    onsets = collision_onsets(config, times, positions)
+    latencies = []
+    for onset in onsets:
+        later = [d for d in detections if d >= onset]
+        if later:
+            latencies.append(later[0] - onset)
+
+    return {
+        "cycles": detector.cycle_times,
+        "limits": limit_times,
+        "collisions": len(onsets),
+        "latencies": latencies,
+        "cpu": 100. * cpu / wall if wall > 0 else float("nan"),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay axis trajectories through the collision monitor")
+    parser.add_argument("--config", action="append", choices=CONFIGURATIONS,
+                        help="Configuration to replay, may be given more than once (default: all)")
+    parser.add_argument("--trace", help="CSV file of a recorded trajectory, replayed instead of synthetic moves")
+    parser.add_argument("--duration", type=float, default=60., help="Length of synthetic trajectories in seconds")
+    parser.add_argument("--rate", type=float, default=20., help="Updates per second of synthetic trajectories")
+    parser.add_argument("--limits-every", type=int, default=20, help="Number of updates between limit calculations")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for synthetic trajectories")
+    args = parser.parse_args()
+
+    print("{:>14} {:>7} {:>31} {:>31} {:>8} {:>17} {:>6}".format(
+        "config", "cycles", "cycle ms p50/p90/p99/max", "limits ms p50/p90/p99/max", "detected",
+        "latency ms mean/max", "cpu %"))
+    for name in args.config or CONFIGURATIONS:
+        config = importlib.import_module("configurations." + name)
+        if args.trace:
+            times, positions = recorded_trajectory(args.trace)
+        else:
+            times, positions = synthetic_trajectory(config, args.duration, args.rate, random.Random(args.seed))
+
+        results = replay(config, times, positions, args.limits_every)
+        latencies = results["latencies"]
+        print("{:>14} {:>7} {:>31} {:>31} {:>8} {:>17} {:>6.1f}".format(
+            name, len(results["cycles"]),
+            "/".join("{:.2f}".format(p) for p in percentiles(results["cycles"])),
+            "/".join("{:.1f}".format(p) for p in percentiles(results["limits"])),
+            "{}/{}".format(len(latencies), results["collisions"]),
+            "{:.1f}/{:.1f}".format(1000 * np.mean(latencies), 1000 * max(latencies)) if latencies else "-",
+            results["cpu"]))
@@ -0,0 +1,151 @@
+# This file is part of the ISIS IBEX application.
+# Copyright (C) 2012-2016 Science & Technology Facilities Council.
+# All rights reserved.
+#
+# This program is distributed in the hope that it will be useful.
+# This program and the accompanying materials are made available under the
+# terms of the Eclipse Public License v1.0 which accompanies this distribution.
+# EXCEPT AS EXPRESSLY SET FORTH IN THE ECLIPSE PUBLIC LICENSE V1.0, THE PROGRAM
+# AND ACCOMPANYING MATERIALS ARE PROVIDED ON AN "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND.  See the Eclipse Public License v1.0 for more details.
+#
+# You should have received a copy of the Eclipse Public License v1.0
+# along with this program; if not, you can obtain a copy from
+# https://www.eclipse.org/org/documents/epl-v10.php or
+# http://opensource.org/licenses/eclipse-1.0.php
+"""
+Script comparing the time taken to read a large synthetic PV table through IocDataSource when the connector returns
+text columns as bytearrays which are decoded in python after the query, and when the query converts them to utf-8 so
+that the connector returns them as strings and the rows are used as they are.
+
+Both paths run through the database layer's real query helper, starting from the rows the connector has read, so
+they include everything done in python afterwards. The connector's C extension decodes utf-8 columns as it builds
+each row, which is not included.
+"""
+from __future__ import print_function
+import argparse
+import timeit
+
+import os
+import sys
+
+try:
+    from server_common.mysql_abstraction_layer import AbstratSQLCommands, _execute_on_connection
+except ImportError:
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+    from server_common.mysql_abstraction_layer import AbstratSQLCommands, _execute_on_connection
+from server_common.ioc_data_source import IocDataSource, GET_PVS_WITH_DETAILS
+
+
+class InMemoryCursor(object):
+    """
+    Cursor returning the rows of the synthetic table for every query.
+    """
+    def __init__(self, rows):
+        self._rows = rows
+        self.rowcount = -1
+
+    def execute(self, command, bound_variables):
+        pass
+
+    def fetchall(self):
+        return list(self._rows)
+
+    def close(self):
+        pass
+
+
+class InMemoryConnection(object):
+    """
+    Connection whose cursors return the rows of the synthetic table.
+    """
+    def __init__(self, rows):
+        self._rows = rows
+
+    def cursor(self):
+        return InMemoryCursor(self._rows)
+
+
+class InMemorySQL(AbstratSQLCommands):
+    """
+    Runs every command on an in-memory connection, as the database layer runs them on a pooled connection.
+    """
+    def __init__(self, rows):
+        self._conn = InMemoryConnection(rows)
+
+    def _execute_command(self, command, is_query, bound_variables, name=None):
+        values, row_count = _execute_on_connection(self._conn, command, is_query, bound_variables)
+        return values
+
+
+def decode_after_query(rows):
+    """
+    Convert the data in each row from bytearray to a string, as IocDataSource did when the queries returned bytearrays.
+
+    Args:
+        rows: the rows returned by the query
+
+    Returns: list of lists of strings
+    """
+    values = [list(element) for element in rows]
+    for i, pv in enumerate(values):
+        for j, element in enumerate(pv):
+            if type(element) == bytearray:
+                values[i][j] = element.decode("utf-8")
+    return values
+
+
+def create_rows(row_count, as_text):
+    """
+    Create rows of a synthetic PV table as the connector returns them.
+
+    Args:
+        row_count: number of rows
+        as_text: True for rows of strings, as returned for columns converted to utf-8; False for rows of bytearrays
+
+    Returns: list of tuples
+    """
+    rows = [("IN:DEMO:IOC_{0:02d}:PV{1:06d}".format(i % 50, i), "ai", "Description of PV {}".format(i),
+             "IOC_{0:02d}".format(i % 50)) for i in range(row_count)]
+    if as_text:
+        return rows
+    return [tuple(bytearray(value.encode("utf-8")) for value in row) for row in rows]
+
+
+def time_query(sql_abstraction, row_count, repeats, normalise):
+    """
+    Time reading all the PVs through IocDataSource.
+
+    Args:
+        sql_abstraction: layer to read the table from
+        row_count: number of rows in the table
+        repeats: number of times to repeat the timing
+        normalise: function applied to the rows returned by IocDataSource
+
+    Returns: best time taken in seconds
+    """
+    data_source = IocDataSource(sql_abstraction)
+
+    def read_all_pvs():
+        # Query without the error handling of get_interesting_pvs, so that an error stops the benchmark rather than
+        # timing how quickly it fails
+        values = normalise(data_source._query_and_normalise(GET_PVS_WITH_DETAILS, name="GET_INTERESTING_PVS_ALL"))
+        if len(values) != row_count:
+            raise RuntimeError("Read {} rows of {}".format(len(values), row_count))
+
+    return min(timeit.repeat(read_all_pvs, number=1, repeat=repeats))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark decoding of query results in IocDataSource")
+    parser.add_argument("--rows", type=int, default=200000, help="Number of rows in the synthetic PV table")
+    parser.add_argument("--repeats", type=int, default=5, help="Number of times to repeat each timing")
+    args = parser.parse_args()
+
+    decoded = time_query(InMemorySQL(create_rows(args.rows, False)), args.rows, args.repeats, decode_after_query)
+    converted = time_query(InMemorySQL(create_rows(args.rows, True)), args.rows, args.repeats, lambda rows: rows)
+
+    print("Rows: {}".format(args.rows))
+    print("Decoded after query: {:.3f}s".format(decoded))
+    print("Converted to utf-8 by query: {:.3f}s".format(converted))
+    print("Speed up: {:.2f}x".format(decoded / converted))
@@ -1,5 +1,6 @@
 from __future__ import absolute_import, print_function, unicode_literals, division
-from time import sleep
+from threading import Condition
+from time import sleep, time
 
 # This file is part of the ISIS IBEX application.
 # Copyright (C) 2012-2016 Science & Technology Facilities Council.
@@ -23,6 +24,12 @@ from concurrent.futures import ThreadPoolExecutor
 # Number of threads to serve caputs
 NUMBER_OF_CAPUT_THREADS = 20
 
+# Number of caputs which can be waiting for a thread before callers have to wait for space
+MAX_QUEUED_CAPUTS = 1000
+
+# Time in seconds a caller waits for space in a full caput queue before its caput is rejected
+CAPUT_QUEUE_TIMEOUT = 5.0
+
 try:
     from genie_python.channel_access_exceptions import UnableToConnectToPVException, ReadAccessException
 except ImportError:
@@ -91,34 +98,174 @@ except ImportError:
         WriteAccess = 21
 
 
-def _create_caput_pool():
+def _create_caput_pool(max_workers=NUMBER_OF_CAPUT_THREADS):
     """
+    Args:
+        max_workers: number of threads in the pool
+
     Returns: thread pool for the caputs, making sure it works for older versions of python
     """
     try:
-        executor = ThreadPoolExecutor(max_workers=NUMBER_OF_CAPUT_THREADS, thread_name_prefix="ChannelAccess_Pool")
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ChannelAccess_Pool")
     except TypeError:
-        executor = ThreadPoolExecutor(max_workers=NUMBER_OF_CAPUT_THREADS)
+        executor = ThreadPoolExecutor(max_workers=max_workers)
         print("WARNING: thread_name_prefix does not exist for ThreadPoolExecutor in this python, "
               "caput pool has generic name.")
     return executor
 
 
+class PutExecutor(object):
+    """
+    Long lived pool of threads to run caputs on, with a bounded queue. When the queue is full callers wait for space
+    and if none becomes free in time their caput is rejected. Counts of the puts made are kept so that callers
+    making too many puts can be found.
+    """
+
+    def __init__(self, max_workers=NUMBER_OF_CAPUT_THREADS, max_queued=MAX_QUEUED_CAPUTS,
+                 queue_timeout=CAPUT_QUEUE_TIMEOUT):
+        """
+        Constructor.
+
+        Args:
+            max_workers: number of threads to run caputs on
+            max_queued: number of caputs which can wait for a thread before callers have to wait
+            queue_timeout: time in seconds to wait for space in a full queue before rejecting a caput
+        """
+        self._executor = _create_caput_pool(max_workers)
+        self._max_workers = max_workers
+        self._max_outstanding = max_workers + max_queued
+        self._queue_timeout = queue_timeout
+        self._condition = Condition()
+        self._outstanding = 0
+        self._completed = 0
+        self._rejected = 0
+        self._rejected_by_pv = {}
+        self._total_latency = 0.0
+        self._max_latency = 0.0
+
+    def submit(self, name, put_value):
+        """
+        Submit a caput to be run on the pool.
+
+        Args:
+            name (string): name of the PV being put to
+            put_value: function which does the put
+
+        Returns:
+            Future: for the put; None if the queue stayed full and the put was rejected
+        """
+        deadline = time() + self._queue_timeout
+        rejected = False
+        with self._condition:
+            while self._outstanding >= self._max_outstanding and not rejected:
+                remaining = deadline - time()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                else:
+                    rejected = True
+            if rejected:
+                self._rejected += 1
+                self._rejected_by_pv[name] = self._rejected_by_pv.get(name, 0) + 1
+            else:
+                self._outstanding += 1
+
+        if rejected:
+            print_and_log("Caput to {} rejected, {} caputs are already waiting".format(name, self._max_outstanding),
+                          "MAJOR")
+            return None
+
+        submitted = time()
+        try:
+            future = self._executor.submit(put_value)
+        except Exception:
+            self._put_finished(None)
+            raise
+        # Called once the future is done, so waiting for tasks also waits for their futures to be complete
+        future.add_done_callback(lambda _: self._put_finished(time() - submitted))
+        return future
+
+    def _put_finished(self, latency):
+        """
+        Record that a put has left the pool and wake anything waiting for space.
+
+        Args:
+            latency: time in seconds from submitting the put to it completing; None if it was never run
+        """
+        with self._condition:
+            self._outstanding -= 1
+            if latency is not None:
+                self._completed += 1
+                self._total_latency += latency
+                self._max_latency = max(self._max_latency, latency)
+            self._condition.notify_all()
+
+    def wait_for_tasks(self, timeout=None):
+        """
+        Wait for all submitted caputs to complete, leaving the pool running.
+
+        Args:
+            timeout: maximum time in seconds to wait; None to wait until they are complete
+
+        Returns:
+            True if all the caputs completed; False if the timeout expired
+        """
+        deadline = None if timeout is None else time() + timeout
+        with self._condition:
+            while self._outstanding > 0:
+                if deadline is None:
+                    self._condition.wait()
+                else:
+                    remaining = deadline - time()
+                    if remaining <= 0:
+                        return False
+                    self._condition.wait(remaining)
+        return True
+
+    def statistics(self):
+        """
+        Returns: dictionary of counts of puts; queue depth (puts waiting for a thread), outstanding (puts waiting or
+            running), completed, rejected, rejected by PV name and mean and max latency from submission to completion
+            in seconds
+        """
+        with self._condition:
+            return {
+                "queue_depth": max(self._outstanding - self._max_workers, 0),
+                "outstanding": self._outstanding,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "rejected_by_pv": dict(self._rejected_by_pv),
+                "mean_latency": self._total_latency / self._completed if self._completed > 0 else 0.0,
+                "max_latency": self._max_latency,
+            }
+
+
 class ChannelAccess(object):
     # Create a thread poll so that threads are reused and so ca contexts that each thread gets are shared. This also
     # caps the number of ca library threads. 20 is chosen as being probably enough but limited.
-    thread_pool = _create_caput_pool()
+    put_executor = PutExecutor()
 
     @staticmethod
-    def wait_for_tasks():
+    def wait_for_tasks(timeout=None):
         """
-        Wait for all requested tasks to complete, i.e. all caputs.
+        Wait for all requested tasks to complete, i.e. all caputs. The pool of threads is kept for later caputs.
+
+        Args:
+            timeout (float, None): maximum time in seconds to wait; None to wait until all caputs are complete
 
-        It does this by shutting down the current threadpool waiting for all tasks to complete and then create a new
-        pool.
+        Returns:
+            True if all the caputs completed; False if the timeout expired
+        """
+        return ChannelAccess.put_executor.wait_for_tasks(timeout)
+
+    @staticmethod
+    def put_statistics():
+        """
+        Get counts of the caputs made without waiting, to find callers making too many.
+
+        Returns:
+            dict: queue depth, outstanding, completed and rejected puts, rejected puts by PV and put latency
         """
-        ChannelAccess.thread_pool.shutdown()
-        ChannelAccess.thread_pool = _create_caput_pool()
+        return ChannelAccess.put_executor.statistics()
 
     @staticmethod
     def caget(name, as_string=False, timeout=None):
@@ -158,8 +305,8 @@ class ChannelAccess(object):
             wait (bool, optional): Wait for the PV to set before returning
             set_pv_value: function to call to set a pv, used only in testing; None to use CaChannelWrapper set value
         Returns:
-            None: if wait is False
-            Future: if wait if True
+            None: if wait is True, or if wait is False and the put was rejected because the queue of puts is full
+            Future: if wait if False
         """
         if set_pv_value is None:
             # We need to put the default here rather than as a python default argument because the linux build does
@@ -177,7 +324,7 @@ class ChannelAccess(object):
         else:
             # If not waiting, run in a different thread.
             # Even if not waiting genie_python sometimes takes a while to return from a set_pv_value call.
-            return ChannelAccess.thread_pool.submit(_put_value)
+            return ChannelAccess.put_executor.submit(name, _put_value)
 
     @staticmethod
     def caput_retry_on_fail(pv_name, value, retry_count=5):
@@ -15,7 +15,10 @@
 # http://opensource.org/licenses/eclipse-1.0.php
 
 from pcaspy import SimpleServer, Driver, cas
-import re
+from collections import OrderedDict
+
+MAX_CACHED_MISSES = 10000
+"""Number of recently searched for PV names, not served here, to remember"""
 
 
 class DynamicStringPV(cas.casPV):
@@ -80,28 +83,49 @@ class CAServer(SimpleServer):
         super(CAServer, self).__init__()
         self._pvs = dict()
         self._prefix = pv_prefix
+        self._missed = OrderedDict()
 
     def _strip_prefix(self, fullname):
-        pvmatch = re.match(self._prefix + r'(.*)', fullname)
-        if pvmatch is not None:
-            return pvmatch.group(1)
+        if fullname.startswith(self._prefix):
+            return fullname[len(self._prefix):]
         else:
             return None
 
+    def _forget_misses(self):
+        """Forgets the names recently searched for but not found, as they may now exist. Rebinds rather than clears so
+        it is safe against a search being handled on another thread."""
+        self._missed = OrderedDict()
+
     def pvExistTest(self, context, addr, fullname):
         """A method that overrides the SimpleServer pvExistTest method. It is called by channel access to check if a PV
         exists at this server. The method first checks against the dictionary at this server and then checks against the
         parent SimpleServer.
+
+        Clients search the whole network for every PV, so most names searched for are not here. The most recent of those
+        are remembered so that repeated searches, such as during a reconnect storm, are answered by a single lookup.
         """
         try:
+            missed = self._missed
+            if fullname in missed:
+                return cas.pverDoesNotExistHere
             pv = self._strip_prefix(fullname)
             if pv is not None and pv in self._pvs:
                 return cas.pverExistsHere
-            else:
-                return SimpleServer.pvExistTest(self, context, addr, fullname)
+            result = SimpleServer.pvExistTest(self, context, addr, fullname)
+            if result == cas.pverDoesNotExistHere:
+                missed[fullname] = None
+                if len(missed) > MAX_CACHED_MISSES:
+                    missed.popitem(last=False)
+            return result
         except:
             return cas.pverDoesNotExistHere
 
+    def createPV(self, prefix, pvdb):
+        """Overrides the SimpleServer createPV method so that new PVs are not hidden by earlier failed searches for them.
+        """
+        super(CAServer, self).createPV(prefix, pvdb)
+        self._forget_misses()
+
     def pvAttach(self, context, fullname):
         """A method that overrides the SimpleServer pvAttach method. It is called by channel access to attach a monitor
         to the specified PV. The method first checks against the dictionary at this server and then checks against the
@@ -120,8 +144,19 @@ class CAServer(SimpleServer):
             name (string): The name of the PV to create (without the PV prefix)
             data (string, optional): The initial data stored in the PV
         """
-        if name not in self._pvs:
-            self._pvs[name] = DynamicStringPV(data)
+        self.registerPVs({name: data})
+
+    def registerPVs(self, pvs):
+        """Creates a set of PVs in the dictionary of this server in one step.
+
+        Args:
+            pvs (dict): The initial data for each PV to create, by name (without the PV prefix). PVs which already
+                exist are left unchanged
+        """
+        new_pvs = {name: DynamicStringPV(data) for name, data in pvs.items() if name not in self._pvs}
+        if len(new_pvs) > 0:
+            self._pvs.update(new_pvs)
+            self._forget_misses()
 
     def updatePV(self, name, data):
         """Updates a PV in the dictionary of this server. The PV will be created if it does not exist.
@@ -141,8 +176,17 @@ class CAServer(SimpleServer):
         Args:
             name (string): The name of the PV to remove (without the PV prefix)
         """
-        if name in self._pvs:
-            del self._pvs[name]
+        self.deletePVs([name])
+
+    def deletePVs(self, names):
+        """Removes a set of PVs from the dictionary of this server in one step.
+
+        Args:
+            names (list): The names of the PVs to remove (without the PV prefix)
+        """
+        names = set(names)
+        if not names.isdisjoint(self._pvs):
+            self._pvs = {name: pv for name, pv in self._pvs.items() if name not in names}
 
 if __name__ == '__main__':
     # Here for testing
@@ -104,6 +104,15 @@ class IOCData(object):
         """
         return self.get_pars('USERPAR')
 
+    def get_query_statistics(self):
+        """
+        Gets the statistics recorded for the queries made to the IOC database.
+
+        Returns:
+            dict : query name to a dictionary of its statistics
+        """
+        return self._ioc_data_source.get_query_statistics()
+
     def update_iocs_status(self):
         """
         Accesses the db to get a list of IOCs and checks to see if they are currently running.
@@ -113,6 +122,7 @@ class IOCData(object):
         """
         with self._running_iocs_lock:
             self._running_iocs = []
+            changed_running_states = []
 
             for ioc_name, is_running in self._ioc_data_source.get_iocs_and_running_status():
                 # Check to see if running using CA and procserv
@@ -121,14 +131,18 @@ class IOCData(object):
                         self._running_iocs.append(ioc_name)
                         if is_running == 0:
                             # This should only get called if the IOC failed to tell the DB it started
-                            self._ioc_data_source.update_ioc_is_running(ioc_name, 1)
+                            changed_running_states.append((ioc_name, 1))
                     else:
                         if is_running == 1:
-                            self._ioc_data_source.update_ioc_is_running(ioc_name, 0)
+                            changed_running_states.append((ioc_name, 0))
                 except Exception as err:
                     # Fail but continue - probably couldn't find procserv for the ioc
                     print_and_log("Issue with updating IOC status: %s" % err, "MAJOR", "DBSVR")
 
+            # Write all the changes at once, after the slow procserv checks, so the database is only held briefly
+            if len(changed_running_states) > 0:
+                self._ioc_data_source.update_iocs_are_running(changed_running_states)
+
             return self._running_iocs
 
     def get_interesting_pvs(self, level="", ioc=None):
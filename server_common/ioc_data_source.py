@@ -14,8 +14,12 @@ PV_INFO_FIELD_NAME = "info_field"
 PV_DESCRIPTION_NAME = "description"
 """name of the description field on a pv"""
 
+# Text columns are converted to utf-8 in the queries so that the connector returns them as strings rather than
+# bytearrays. Where rows are made DISTINCT a binary collation keeps them apart by case, as they are when binary.
+
 GET_PV_INFO_QUERY = """
-SELECT s.iocname, p.pvname, lower(p.infoname), p.value
+SELECT CONVERT(s.iocname USING utf8mb4), CONVERT(p.pvname USING utf8mb4), CONVERT(lower(p.infoname) USING utf8mb4),
+       CONVERT(p.value USING utf8mb4)
   FROM pvinfo p
   JOIN pvs s ON s.pvname = p.pvname
  WHERE lower(p.infoname) LIKE "log%"
@@ -23,7 +27,10 @@ SELECT s.iocname, p.pvname, lower(p.infoname), p.value
 """Query to return pv info for iocs from the ioc database"""
 
 GET_PVS_WITH_DETAILS = """
-    SELECT DISTINCT pvinfo.pvname, pvs.record_type, pvs.record_desc, pvs.iocname
+    SELECT DISTINCT CONVERT(pvinfo.pvname USING utf8mb4) COLLATE utf8mb4_bin,
+                    CONVERT(pvs.record_type USING utf8mb4) COLLATE utf8mb4_bin,
+                    CONVERT(pvs.record_desc USING utf8mb4) COLLATE utf8mb4_bin,
+                    CONVERT(pvs.iocname USING utf8mb4) COLLATE utf8mb4_bin
       FROM pvinfo
 INNER JOIN pvs ON pvs.pvname = pvinfo.pvname"""
 
@@ -45,7 +52,7 @@ GET_PVS_WITH_DETAILS_FOR_AN_IOC = GET_PVS_WITH_DETAILS + """
 AND iocname=%s"""
 
 GET_PVNAMES_IN_PVCATEGORY = """
-  SELECT DISTINCT pvinfo.pvname
+  SELECT DISTINCT CONVERT(pvinfo.pvname USING utf8mb4) COLLATE utf8mb4_bin
              FROM pvinfo
        INNER JOIN pvs ON pvs.pvname = pvinfo.pvname
             WHERE infoname='PVCATEGORY'
@@ -53,11 +60,11 @@ GET_PVNAMES_IN_PVCATEGORY = """
               AND pvinfo.pvname NOT LIKE '%:SP'"""
 """Get pvnames that are om a PV Category but are not set points"""
 
-GET_IOCS_AND_DESCRIPTIONS = "SELECT iocname, descr FROM iocs"
+GET_IOCS_AND_DESCRIPTIONS = "SELECT CONVERT(iocname USING utf8mb4), CONVERT(descr USING utf8mb4) FROM iocs"
 """Return all IOC andes and their descriptions"""
 
 GET_IOCS_AND_RUNNING_STATUS = """
-  SELECT DISTINCT iocname, running
+  SELECT DISTINCT CONVERT(iocname USING utf8mb4) COLLATE utf8mb4_bin, running
     FROM iocrt
    WHERE iocname NOT LIKE 'PSCTRL_%'"""
 """Sql query for getting iocnames and their running status"""
@@ -95,22 +102,16 @@ class IocDataSource(object):
         """
         self.mysql_abstraction_layer = mysql_abstraction_layer
 
-    def _query_and_normalise(self, sqlquery, bind_vars=None):
+    def _query_and_normalise(self, sqlquery, bind_vars=None, name=None):
         """
-        Executes the given query to the database and converts the data in each row from bytearray to a normal string.
+        Executes the given query to the database. The queries convert their text columns to utf-8, so the rows are
+        returned as the connector reads them, with strings rather than bytearrays.
         :param sqlquery: The query to execute.
         :param bind_vars: Any variables to bind to query. Defaults to None.
-        :return: A list of lists of strings, representing the data from the table.
+        :param name: The name to record the query's statistics against. Defaults to naming it from its SQL.
+        :return: A list of rows of strings, representing the data from the table.
         """
-        # Get as a plain list of lists
-        values = [list(element) for element in self.mysql_abstraction_layer.query(sqlquery, bind_vars)]
-
-        # Convert any bytearrays
-        for i, pv in enumerate(values):
-            for j, element in enumerate(pv):
-                if type(element) == bytearray:
-                    values[i][j] = element.decode("utf-8")
-        return values
+        return self.mysql_abstraction_layer.query(sqlquery, bind_vars, name=name)
 
     def get_iocs_and_descriptions(self):
         """
@@ -120,7 +121,8 @@ class IocDataSource(object):
             dict : IOCs and their descriptions
         """
         try:
-            ioc_and_description_list = self._query_and_normalise(GET_IOCS_AND_DESCRIPTIONS)
+            ioc_and_description_list = self._query_and_normalise(GET_IOCS_AND_DESCRIPTIONS,
+                                                                 name="GET_IOCS_AND_DESCRIPTIONS")
             return dict((element[0], dict(description=element[1])) for element in ioc_and_description_list)
         except Exception as err:
             print_and_log("could not get IOCS from database: %s" % err, "MAJOR", "DBSVR")
@@ -134,7 +136,8 @@ class IocDataSource(object):
             list : A list of the names of PVs associated with the parameter category
         """
         try:
-            values = self._query_and_normalise(GET_PVNAMES_IN_PVCATEGORY, ("%{0}%".format(category),))
+            values = self._query_and_normalise(GET_PVNAMES_IN_PVCATEGORY, ("%{0}%".format(category),),
+                                               name="GET_PVNAMES_IN_PVCATEGORY")
             return [six.text_type(val[0]) for val in values]
         except Exception as err:
             print_and_log("could not get parameters category %s from database: %s" % (category, err), "MAJOR", "DBSVR")
@@ -147,7 +150,7 @@ class IocDataSource(object):
         Returns: list of tuples (ioc name, pv name, infoname, value)
         """
 
-        data = self._query_and_normalise(GET_PV_INFO_QUERY)
+        data = self._query_and_normalise(GET_PV_INFO_QUERY, name="GET_PV_INFO_QUERY")
         pv_logging_info = {}
         for iocname, pvname, infoname, value in data:
             ioc_values = pv_logging_info.get(iocname, [])
@@ -194,7 +197,8 @@ class IocDataSource(object):
                     sql_query = GET_PVS_WITH_TEMPLATED_INTEREST.format(interest=interest)
                 else:
                     sql_query = GET_PVS_WITH_DETAILS
-            return self._query_and_normalise(sql_query, bind_vars)
+            name = "GET_INTERESTING_PVS_{}".format(interest or "ALL")
+            return self._query_and_normalise(sql_query, bind_vars, name=name)
         except Exception as err:
             print_and_log("issue with getting interesting PVs: %s" % err, "MAJOR", "DBSVR")
             return []
@@ -207,7 +211,7 @@ class IocDataSource(object):
             list : A list of the PVs in running IOCs
         """
         try:
-            return self._query_and_normalise(GET_ACTIVE_IOC_INTERESTING_PVS)
+            return self._query_and_normalise(GET_ACTIVE_IOC_INTERESTING_PVS, name="GET_ACTIVE_IOC_INTERESTING_PVS")
         except Exception as err:
             print_and_log("issue with getting active PVs: %s" % err, "MAJOR", "DBSVR")
             return []
@@ -220,11 +224,20 @@ class IocDataSource(object):
             list: iocs and running states
         """
         try:
-            return self._query_and_normalise(GET_IOCS_AND_RUNNING_STATUS)
+            return self._query_and_normalise(GET_IOCS_AND_RUNNING_STATUS, name="GET_IOCS_AND_RUNNING_STATUS")
         except Exception as err:
             print_and_log("issue with reading IOC statuses before update: %s" % err, "MAJOR", "DBSVR")
             return []
 
+    def get_query_statistics(self):
+        """
+        Get the statistics recorded for the queries made to the database.
+
+        Returns:
+            dict: query name to a dictionary of its statistics
+        """
+        return self.mysql_abstraction_layer.query_statistics()
+
     def update_ioc_is_running(self, ioc_name, running):
         """
         Update running state in the database.
@@ -233,11 +246,27 @@ class IocDataSource(object):
             ioc_name: iocs name
             running: the new running state
         """
+        self.update_iocs_are_running([(ioc_name, running)])
+
+    def update_iocs_are_running(self, running_states):
+        """
+        Update the running state of several iocs in the database in a single transaction.
+
+        Args:
+            running_states: list of tuples (ioc name, new running state)
+        """
         try:
-            self.mysql_abstraction_layer.update(UPDATE_IOC_IS_RUNNING, (running, ioc_name))
+            with self.mysql_abstraction_layer.transaction() as db:
+                for ioc_name, running in running_states:
+                    try:
+                        db.update(UPDATE_IOC_IS_RUNNING, (running, ioc_name), name="UPDATE_IOC_IS_RUNNING")
+                    except Exception as err:
+                        print_and_log("Failed to update ioc running state in database ({ioc_name},{running}): "
+                                      "{error}".format(ioc_name=ioc_name, running=running, error=err),
+                                      "MAJOR", "DBSVR")
         except Exception as err:
-            print_and_log("Failed to update ioc running state in database ({ioc_name},{running}): {error}"
-                          .format(ioc_name=ioc_name, running=running, error=err), "MAJOR", "DBSVR")
+            print_and_log("Failed to update ioc running states in database: {error}".format(error=err),
+                          "MAJOR", "DBSVR")
 
     def insert_ioc_start(self, ioc_name, pid, exe_path, pv_database, prefix):
         """
@@ -251,20 +280,26 @@ class IocDataSource(object):
                 For example: {'pv name': {'info_field': {'archive': '', 'INTEREST': 'HIGH'}, 'type': 'float'}}
             prefix: prefix for the pv server
         """
-        self._remove_ioc_from_db(ioc_name)
-        self._add_ioc_start_to_db(exe_path, ioc_name, pid)
+        try:
+            with self.mysql_abstraction_layer.transaction() as db:
+                self._remove_ioc_from_db(db, ioc_name)
+                self._add_ioc_start_to_db(db, exe_path, ioc_name, pid)
 
-        for pvname, pv in pv_database.items():
-            pv_fullname = "{}{}".format(prefix, pvname)
-            self._add_pv_to_db(ioc_name, pv, pv_fullname)
+                for pvname, pv in pv_database.items():
+                    pv_fullname = "{}{}".format(prefix, pvname)
+                    self._add_pv_to_db(db, ioc_name, pv, pv_fullname)
 
-            for info_field_name, info_field_value in pv.get(PV_INFO_FIELD_NAME, {}).items():
-                self._add_pv_info_to_db(info_field_name, info_field_value, pv_fullname)
+                    for info_field_name, info_field_value in pv.get(PV_INFO_FIELD_NAME, {}).items():
+                        self._add_pv_info_to_db(db, info_field_name, info_field_value, pv_fullname)
+        except DatabaseError as err:
+            print_and_log("Failed to record start of ioc '{ioc_name}' in database: {error}"
+                          .format(ioc_name=ioc_name, error=err), "MAJOR", "DBSVR")
 
-    def _add_pv_info_to_db(self, info_field_name, info_field_value, pv_fullname):
+    def _add_pv_info_to_db(self, db, info_field_name, info_field_value, pv_fullname):
         """
         Add pv info to the database.
         Args:
+            db: unit of work to run the command in
             info_field_name: name of the info field
             info_field_value: value of the info field
             pv_fullname: full pv name with prefix
@@ -273,16 +308,17 @@ class IocDataSource(object):
 
         """
         try:
-            self.mysql_abstraction_layer.update(UPDATE_PV_INFO, (pv_fullname, info_field_name, info_field_value))
+            db.update(UPDATE_PV_INFO, (pv_fullname, info_field_name, info_field_value), name="UPDATE_PV_INFO")
         except Exception as err:
             print_and_log("Failed to insert pv info for pv '{pvname}' with name '{name}' and value "
                           "'{value}': {error}".format(pvname=pv_fullname, name=info_field_name,
                                                       value=info_field_value, error=err), "MAJOR", "DBSVR")
 
-    def _add_pv_to_db(self, ioc_name, pv, pv_fullname):
+    def _add_pv_to_db(self, db, ioc_name, pv, pv_fullname):
         """
         Add a pv to the database
         Args:
+            db: unit of work to run the command in
             ioc_name: name of the ioc
             pv: pv information
             pv_fullname: pv's full name
@@ -290,39 +326,41 @@ class IocDataSource(object):
         try:
             pv_type = pv.get('type', "float")
             description = pv.get(PV_DESCRIPTION_NAME, "")
-            self.mysql_abstraction_layer.update(INSERT_PV_DETAILS, (pv_fullname, pv_type, description, ioc_name))
+            db.update(INSERT_PV_DETAILS, (pv_fullname, pv_type, description, ioc_name), name="INSERT_PV_DETAILS")
         except DatabaseError as err:
             print_and_log("Failed to insert pv data for pv '{pvname}' with contents '{pv}': {error}"
                           .format(ioc_name=ioc_name, pvname=pv_fullname, pv=pv, error=err), "MAJOR", "DBSVR")
 
-    def _add_ioc_start_to_db(self, exe_path, ioc_name, pid):
+    def _add_ioc_start_to_db(self, db, exe_path, ioc_name, pid):
         """
         Add the ioc start to the database
         Args:
+            db: unit of work to run the command in
             exe_path: the path to the executab;e
             ioc_name: the ioc name
             pid: the process id
         """
         try:
 
-            self.mysql_abstraction_layer.update(INSERT_IOC_STARTED_DETAILS, (ioc_name, pid, exe_path))
+            db.update(INSERT_IOC_STARTED_DETAILS, (ioc_name, pid, exe_path), name="INSERT_IOC_STARTED_DETAILS")
         except DatabaseError as err:
             print_and_log("Failed to insert ioc into database ({ioc_name},{pid},{exepath}): {error}"
                           .format(ioc_name=ioc_name, pid=pid, exepath=exe_path, error=err), "MAJOR", "DBSVR")
 
-    def _remove_ioc_from_db(self, ioc_name):
+    def _remove_ioc_from_db(self, db, ioc_name):
         """
         Remove the ioc data from the database
         Args:
+            db: unit of work to run the command in
             ioc_name: name of the ioc
         """
         try:
-            self.mysql_abstraction_layer.update(DELETE_IOC_RUN_STATE, (ioc_name,))
+            db.update(DELETE_IOC_RUN_STATE, (ioc_name,), name="DELETE_IOC_RUN_STATE")
         except DatabaseError as err:
             print_and_log("Failed to delete ioc, '{ioc_name}', from iocrt: {error}"
                           .format(ioc_name=ioc_name, error=err), "MAJOR", "DBSVR")
         try:
-            self.mysql_abstraction_layer.update(DELETE_IOC_PV_DETAILS, (ioc_name,))
+            db.update(DELETE_IOC_PV_DETAILS, (ioc_name,), name="DELETE_IOC_PV_DETAILS")
         except DatabaseError as err:
             print_and_log("Failed to delete ioc, '{ioc_name}', from pvs: {error}"
                           .format(ioc_name=ioc_name, error=err), "MAJOR", "DBSVR")
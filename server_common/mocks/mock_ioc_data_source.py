@@ -52,6 +52,13 @@ class MockIocDataSource(object):
     def update_ioc_is_running(self, iocname, running):
         self.iocs[iocname]["running"] = running
 
+    def get_query_statistics(self):
+        return {}
+
+    def update_iocs_are_running(self, running_states):
+        for iocname, running in running_states:
+            self.update_ioc_is_running(iocname, running)
+
     def get_interesting_pvs(self, level="", ioc=None):
         """
         Gets a list of interesting pvs based on their level. The interesting pvs are fake pvs with data defined at the
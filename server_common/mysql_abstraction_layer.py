@@ -17,9 +17,20 @@ Abstracting out the sql connection.
 # https://www.eclipse.org/org/documents/epl-v10.php or
 # http://opensource.org/licenses/eclipse-1.0.php
 
+from collections import OrderedDict
+from contextlib import contextmanager
+from threading import RLock
+from time import time
+
 import mysql.connector
 from server_common.utilities import print_and_log
 
+# Default time, in seconds, a command can take (including waiting for a connection) before it is logged as slow
+SLOW_QUERY_THRESHOLD = 1.0
+
+# Maximum length of the name given to a command which has not been named, taken from its SQL
+MAX_QUERY_NAME_LENGTH = 60
+
 
 class DatabaseError(Exception):
     """
@@ -29,10 +40,75 @@ class DatabaseError(Exception):
         self.message = message
 
 
+def query_name(command, name=None):
+    """
+    Name to record statistics for a command against.
+
+    Args:
+        command (string): the SQL command
+        name (string): the name given to the command; None to name it from its SQL
+
+    Returns: the name
+    """
+    if name is not None:
+        return name
+    return " ".join(command.split())[:MAX_QUERY_NAME_LENGTH]
+
+
+class QueryStatistics(object):
+    """
+    Thread safe record of how long each named command takes, how many rows it touches and how long it waited for a
+    connection from the pool.
+    """
+
+    def __init__(self):
+        self._lock = RLock()
+        self._statistics = OrderedDict()
+
+    def record(self, name, duration, row_count, pool_wait, failed=False, slow=False):
+        """
+        Record a run of a command.
+
+        Args:
+            name (string): name of the command
+            duration (float): time in seconds the command took to execute
+            row_count (int): number of rows returned or affected
+            pool_wait (float): time in seconds spent waiting for a connection
+            failed (bool): True if the command raised an error
+            slow (bool): True if the command was slower than the threshold
+        """
+        with self._lock:
+            statistics = self._statistics.get(name)
+            if statistics is None:
+                statistics = dict(count=0, errors=0, slow=0, rows=0, total_time=0.0, max_time=0.0,
+                                  total_pool_wait=0.0, max_pool_wait=0.0)
+                self._statistics[name] = statistics
+            statistics["count"] += 1
+            statistics["errors"] += 1 if failed else 0
+            statistics["slow"] += 1 if slow else 0
+            statistics["rows"] += row_count
+            statistics["total_time"] += duration
+            statistics["max_time"] = max(statistics["max_time"], duration)
+            statistics["total_pool_wait"] += pool_wait
+            statistics["max_pool_wait"] = max(statistics["max_pool_wait"], pool_wait)
+
+    def summary(self):
+        """
+        Returns: dictionary of command name to a dictionary of its statistics, times are in seconds
+        """
+        with self._lock:
+            summary = OrderedDict()
+            for name, statistics in self._statistics.items():
+                summary[name] = dict(statistics)
+                summary[name]["mean_time"] = statistics["total_time"] / statistics["count"]
+            return summary
+
+
 class AbstratSQLCommands(object):
     """
     Abstract base class for sql commands for testing
     """
+
     @staticmethod
     def generate_in_binding(parameter_count):
         """
@@ -47,50 +123,72 @@ class AbstratSQLCommands(object):
         """
         return ", ".join(["%s"] * parameter_count)
 
-    def query_returning_cursor(self, command, bound_variables):
+    def query_returning_cursor(self, command, bound_variables, name=None):
         """
         Generator which returns rows from query.
         Args:
             command: command to run
             bound_variables: any bound variables
+            name: name to record statistics for the query against; None to name it from its SQL
 
         Yields: a row from the querry
 
         """
         raise NotImplemented()
 
-    def _execute_command(self, command, is_query, bound_variables):
+    def _execute_command(self, command, is_query, bound_variables, name=None):
         """Executes a command on the database, and returns all values
 
         Args:
             command (string): the SQL command to run
             is_query (boolean): is this a query (i.e. do we expect return values)
+            name (string): name to record statistics for the command against; None to name it from its SQL
 
         Returns:
             values (list): list of all rows returned. None if not is_query
         """
         raise NotImplementedError()
 
-    def query(self, command, bound_variables=None):
+    def query_statistics(self):
+        """
+        Returns: dictionary of command name to a dictionary of the statistics recorded for it; empty if statistics
+            are not recorded
+        """
+        return {}
+
+    @contextmanager
+    def transaction(self):
+        """
+        Context manager for a unit of work; the commands run on the object it yields are committed together when the
+        block exits and rolled back if it raises. This base implementation has no transaction so runs each command as
+        it is issued.
+
+        Yields: object with query, update and query_returning_cursor methods to run commands in the unit of work
+        """
+        yield self
+
+    def query(self, command, bound_variables=None, name=None):
         """Executes a query on the database, and returns all values
 
         Args:
             command (string): the SQL command to run
             bound_variables (tuple|dict): a tuple of parameters to bind into the query; Default no parameters to bind
+            name (string): name to record statistics for the query against; Default name it from its SQL
 
         Returns:
             values (list): list of all rows returned
         """
-        return self._execute_command(command, True, bound_variables)
+        return self._execute_command(command, True, bound_variables, name=name)
 
-    def update(self, command, bound_variables=None):
+    def update(self, command, bound_variables=None, name=None):
         """Executes an update on the database, and returns all values
 
         Args:
             command (string): the SQL command to run
             bound_variables (tuple|dict): a tuple of parameters to bind into the query; Default no parameters to bind
+            name (string): name to record statistics for the update against; Default name it from its SQL
         """
-        self._execute_command(command, False, bound_variables)
+        self._execute_command(command, False, bound_variables, name=name)
 
 
 class SQLAbstraction(AbstratSQLCommands):
@@ -101,7 +199,10 @@ class SQLAbstraction(AbstratSQLCommands):
     # Number of available simultaneous connections to each connection pool
     POOL_SIZE = 16
 
-    def __init__(self, dbid, user, password, host="127.0.0.1"):
+    # Isolation level for units of work, each statement sees data committed before it started
+    TRANSACTION_ISOLATION_LEVEL = "READ COMMITTED"
+
+    def __init__(self, dbid, user, password, host="127.0.0.1", slow_query_threshold=SLOW_QUERY_THRESHOLD):
         """
         Constructor.
 
@@ -110,12 +211,16 @@ class SQLAbstraction(AbstratSQLCommands):
             user (string): The username to use to connect to the database
             password (string): The password to use to connect to the database
             host (string): The host address to use, defaults to local host
+            slow_query_threshold (float): time in seconds a command can take, including waiting for a connection,
+                before it is logged as slow
         """
         super(SQLAbstraction, self).__init__()
         self._dbid = dbid
         self._user = user
         self._password = password
         self._host = host
+        self._slow_query_threshold = slow_query_threshold
+        self._statistics = QueryStatistics()
         self._pool_name = self._generate_pool_name()
         self._start_connection_pool()
 
@@ -134,12 +239,13 @@ class SQLAbstraction(AbstratSQLCommands):
         return "DBSVR_%s_%s_%s" % (self._host, self._dbid, self._user)
 
     def _start_connection_pool(self):
-        """Initialises a connection pool
+        """Initialises a connection pool. Connections autocommit so that each statement outside of a transaction sees
+        the latest data without having to commit to refresh its snapshot.
         """
         print_and_log("Creating a new connection pool: " + self._pool_name)
         conn = mysql.connector.connect(user=self._user, password=self._password, host=self._host, database=self._dbid,
                                        pool_name=self._pool_name,
-                                       pool_size=SQLAbstraction.POOL_SIZE)
+                                       pool_size=SQLAbstraction.POOL_SIZE, autocommit=True)
         curs = conn.cursor()
         # Check db exists
         curs.execute("SHOW TABLES")
@@ -155,67 +261,261 @@ class SQLAbstraction(AbstratSQLCommands):
         except Exception as err:
             raise Exception("Unable to get connection from pool: %s" % err.message)
 
-    def _execute_command(self, command, is_query, bound_variables):
+    def _execute_command(self, command, is_query, bound_variables, name=None):
         """Executes a command on the database, and returns all values
 
         Args:
             command (string): the SQL command to run
             is_query (boolean): is this a query (i.e. do we expect return values)
+            name (string): name to record statistics for the command against; None to name it from its SQL
 
         Returns:
             values (list): list of all rows returned. None if not is_query
         """
         conn = None
-        curs = None
-        values = None
+        start = time()
         try:
             conn = self._get_connection()
-            curs = conn.cursor()
-            curs.execute(command, bound_variables)
-            if is_query:
-                values = curs.fetchall()
-            # Commit as part of the query or results won't be updated between subsequent transactions. Can lead
-            # to values not auto-updating in the GUI.
-            conn.commit()
-        except Exception as err:
-            print_and_log("Error executing command on database: {0}".format(err), "MAJOR")
-            raise DatabaseError(str(err))
+            with self._timed(name, command, time() - start) as timer:
+                values, timer.row_count = _execute_on_connection(conn, command, is_query, bound_variables)
+            return values
         finally:
-            if curs is not None:
-                curs.close()
             if conn is not None:
                 conn.close()
-        return values
 
-    def query_returning_cursor(self, command, bound_variables):
+    def query_returning_cursor(self, command, bound_variables, name=None):
         """
         Generator which returns rows from query.
         Args:
             command: command to run
             bound_variables: any bound variables
+            name: name to record statistics for the query against; None to name it from its SQL
 
         Yields: a row from the querry
 
         """
 
         conn = None
-        curs = None
+        start = time()
         try:
             conn = self._get_connection()
-            curs = conn.cursor()
-            curs.execute(command, bound_variables)
+            with self._timed(name, command, time() - start) as timer:
+                for row in _query_returning_cursor_on_connection(conn, command, bound_variables):
+                    timer.row_count += 1
+                    with timer.paused():
+                        yield row
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def query_statistics(self):
+        """
+        Returns: dictionary of command name to a dictionary of the statistics recorded for it, times are in seconds
+        """
+        return self._statistics.summary()
 
-            for row in curs:
-                yield row
+    @contextmanager
+    def _timed(self, name, command, pool_wait):
+        """
+        Context manager which records the statistics for running a command, logging it if it is slow.
 
-            # Commit as part of the query or results won't be updated between subsequent transactions. Can lead
-            # to values not auto-updating in the GUI.
-            conn.commit()
-        except Exception as err:
-            print_and_log("Error executing command on database: {0}".format(err), "MAJOR")
-            raise DatabaseError(str(err))
+        Args:
+            name (string): name of the command; None to name it from its SQL
+            command (string): the SQL command
+            pool_wait (float): time in seconds spent waiting for a connection to run the command on
+
+        Yields: _CommandTimer: set its row_count to the number of rows returned or affected, and pause it while
+            the caller has control
+        """
+        name = query_name(command, name)
+        timer = _CommandTimer()
+        failed = True
+        start = time()
+        try:
+            yield timer
+            failed = False
+        finally:
+            duration = time() - start - timer.paused_time
+            slow = duration + pool_wait > self._slow_query_threshold
+            self._statistics.record(name, duration, timer.row_count, pool_wait, failed, slow)
+            if slow:
+                print_and_log("Slow database command '{0}': took {1:.3f}s with {2:.3f}s waiting for a connection, "
+                              "{3} rows".format(name, duration, pool_wait, timer.row_count), "MINOR")
+
+    @contextmanager
+    def transaction(self):
+        """
+        Context manager for a unit of work. All the commands run on the yielded object share a single pooled
+        connection and are committed together when the block exits, or rolled back if the block raises.
+
+        A command which fails inside the unit of work raises a DatabaseError but does not abort the transaction, so
+        callers can log it and carry on with the remaining commands.
+
+        Yields: _SQLTransaction: the unit of work to run commands on
+        """
+        conn = None
+        try:
+            try:
+                conn = self._get_connection()
+                conn.start_transaction(isolation_level=SQLAbstraction.TRANSACTION_ISOLATION_LEVEL)
+            except Exception as err:
+                print_and_log("Error starting transaction on database: {0}".format(err), "MAJOR")
+                raise DatabaseError(str(err))
+
+            try:
+                yield _SQLTransaction(conn, self._timed)
+            except Exception:
+                _rollback(conn)
+                raise
+
+            try:
+                conn.commit()
+            except Exception as err:
+                print_and_log("Error committing transaction on database: {0}".format(err), "MAJOR")
+                _rollback(conn)
+                raise DatabaseError(str(err))
         finally:
-            if curs is not None:
-                curs.close()
             if conn is not None:
                 conn.close()
+
+
+class _SQLTransaction(AbstratSQLCommands):
+    """
+    A unit of work on a single connection; commands are committed or rolled back by SQLAbstraction.transaction.
+    """
+
+    def __init__(self, conn, timed):
+        """
+        Constructor.
+
+        Args:
+            conn: the connection, with a transaction started, to run commands on
+            timed: context manager, taking the command name, command and pool wait, to record a command's statistics
+        """
+        super(_SQLTransaction, self).__init__()
+        self._conn = conn
+        self._timed = timed
+
+    def _execute_command(self, command, is_query, bound_variables, name=None):
+        """Executes a command in the transaction, and returns all values
+
+        Args:
+            command (string): the SQL command to run
+            is_query (boolean): is this a query (i.e. do we expect return values)
+            name (string): name to record statistics for the command against; None to name it from its SQL
+
+        Returns:
+            values (list): list of all rows returned. None if not is_query
+        """
+        with self._timed(name, command, 0.0) as timer:
+            values, timer.row_count = _execute_on_connection(self._conn, command, is_query, bound_variables)
+        return values
+
+    def query_returning_cursor(self, command, bound_variables, name=None):
+        """
+        Generator which returns rows from query run in the transaction.
+        Args:
+            command: command to run
+            bound_variables: any bound variables
+            name: name to record statistics for the query against; None to name it from its SQL
+
+        Yields: a row from the querry
+
+        """
+        with self._timed(name, command, 0.0) as timer:
+            for row in _query_returning_cursor_on_connection(self._conn, command, bound_variables):
+                timer.row_count += 1
+                with timer.paused():
+                    yield row
+
+
+class _CommandTimer(object):
+    """
+    Holds the number of rows a timed command returned or affected, and the time to leave out of its duration.
+    """
+
+    def __init__(self):
+        self.row_count = 0
+        self.paused_time = 0.0
+
+    @contextmanager
+    def paused(self):
+        """
+        Context manager which leaves the time spent in its block out of the command's duration, e.g. while the caller
+        processes a row yielded from a cursor.
+        """
+        start = time()
+        try:
+            yield
+        finally:
+            self.paused_time += time() - start
+
+
+def _execute_on_connection(conn, command, is_query, bound_variables):
+    """Executes a command on a connection, and returns all values
+
+    Args:
+        conn: the connection to use
+        command (string): the SQL command to run
+        is_query (boolean): is this a query (i.e. do we expect return values)
+        bound_variables (tuple|dict): parameters to bind into the command
+
+    Returns:
+        values (list): list of all rows returned. None if not is_query
+        row_count (int): number of rows returned or affected
+    """
+    curs = None
+    values = None
+    try:
+        curs = conn.cursor()
+        curs.execute(command, bound_variables)
+        if is_query:
+            values = curs.fetchall()
+            row_count = len(values)
+        else:
+            row_count = max(curs.rowcount, 0)
+    except Exception as err:
+        print_and_log("Error executing command on database: {0}".format(err), "MAJOR")
+        raise DatabaseError(str(err))
+    finally:
+        if curs is not None:
+            curs.close()
+    return values, row_count
+
+
+def _query_returning_cursor_on_connection(conn, command, bound_variables):
+    """
+    Generator which returns rows from query on a connection.
+    Args:
+        conn: the connection to use
+        command: command to run
+        bound_variables: any bound variables
+
+    Yields: a row from the querry
+    """
+    curs = None
+    try:
+        curs = conn.cursor()
+        curs.execute(command, bound_variables)
+
+        for row in curs:
+            yield row
+    except Exception as err:
+        print_and_log("Error executing command on database: {0}".format(err), "MAJOR")
+        raise DatabaseError(str(err))
+    finally:
+        if curs is not None:
+            curs.close()
+
+
+def _rollback(conn):
+    """
+    Roll back the transaction on a connection, logging rather than raising if this fails.
+
+    Args:
+        conn: the connection to roll back
+    """
+    try:
+        conn.rollback()
+    except Exception as err:
+        print_and_log("Error rolling back transaction on database: {0}".format(err), "MAJOR")
@@ -16,11 +16,24 @@
 
 BLOCKSERVER = "BLOCKSERVER:"
 
+COMPACT_SUFFIX = ":B64"
+"""Suffix of PVs publishing a payload compressed and base64 encoded, alongside the PV with it compressed and hexed"""
+
 
 def prepend_blockserver(base_name):
     return BLOCKSERVER + base_name
 
 
+def compact_pv_name(pv_name):
+    """
+    Args:
+        pv_name: name of a PV holding a compressed and hexed payload
+
+    Returns: name of the PV holding the same payload compressed and base64 encoded
+    """
+    return pv_name + COMPACT_SUFFIX
+
+
 class DatabasePVNames:
     """
     Holds and manages database server PV names.
@@ -36,6 +49,8 @@ class DatabasePVNames:
     BEAMLINE_PARS = prepend_blockserver('BEAMLINE_PARS')
     USER_PARS = prepend_blockserver('USER_PARS')
     IOCS_NOT_TO_STOP = prepend_blockserver('IOCS_NOT_TO_STOP')
+    QUERY_STATISTICS = prepend_blockserver('QUERY_STATISTICS')
+    PUT_STATISTICS = prepend_blockserver('PUT_STATISTICS')
 
 
 class BlockserverPVNames:
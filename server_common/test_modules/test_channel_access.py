@@ -10,7 +10,7 @@ from hamcrest import *
 
 import server_common
 from server_common.channel_access import ChannelAccess, NUMBER_OF_CAPUT_THREADS, maximum_severity, AlarmSeverity, \
-    AlarmStatus
+    AlarmStatus, PutExecutor
 
 thread_ids = Queue()
 thread_calls = Queue()
@@ -51,7 +51,8 @@ class TestChannelAccess(unittest.TestCase):
         assert_that(len(empty_queue(thread_calls)), is_(1), "call is called once")
 
 
-    def test_WHEN_multiple_ca_puts_and_not_wait_THEN_thread_count_is_limited(self):
+    @patch("server_common.channel_access.ChannelAccess.put_executor", new_callable=PutExecutor)
+    def test_WHEN_multiple_ca_puts_and_not_wait_THEN_thread_count_is_limited(self, _):
         initial_thread_count = threading.active_count()
 
         the_future = []
@@ -89,6 +90,79 @@ class TestChannelAccess(unittest.TestCase):
                     "Number of ids should be the same as number of threads so that multiple tasks use the same thread")
 
 
+    def test_WHEN_wait_for_tasks_THEN_puts_complete_and_pool_is_kept(self):
+        executor = ChannelAccess.put_executor
+        future = ChannelAccess.caput("block", 10, False, set_pv_value=set_pv_value)
+
+        ChannelAccess.wait_for_tasks()
+
+        assert_that(future.done(), is_(True))
+        assert_that(ChannelAccess.put_executor, is_(same_instance(executor)))
+
+
+class TestPutExecutor(unittest.TestCase):
+
+    def setUp(self):
+        self.release_puts = threading.Event()
+        self.addCleanup(self.release_puts.set)
+
+    def _blocked_put(self):
+        self.release_puts.wait(5)
+
+    def test_GIVEN_queue_full_WHEN_submit_THEN_put_rejected_and_counted(self):
+        executor = PutExecutor(max_workers=1, max_queued=1, queue_timeout=0.1)
+        executor.submit("PV1", self._blocked_put)
+        executor.submit("PV1", self._blocked_put)
+
+        result = executor.submit("PV2", self._blocked_put)
+
+        assert_that(result, is_(none()))
+        statistics = executor.statistics()
+        assert_that(statistics["rejected"], is_(1))
+        assert_that(statistics["rejected_by_pv"], is_({"PV2": 1}))
+        assert_that(statistics["queue_depth"], is_(1))
+        assert_that(statistics["outstanding"], is_(2))
+
+    def test_GIVEN_queue_full_WHEN_space_frees_while_waiting_THEN_put_accepted(self):
+        executor = PutExecutor(max_workers=1, max_queued=0, queue_timeout=5)
+        executor.submit("PV1", self._blocked_put)
+        threading.Timer(0.2, self.release_puts.set).start()
+
+        result = executor.submit("PV2", lambda: None)
+
+        assert_that(result, is_(not_none()))
+        assert_that(executor.statistics()["rejected"], is_(0))
+
+    def test_GIVEN_puts_running_WHEN_wait_for_tasks_with_timeout_THEN_false_returned(self):
+        executor = PutExecutor(max_workers=1)
+        executor.submit("PV1", self._blocked_put)
+
+        assert_that(executor.wait_for_tasks(0.1), is_(False))
+
+    def test_WHEN_puts_complete_THEN_counted_with_latency(self):
+        executor = PutExecutor(max_workers=2)
+        self.release_puts.set()
+        for _ in range(3):
+            executor.submit("PV1", self._blocked_put)
+
+        executor.wait_for_tasks()
+
+        statistics = executor.statistics()
+        assert_that(statistics["completed"], is_(3))
+        assert_that(statistics["outstanding"], is_(0))
+        assert_that(statistics["max_latency"], is_(greater_than_or_equal_to(statistics["mean_latency"])))
+
+    def test_GIVEN_put_raises_WHEN_complete_THEN_not_outstanding(self):
+        executor = PutExecutor(max_workers=1)
+
+        def failing_put():
+            raise ValueError()
+        future = executor.submit("PV1", failing_put)
+
+        assert_that(executor.wait_for_tasks(5), is_(True))
+        assert_that(future.exception(), is_(instance_of(ValueError)))
+
+
 class TestMaximumSeverity(unittest.TestCase):
 
     def test_GIVEN_empty_list_WHEN_get_THEN_None_returned(self):
@@ -1,5 +1,18 @@
+import base64
+import json
+import os
+import shutil
+import tempfile
+import threading
 import unittest
-from server_common.utilities import create_pv_name, remove_from_end, lowercase_and_make_unique
+from xml.dom import minidom
+from xml.etree import ElementTree
+from server_common.utilities import create_pv_name, remove_from_end, lowercase_and_make_unique, \
+    element_to_pretty_xml, waveform_to_string, dehex_and_decompress_waveform, compress_and_hex, \
+    json_compress_and_hex, dehex_decompress_and_load_json, compress_and_base64, base64_and_decompress, \
+    json_compress_and_base64, compact_waveform_length, set_compression_level, dehex_and_decompress, LogWriter, \
+    set_logger, replace_file
+from server_common.loggers.logger import Logger
 
 
 class TestCreatePVName(unittest.TestCase):
@@ -171,3 +184,208 @@ class TestMakeUniqueAndLowercase(unittest.TestCase):
         result = lowercase_and_make_unique(["a", "A"])
         self.assertEqual(1, len(result))
         self.assertIn("a", result)
+
+
+class TestElementToPrettyXml(unittest.TestCase):
+    def _assert_same_as_minidom(self, root):
+        expected = minidom.parseString(ElementTree.tostring(root)).toprettyxml()
+        self.assertEqual(expected, element_to_pretty_xml(root))
+
+    def test_WHEN_element_is_empty_THEN_output_matches_minidom(self):
+        self._assert_same_as_minidom(ElementTree.Element("blocks"))
+
+    def test_WHEN_element_has_namespaces_and_attributes_THEN_output_matches_minidom(self):
+        root = ElementTree.Element("iocs")
+        root.attrib["xmlns"] = "http://epics.isis.rl.ac.uk/schema/iocs/1.0"
+        root.attrib["xmlns:ioc"] = "http://epics.isis.rl.ac.uk/schema/iocs/1.0"
+        ioc = ElementTree.SubElement(root, "ioc")
+        ioc.set("name", "SIMPLE")
+        ioc.set("autostart", "true")
+        ElementTree.SubElement(ioc, "macros")
+
+        self._assert_same_as_minidom(root)
+
+    def test_WHEN_element_has_nested_text_THEN_output_matches_minidom(self):
+        root = ElementTree.Element("meta")
+        ElementTree.SubElement(root, "description").text = "A description"
+        ElementTree.SubElement(root, "synoptic").text = ""
+        edits = ElementTree.SubElement(root, "edits")
+        ElementTree.SubElement(edits, "edit").text = "2018-01-01"
+        ElementTree.SubElement(edits, "edit").text = "2018-01-02"
+
+        self._assert_same_as_minidom(root)
+
+    def test_WHEN_text_and_attributes_contain_special_characters_THEN_output_matches_minidom(self):
+        root = ElementTree.Element("block", {"name": "a \"quoted\" <name> & more\n"})
+        ElementTree.SubElement(root, "name").text = "<tag> & \"quotes\" \r\n 'apostrophes'"
+
+        self._assert_same_as_minidom(root)
+
+    def test_WHEN_attributes_contain_tabs_and_carriage_returns_THEN_output_matches_minidom(self):
+        root = ElementTree.Element("block", {"name": "a\tb\rc\r\nd"})
+        ElementTree.SubElement(root, "pv", {"name": "\t\r"})
+
+        self._assert_same_as_minidom(root)
+
+    def test_WHEN_element_has_mixed_content_THEN_output_matches_minidom(self):
+        root = ElementTree.Element("group")
+        root.text = "leading text"
+        child = ElementTree.SubElement(root, "block")
+        child.tail = "trailing text"
+
+        self._assert_same_as_minidom(root)
+
+
+class _ArrayStub(object):
+    """Stands in for a numpy array, whose buffer holds more than one byte per element."""
+    def __init__(self, values):
+        self._values = values
+
+    def tolist(self):
+        return list(self._values)
+
+
+class TestWaveformToString(unittest.TestCase):
+    def test_WHEN_waveform_is_null_terminated_THEN_characters_before_null_returned(self):
+        self.assertEqual("abc", waveform_to_string([97, 98, 99, 0, 100, 0]))
+
+    def test_WHEN_waveform_is_not_null_terminated_THEN_all_characters_returned(self):
+        self.assertEqual("abc", waveform_to_string([97, 98, 99]))
+
+    def test_WHEN_waveform_is_empty_THEN_empty_string_returned(self):
+        self.assertEqual("", waveform_to_string([]))
+
+    def test_WHEN_waveform_starts_with_null_THEN_empty_string_returned(self):
+        self.assertEqual("", waveform_to_string([0, 97]))
+
+    def test_WHEN_waveform_has_characters_above_a_byte_THEN_characters_returned(self):
+        self.assertEqual(u"a\u03b1", waveform_to_string([97, 945, 0, 98]))
+
+    def test_WHEN_waveform_has_latin_1_characters_THEN_characters_returned(self):
+        self.assertEqual(u"\u00e9", waveform_to_string([233]))
+
+    def test_WHEN_waveform_is_array_THEN_converted_by_value(self):
+        self.assertEqual("ab", waveform_to_string(_ArrayStub([97, 98, 0])))
+
+    def test_WHEN_compressed_waveform_dehexed_THEN_original_returned(self):
+        waveform = [ord(c) for c in compress_and_hex(str("some config")).decode("ascii")] + [0, 0]
+
+        self.assertEqual(b"some config", dehex_and_decompress_waveform(waveform))
+
+
+class TestJsonCompressAndHex(unittest.TestCase):
+    def test_WHEN_object_converted_and_loaded_THEN_same_object_returned(self):
+        value = {"blocks": ["a", "b"], "description": u"\u03b1 config", "count": 2}
+
+        self.assertEqual(value, dehex_decompress_and_load_json(json_compress_and_hex(value)))
+
+    def test_WHEN_object_converted_THEN_same_as_compressing_its_json(self):
+        value = ["a", "b"]
+
+        self.assertEqual(compress_and_hex(str(json.dumps(value))), json_compress_and_hex(value))
+
+
+class TestCompressAndBase64(unittest.TestCase):
+    def tearDown(self):
+        set_compression_level(-1)
+
+    def test_WHEN_string_compressed_and_decompressed_THEN_original_returned(self):
+        self.assertEqual(b"some config", base64_and_decompress(compress_and_base64(str("some config"))))
+
+    def test_WHEN_string_compressed_THEN_smaller_than_compressed_and_hexed(self):
+        value = str(json.dumps([str(i) for i in range(1000)]))
+
+        self.assertLess(len(compress_and_base64(value)), len(compress_and_hex(value)))
+
+    def test_WHEN_object_converted_THEN_same_as_compressing_its_json(self):
+        value = ["a", "b"]
+
+        self.assertEqual(compress_and_base64(str(json.dumps(value))), json_compress_and_base64(value))
+
+    def test_WHEN_payload_fills_hex_waveform_THEN_fits_in_compact_waveform(self):
+        for hex_length in [2, 16000, 128000, 10002]:
+            payload = b"x" * (hex_length // 2)
+            self.assertGreaterEqual(compact_waveform_length(hex_length), len(base64.b64encode(payload)))
+
+    def test_WHEN_compression_level_set_THEN_output_still_decompresses(self):
+        value = str(json.dumps([str(i) for i in range(1000)]))
+        set_compression_level(0)
+        uncompressed = compress_and_hex(value)
+        set_compression_level(9)
+        compressed = compress_and_hex(value)
+
+        self.assertEqual(dehex_and_decompress(uncompressed), dehex_and_decompress(compressed))
+        self.assertLess(len(compressed), len(uncompressed))
+
+    def test_WHEN_compression_level_invalid_THEN_error_raised(self):
+        self.assertRaises(ValueError, set_compression_level, 10)
+
+
+class _RecordingLogger(Logger):
+    def __init__(self, block_until=None):
+        super(_RecordingLogger, self).__init__()
+        self.messages = []
+        self._block_until = block_until
+
+    def write_to_log(self, message, severity="INFO", src="BLOCKSVR"):
+        if self._block_until is not None:
+            self._block_until.wait()
+        self.messages.append((message, severity, src))
+
+
+class TestLogWriter(unittest.TestCase):
+    def tearDown(self):
+        set_logger(Logger())
+
+    def test_WHEN_messages_written_and_flushed_THEN_logged_in_order(self):
+        logger = _RecordingLogger()
+        set_logger(logger)
+        writer = LogWriter()
+
+        for i in range(10):
+            writer.write(str(i), "INFO", "TEST")
+
+        self.assertTrue(writer.flush(timeout=5))
+        self.assertEqual([str(i) for i in range(10)], [message.split(": ", 1)[1] for message, _, _ in logger.messages])
+        self.assertEqual(("INFO", "TEST"), logger.messages[0][1:])
+
+    def test_WHEN_nothing_written_THEN_flush_returns_immediately(self):
+        self.assertTrue(LogWriter().flush(timeout=0))
+
+    def test_GIVEN_queue_full_WHEN_message_written_THEN_dropped_and_counted_and_reported(self):
+        unblock = threading.Event()
+        logger = _RecordingLogger(unblock)
+        set_logger(logger)
+        writer = LogWriter(max_queued=1)
+
+        results = [writer.write("message", "INFO", "TEST") for _ in range(5)]
+        unblock.set()
+
+        self.assertTrue(writer.flush(timeout=5))
+        self.assertIn(False, results)
+        self.assertEqual(results.count(False), writer.dropped)
+        self.assertTrue(any("dropped" in message for message, _, _ in logger.messages))
+
+
+class TestReplaceFile(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.source_path = os.path.join(self.folder, "source.txt")
+        self.destination_path = os.path.join(self.folder, "destination.txt")
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def _write(self, path, data):
+        with open(path, "w") as f:
+            f.write(data)
+
+    def test_GIVEN_destination_exists_WHEN_replacing_THEN_destination_has_source_contents_and_source_gone(self):
+        self._write(self.source_path, "new")
+        self._write(self.destination_path, "old")
+
+        replace_file(self.source_path, self.destination_path)
+
+        with open(self.destination_path) as f:
+            self.assertEqual(f.read(), "new")
+        self.assertEqual(os.listdir(self.folder), ["destination.txt"])
@@ -15,6 +15,7 @@
 # http://opensource.org/licenses/eclipse-1.0.php
 
 import unittest
+from contextlib import contextmanager
 from hamcrest import *
 from mock import Mock
 
@@ -27,6 +28,7 @@ class SQLAbstractionStubForIOC(AbstratSQLCommands):
     def __init__(self, query_return):
         self.sql_param = []
         self.sql = []
+        self.transaction_count = 0
         self.query_return = []
         for ioc, values in query_return.items():
             for value in values:
@@ -34,13 +36,18 @@ class SQLAbstractionStubForIOC(AbstratSQLCommands):
                 pv_info.extend(value)
                 self.query_return.append(pv_info)
 
-    def _execute_command(self, command, is_query, bound_variables):
+    def _execute_command(self, command, is_query, bound_variables, name=None):
         self.sql.append(command)
         self.sql_param.append(bound_variables)
         if is_query:
             return self.query_return
         return None
 
+    @contextmanager
+    def transaction(self):
+        self.transaction_count += 1
+        yield self
+
 
 class TestIocDataSource(unittest.TestCase):
     def test_GIVEN_1_logging_annotations_request_WHEN_get_values_THEN_value_returned_grouped_by_ioc(self):
@@ -155,3 +162,39 @@ class TestIocDataSource(unittest.TestCase):
         assert_that(mysql_abstraction_layer.sql_param[4:], contains_inanyorder(
                 (expected_name1, name1, value1),
                 (expected_name1, name2, value2)))
+
+    def test_GIVEN_ioc_with_pvs_WHEN_pvdump_THEN_all_calls_made_in_one_transaction(self):
+        mysql_abstraction_layer = SQLAbstractionStubForIOC({})
+        data_source = IocDataSource(mysql_abstraction_layer)
+
+        data_source.insert_ioc_start("name", 12, "path", {"pv_name": {"info_field": {"INTEREST": "HIGH"}}}, "prefix")
+
+        assert_that(mysql_abstraction_layer.transaction_count, is_(1))
+        assert_that(mysql_abstraction_layer.sql, has_length(5))
+
+    def test_GIVEN_several_iocs_WHEN_update_running_states_THEN_all_updated_in_one_transaction(self):
+        mysql_abstraction_layer = SQLAbstractionStubForIOC({})
+        data_source = IocDataSource(mysql_abstraction_layer)
+
+        data_source.update_iocs_are_running([("IOC1", 1), ("IOC2", 0)])
+
+        assert_that(mysql_abstraction_layer.transaction_count, is_(1))
+        assert_that(mysql_abstraction_layer.sql_param, contains((1, "IOC1"), (0, "IOC2")))
+
+    def test_WHEN_get_iocs_and_running_status_THEN_rows_returned_as_layer_returns_them(self):
+        mysql_abstraction_layer = SQLAbstractionStubForIOC({})
+        mysql_abstraction_layer.query_return = [("IOC1", 1)]
+        data_source = IocDataSource(mysql_abstraction_layer)
+
+        result = data_source.get_iocs_and_running_status()
+
+        assert_that(result, is_(same_instance(mysql_abstraction_layer.query_return)))
+
+    def test_WHEN_get_interesting_pvs_THEN_text_columns_converted_to_utf8_by_query(self):
+        mysql_abstraction_layer = SQLAbstractionStubForIOC({})
+        data_source = IocDataSource(mysql_abstraction_layer)
+
+        data_source.get_interesting_pvs()
+
+        for column in ["pvinfo.pvname", "pvs.record_type", "pvs.record_desc", "pvs.iocname"]:
+            assert_that(mysql_abstraction_layer.sql[0], contains_string("CONVERT({} USING utf8mb4)".format(column)))
@@ -0,0 +1,168 @@
+# This file is part of the ISIS IBEX application.
+# Copyright (C) 2012-2016 Science & Technology Facilities Council.
+# All rights reserved.
+#
+# This program is distributed in the hope that it will be useful.
+# This program and the accompanying materials are made available under the
+# terms of the Eclipse Public License v1.0 which accompanies this distribution.
+# EXCEPT AS EXPRESSLY SET FORTH IN THE ECLIPSE PUBLIC LICENSE V1.0, THE PROGRAM
+# AND ACCOMPANYING MATERIALS ARE PROVIDED ON AN "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND.  See the Eclipse Public License v1.0 for more details.
+#
+# You should have received a copy of the Eclipse Public License v1.0
+# along with this program; if not, you can obtain a copy from
+# https://www.eclipse.org/org/documents/epl-v10.php or
+# http://opensource.org/licenses/eclipse-1.0.php
+import unittest
+
+from hamcrest import assert_that, is_
+from mock import patch, MagicMock
+
+from server_common.mysql_abstraction_layer import SQLAbstraction, DatabaseError
+
+
+class TestSQLAbstraction(unittest.TestCase):
+
+    def setUp(self):
+        connect_patcher = patch("server_common.mysql_abstraction_layer.mysql.connector.connect")
+        self.connect = connect_patcher.start()
+        self.addCleanup(connect_patcher.stop)
+        self.conn = MagicMock()
+        self.cursor = self.conn.cursor.return_value
+        self.cursor.fetchall.return_value = [("table",)]
+        self.cursor.rowcount = 1
+        self.connect.return_value = self.conn
+
+        self.sql_abstraction = SQLAbstraction("db", "user", "password")
+        self.connect.reset_mock()
+        self.conn.reset_mock()
+
+    def test_WHEN_pool_created_THEN_connections_autocommit(self):
+        SQLAbstraction("db", "user", "password")
+
+        assert_that(self.connect.call_args[1]["autocommit"], is_(True))
+
+    def test_WHEN_query_THEN_rows_returned_without_commit(self):
+        self.cursor.fetchall.return_value = [("a", 1)]
+
+        result = self.sql_abstraction.query("SELECT", None)
+
+        assert_that(result, is_([("a", 1)]))
+        self.conn.commit.assert_not_called()
+        self.conn.close.assert_called_once_with()
+
+    def test_WHEN_several_commands_in_transaction_THEN_one_connection_used_and_committed_once(self):
+        with self.sql_abstraction.transaction() as db:
+            db.update("UPDATE 1", None)
+            db.update("UPDATE 2", None)
+            db.query("SELECT", None)
+
+        assert_that(self.connect.call_count, is_(1))
+        self.conn.start_transaction.assert_called_once_with(isolation_level="READ COMMITTED")
+        assert_that(self.cursor.execute.call_count, is_(3))
+        self.conn.commit.assert_called_once_with()
+        self.conn.rollback.assert_not_called()
+        self.conn.close.assert_called_once_with()
+
+    def test_WHEN_transaction_raises_THEN_rolled_back_and_not_committed(self):
+        with self.assertRaises(ValueError):
+            with self.sql_abstraction.transaction() as db:
+                db.update("UPDATE 1", None)
+                raise ValueError()
+
+        self.conn.rollback.assert_called_once_with()
+        self.conn.commit.assert_not_called()
+        self.conn.close.assert_called_once_with()
+
+    def test_GIVEN_command_fails_in_transaction_WHEN_error_handled_THEN_transaction_still_committed(self):
+        self.cursor.execute.side_effect = [Exception("bad command"), None]
+
+        with self.sql_abstraction.transaction() as db:
+            with self.assertRaises(DatabaseError):
+                db.update("UPDATE 1", None)
+            db.update("UPDATE 2", None)
+
+        self.conn.commit.assert_called_once_with()
+
+    def test_GIVEN_commit_fails_WHEN_transaction_ends_THEN_database_error_raised_and_rolled_back(self):
+        self.conn.commit.side_effect = Exception("commit failed")
+
+        with self.assertRaises(DatabaseError):
+            with self.sql_abstraction.transaction() as db:
+                db.update("UPDATE 1", None)
+
+        self.conn.rollback.assert_called_once_with()
+        self.conn.close.assert_called_once_with()
+
+    def test_WHEN_query_THEN_rows_returned_as_connector_returns_them(self):
+        self.cursor.fetchall.return_value = [(bytearray(b"pv:name"), 1)]
+
+        result = self.sql_abstraction.query("SELECT", None)
+
+        assert_that(result, is_([(bytearray(b"pv:name"), 1)]))
+
+    def test_WHEN_named_query_run_twice_THEN_statistics_recorded_against_name(self):
+        self.cursor.fetchall.return_value = [("a",), ("b",)]
+
+        self.sql_abstraction.query("SELECT a FROM b", None, name="GET_A")
+        self.sql_abstraction.query("SELECT a FROM b", None, name="GET_A")
+
+        statistics = self.sql_abstraction.query_statistics()["GET_A"]
+        assert_that(statistics["count"], is_(2))
+        assert_that(statistics["rows"], is_(4))
+        assert_that(statistics["errors"], is_(0))
+
+    def test_WHEN_unnamed_update_run_THEN_statistics_recorded_against_its_sql(self):
+        self.cursor.rowcount = 3
+
+        self.sql_abstraction.update("UPDATE  iocrt\n   SET running=1", None)
+
+        assert_that(self.sql_abstraction.query_statistics()["UPDATE iocrt SET running=1"]["rows"], is_(3))
+
+    def test_GIVEN_command_fails_WHEN_run_THEN_error_recorded(self):
+        self.cursor.execute.side_effect = Exception("bad command")
+
+        with self.assertRaises(DatabaseError):
+            self.sql_abstraction.query("SELECT", None, name="BAD")
+
+        assert_that(self.sql_abstraction.query_statistics()["BAD"]["errors"], is_(1))
+
+    def test_GIVEN_query_waits_for_connection_WHEN_run_THEN_pool_wait_recorded_and_slow_query_logged(self):
+        # before getting a connection, after getting it, query start, query end
+        with patch("server_common.mysql_abstraction_layer.time", side_effect=[0.0, 1.5, 1.5, 1.75]), \
+                patch("server_common.mysql_abstraction_layer.print_and_log") as log:
+            self.sql_abstraction.query("SELECT", None, name="SLOW")
+
+        statistics = self.sql_abstraction.query_statistics()["SLOW"]
+        assert_that(statistics["total_pool_wait"], is_(1.5))
+        assert_that(statistics["max_time"], is_(0.25))
+        assert_that(statistics["slow"], is_(1))
+        log.assert_called_once()
+
+    def test_GIVEN_query_quicker_than_threshold_WHEN_run_THEN_not_logged(self):
+        with patch("server_common.mysql_abstraction_layer.time", side_effect=[0.0, 0.0, 0.0, 0.25]), \
+                patch("server_common.mysql_abstraction_layer.print_and_log") as log:
+            self.sql_abstraction.query("SELECT", None, name="QUICK")
+
+        assert_that(self.sql_abstraction.query_statistics()["QUICK"]["slow"], is_(0))
+        log.assert_not_called()
+
+    def test_GIVEN_caller_processes_rows_slowly_WHEN_query_returning_cursor_THEN_processing_not_timed(self):
+        self.cursor.__iter__.return_value = iter([("a",)])
+        # before getting a connection, after getting it, query start, row yielded, row processed, query end
+        with patch("server_common.mysql_abstraction_layer.time", side_effect=[0.0, 0.0, 0.0, 0.25, 5.25, 5.5]), \
+                patch("server_common.mysql_abstraction_layer.print_and_log") as log:
+            rows = list(self.sql_abstraction.query_returning_cursor("SELECT", None, name="CURSOR"))
+
+        assert_that(rows, is_([("a",)]))
+        statistics = self.sql_abstraction.query_statistics()["CURSOR"]
+        assert_that(statistics["max_time"], is_(0.5))
+        assert_that(statistics["rows"], is_(1))
+        log.assert_not_called()
+
+    def test_WHEN_commands_run_in_transaction_THEN_statistics_recorded(self):
+        with self.sql_abstraction.transaction() as db:
+            db.update("UPDATE 1", None, name="UPDATE")
+            db.update("UPDATE 2", None, name="UPDATE")
+
+        assert_that(self.sql_abstraction.query_statistics()["UPDATE"]["count"], is_(2))
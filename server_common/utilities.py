@@ -16,14 +16,19 @@
 """
 Utilities for running block server and related ioc's.
 """
+import os
+import atexit
 import threading
+import traceback
 import six
 import time
 import zlib
 import re
 import json
 import codecs
+import base64
 import binascii
+import itertools
 from xml.etree import ElementTree
 from server_common.loggers.logger import Logger
 from server_common.common_exceptions import MaxAttemptsExceededException
@@ -31,7 +36,12 @@ from server_common.common_exceptions import MaxAttemptsExceededException
 
 # Default to base class - does not actually log anything
 LOGGER = Logger()
-_LOGGER_LOCK = threading.RLock()  # To prevent message interleaving between different threads.
+
+MAX_QUEUED_LOG_MESSAGES = 10000
+"""Number of messages which can wait to be logged before further messages are dropped"""
+
+LOG_FLUSH_TIMEOUT = 5.0
+"""Time in seconds to wait on exit for queued messages to be logged"""
 
 
 class SEVERITY(object):
@@ -66,19 +76,171 @@ def set_logger(logger):
     LOGGER = logger
 
 
+class LogWriter(object):
+    """
+    Prints messages to the console and writes them to the log on a background thread, so that logging costs the
+    caller only an enqueue. A single writer keeps messages from different threads from interleaving.
+    """
+
+    def __init__(self, max_queued=MAX_QUEUED_LOG_MESSAGES):
+        """
+        Args:
+            max_queued (int): The number of messages which can wait to be written before further messages are dropped
+        """
+        self._queue = six.moves.queue.Queue(max_queued)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._dropped_since_written = 0
+        self.dropped = 0
+
+    def write(self, message, severity, src):
+        """Queues a message to be printed and logged, dropping it if the queue is full.
+
+        Args:
+            message (string): The message to log
+            severity (string): The severity of the message
+            src (string): The source of the message
+
+        Returns:
+            bool: True if the message was queued, False if it was dropped
+        """
+        self._start()
+        try:
+            self._queue.put_nowait((time.time(), message, severity, src))
+            return True
+        except six.moves.queue.Full:
+            with self._lock:
+                self.dropped += 1
+                self._dropped_since_written += 1
+            return False
+
+    def flush(self, timeout=None):
+        """Waits for the messages queued so far to be written.
+
+        Args:
+            timeout (float, optional): The time in seconds to wait, or None to wait indefinitely
+
+        Returns:
+            bool: True if the messages were written within the timeout
+        """
+        if self._thread is None:
+            return True
+        written = threading.Event()
+        try:
+            self._queue.put((None, written, None, None), timeout=timeout)
+        except six.moves.queue.Full:
+            return False
+        written.wait(timeout)
+        return written.is_set()
+
+    def _start(self):
+        """Starts the writer thread if it is not already running."""
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    thread = threading.Thread(target=self._write_queued_messages, name="LogWriter")
+                    thread.daemon = True
+                    thread.start()
+                    self._thread = thread
+
+    def _write_queued_messages(self):
+        """Writes messages from the queue as they arrive; runs on the writer thread."""
+        while True:
+            message_time, message, severity, src = self._queue.get()
+            if message_time is None:
+                # A flush marker, everything queued before it has been written
+                message.set()
+                continue
+            try:
+                with self._lock:
+                    dropped, self._dropped_since_written = self._dropped_since_written, 0
+                if dropped > 0:
+                    self._write_message(message_time, "{} log messages were dropped as the log queue was full"
+                                        .format(dropped), SEVERITY.MAJOR, src)
+                self._write_message(message_time, message, severity, src)
+            except Exception:
+                traceback.print_exc()
+
+    @staticmethod
+    def _write_message(message_time, message, severity, src):
+        message = "[{:.2f}] {}: {}".format(message_time, severity, message)
+        print(message)
+        LOGGER.write_to_log(message, severity, src)
+
+
+_LOG_WRITER = LogWriter()
+atexit.register(_LOG_WRITER.flush, LOG_FLUSH_TIMEOUT)
+
+
 def print_and_log(message, severity=SEVERITY.INFO, src="BLOCKSVR"):
     """Prints the specified message to the console and writes it to the log.
 
+    The message is written on a background thread; see flush_log to wait for it to be written.
+
     Args:
         message (string): The message to log
         severity (string, optional): Gives the severity of the message. Expected serverities are MAJOR, MINOR and INFO.
                                     Default severity is INFO.
         src (string, optional): Gives the source of the message. Default source is BLOCKSVR.
     """
-    with _LOGGER_LOCK:
-        message = "[{:.2f}] {}: {}".format(time.time(), severity, message)
-        print(message)
-        LOGGER.write_to_log(message, severity, src)
+    _LOG_WRITER.write(message, severity, src)
+
+
+def flush_log(timeout=None):
+    """Waits for the messages passed to print_and_log so far to be printed and logged.
+
+    Args:
+        timeout (float, optional): The time in seconds to wait, or None to wait indefinitely
+
+    Returns:
+        bool: True if the messages were written within the timeout
+    """
+    return _LOG_WRITER.flush(timeout)
+
+
+COMPRESSION_LEVEL = zlib.Z_DEFAULT_COMPRESSION
+"""zlib compression level for payloads, from 1 (fastest) to 9 (smallest), 0 for none or -1 for zlib's default"""
+
+
+def set_compression_level(level):
+    """Sets the zlib compression level used for payloads, trading CPU time for payload size.
+
+    Args:
+        level (int): From 1 (fastest) to 9 (smallest), 0 for no compression or -1 for zlib's default
+    """
+    if not -1 <= level <= 9:
+        raise ValueError("Compression level must be between -1 and 9, was {}".format(level))
+    global COMPRESSION_LEVEL
+    COMPRESSION_LEVEL = level
+
+
+def _compress_str(value, function_name):
+    """Compresses the inputted string at the configured compression level.
+
+    Args:
+        value (str): The string to be compressed
+        function_name (str): Name of the calling function for the error message
+    Returns:
+        bytes : The compressed string
+    """
+    assert type(value) == str, \
+        "Non-str argument passed to {}, maybe Python 2/3 compatibility issue\n" \
+        "Argument was type {} with value {}".format(function_name, value.__class__.__name__, value)
+    return zlib.compress(bytes(value) if six.PY2 else bytes(value, "utf-8"), COMPRESSION_LEVEL)
+
+
+def _compress_json(value):
+    """Converts the inputted object to JSON and compresses it at the configured compression level.
+
+    Args:
+        value (obj): The object to be converted
+    Returns:
+        bytes : The compressed JSON
+    """
+    json_value = json.dumps(value)
+    if not isinstance(json_value, bytes):
+        json_value = json_value.encode("utf-8")
+    return zlib.compress(json_value, COMPRESSION_LEVEL)
 
 
 def compress_and_hex(value):
@@ -89,11 +251,42 @@ def compress_and_hex(value):
     Returns:
         bytes : A compressed and hexed version of the inputted string
     """
-    assert type(value) == str, \
-        "Non-str argument passed to compress_and_hex, maybe Python 2/3 compatibility issue\n" \
-        "Argument was type {} with value {}".format(value.__class__.__name__, value)
-    compr = zlib.compress(bytes(value) if six.PY2 else bytes(value, "utf-8"))
-    return binascii.hexlify(compr)
+    return binascii.hexlify(_compress_str(value, "compress_and_hex"))
+
+
+def compress_and_base64(value):
+    """Compresses the inputted string and encodes it as base64, which is a third smaller than hex.
+
+    Args:
+        value (str): The string to be compressed
+    Returns:
+        bytes : A compressed and base64 encoded version of the inputted string
+    """
+    return base64.b64encode(_compress_str(value, "compress_and_base64"))
+
+
+def base64_and_decompress(value):
+    """Decompresses the inputted string, assuming it is in base64 encoding.
+
+    Args:
+        value (bytes): The string to be decompressed, encoded in base64
+
+    Returns:
+        bytes : A decompressed version of the inputted string
+    """
+    return zlib.decompress(base64.b64decode(value))
+
+
+def compact_waveform_length(hex_length):
+    """Gets the length of waveform needed to hold, base64 encoded, a payload which fits in a hex waveform.
+
+    Args:
+        hex_length (int): The length of the hex waveform
+
+    Returns:
+        int : The length of the base64 waveform
+    """
+    return 4 * ((hex_length // 2 + 2) // 3)
 
 
 def dehex_and_decompress(value):
@@ -111,6 +304,42 @@ def dehex_and_decompress(value):
     return zlib.decompress(binascii.unhexlify(value))
 
 
+def json_compress_and_hex(value):
+    """Converts the inputted object to JSON, then compresses it and encodes it as hex.
+
+    Args:
+        value (obj): The object to be converted
+
+    Returns:
+        bytes : A compressed and hexed version of the JSON representation of the object
+    """
+    return binascii.hexlify(_compress_json(value))
+
+
+def json_compress_and_base64(value):
+    """Converts the inputted object to JSON, then compresses it and encodes it as base64.
+
+    Args:
+        value (obj): The object to be converted
+
+    Returns:
+        bytes : A compressed and base64 encoded version of the JSON representation of the object
+    """
+    return base64.b64encode(_compress_json(value))
+
+
+def dehex_decompress_and_load_json(value):
+    """Decompresses the inputted hex encoded string and converts it from JSON into an object.
+
+    Args:
+        value (bytes): The compressed JSON, encoded in hex
+
+    Returns:
+        obj : An object corresponding to the JSON
+    """
+    return json.loads(zlib.decompress(binascii.unhexlify(value)).decode("utf-8"))
+
+
 def dehex_and_decompress_waveform(value):
     """Decompresses the inputted waveform, assuming it is a array of integers representing characters (null terminated).
 
@@ -124,9 +353,7 @@ def dehex_and_decompress_waveform(value):
         "Non-list argument passed to dehex_and_decompress_waveform\n" \
         "Argument was type {} with value {}".format(value.__class__.__name__, value)
 
-    unicode_rep = waveform_to_string(value)
-    bytes_rep = unicode_rep.encode("ascii")
-    return dehex_and_decompress(bytes_rep)
+    return dehex_and_decompress(bytes(_waveform_to_bytes(value)))
 
 
 def convert_to_json(value):
@@ -192,6 +419,90 @@ def value_list_to_xml(value_list, grp, group_tag, item_tag):
                 xml_item.set(str(cn), str(cv))
 
 
+def _escape_xml_data(text):
+    """Escapes text and attribute values in the same way as minidom."""
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace("\"", "&quot;").replace(">", "&gt;")
+
+
+def _escape_xml_attribute(value):
+    """Escapes an attribute value in the same way as minidom. Under Python 2 ElementTree writes tabs and carriage
+    returns in attribute values as they are, so they are read back as spaces when minidom reparses them."""
+    if six.PY2:
+        value = value.replace("\t", " ").replace("\r", " ")
+    return _escape_xml_data(value)
+
+
+def _is_namespace_declaration(name):
+    """Whether an attribute name declares a namespace."""
+    return name == "xmlns" or name.startswith("xmlns:")
+
+
+def _normalise_xml_newlines(text):
+    """Line endings are normalised by an XML parser, so do the same when skipping the reparse."""
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def _element_to_pretty_xml(element, indent, add_indent, new_line, output):
+    """Appends the pretty printed XML for an element (but not its tail) to the output list.
+
+    Mirrors the layout of minidom's Element.writexml so that the result is identical to reparsing the
+    ElementTree output with minidom and calling toprettyxml.
+    """
+    output.append(indent + "<" + element.tag)
+    if six.PY2:
+        attributes = sorted(element.items())
+    else:
+        # minidom writes the namespace declarations before any other attributes
+        attributes = sorted(element.items(), key=lambda item: not _is_namespace_declaration(item[0]))
+    for name, value in attributes:
+        output.append(" " + name + "=\"" + _escape_xml_attribute(value) + "\"")
+
+    # minidom sees each non-empty text and tail as a separate text node
+    children = []
+    if element.text:
+        children.append(_normalise_xml_newlines(element.text))
+    for child in element:
+        children.append(child)
+        if child.tail:
+            children.append(_normalise_xml_newlines(child.tail))
+
+    if not children:
+        output.append("/>" + new_line)
+        return
+
+    output.append(">")
+    if len(children) == 1 and isinstance(children[0], six.string_types):
+        output.append(_escape_xml_data(children[0]))
+    else:
+        output.append(new_line)
+        for child in children:
+            if isinstance(child, six.string_types):
+                output.append(_escape_xml_data(indent + add_indent + child + new_line))
+            else:
+                _element_to_pretty_xml(child, indent + add_indent, add_indent, new_line, output)
+        output.append(indent)
+    output.append("</" + element.tag + ">" + new_line)
+
+
+def element_to_pretty_xml(root, add_indent="\t", new_line="\n"):
+    """Converts an ElementTree element into pretty printed XML in a single pass.
+
+    The output is identical to minidom.parseString(ElementTree.tostring(root)).toprettyxml() but does not build
+    and reparse an intermediate document.
+
+    Args:
+        root (ElementTree.Element): The root of the XML tree
+        add_indent (string): The indentation added for each level of the tree
+        new_line (string): The line separator
+
+    Returns:
+        string : The pretty printed XML including the XML declaration
+    """
+    output = ["<?xml version=\"1.0\" ?>" + new_line]
+    _element_to_pretty_xml(root, "", add_indent, new_line, output)
+    return "".join(output)
+
+
 def check_pv_name_valid(name):
     """Checks that text conforms to the ISIS PV naming standard
 
@@ -261,6 +572,27 @@ def parse_xml_removing_namespace(file_path):
     return it.root
 
 
+def _waveform_to_bytes(data):
+    """
+    Args:
+        data: waveform of character values as a list or array, null terminated
+
+    Returns: bytearray of the characters before the null terminator
+
+    Raises:
+        ValueError: if a character value does not fit in a byte
+        TypeError: if a character value is not an integer
+    """
+    if hasattr(data, "tolist"):
+        # numpy arrays must be converted by value, not from their underlying buffer
+        data = data.tolist()
+    chars = bytearray(data)
+    null_index = chars.find(b"\0")
+    if null_index != -1:
+        del chars[null_index:]
+    return chars
+
+
 def waveform_to_string(data):
     """
     Args:
@@ -269,12 +601,12 @@ def waveform_to_string(data):
     Returns: waveform as a sting
 
     """
-    output = six.text_type()
-    for i in data:
-        if i == 0:
-            break
-        output += six.unichr(i)
-    return output
+    try:
+        # latin-1 maps each byte to the character with the same code point
+        return _waveform_to_bytes(data).decode("latin-1")
+    except (TypeError, ValueError):
+        # Characters which do not fit in a byte
+        return six.text_type().join(six.unichr(i) for i in itertools.takewhile(lambda i: i != 0, data))
 
 
 def ioc_restart_pending(ioc_pv, channel_access):
@@ -319,6 +651,48 @@ def retry(max_attempts, interval, exception):
     return _tags_decorator
 
 
+# Flags for MoveFileExW, to replace an existing file and return only once the move is on disk
+_MOVEFILE_REPLACE_EXISTING = 0x1
+_MOVEFILE_WRITE_THROUGH = 0x8
+
+
+def replace_file(source_path, destination_path):
+    """
+    Move a file over another one, replacing it atomically.
+
+    Args:
+        source_path (str): the file to move
+        destination_path (str): the file to replace
+    """
+    if hasattr(os, "replace"):
+        os.replace(source_path, destination_path)
+    elif os.name == "nt":
+        # Python 2 on Windows cannot rename over an existing file, so ask Windows to replace it in one step
+        _move_file_replacing_existing(source_path, destination_path)
+    else:
+        os.rename(source_path, destination_path)
+
+
+def _move_file_replacing_existing(source_path, destination_path):
+    """
+    Move a file over another one using MoveFileExW, which replaces the destination atomically on Windows.
+
+    Args:
+        source_path (str): the file to move
+        destination_path (str): the file to replace
+    """
+    import ctypes
+    import sys
+
+    def to_text(path):
+        return path if isinstance(path, six.text_type) else path.decode(sys.getfilesystemencoding())
+
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    if not kernel32.MoveFileExW(to_text(source_path), to_text(destination_path),
+                                _MOVEFILE_REPLACE_EXISTING | _MOVEFILE_WRITE_THROUGH):
+        raise ctypes.WinError(ctypes.get_last_error())
+
+
 def remove_from_end(string, text_to_remove):
     """
     Remove a String from the end of a string if it exists